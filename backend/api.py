@@ -2,12 +2,16 @@
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from backend.services.scraper.scrape_amazon_titles import scrape_amazon_product_page, haversine, origin_hubs, uk_hub
+from backend.services.scraper.scrape_amazon_titles import scrape_amazon_product_page
+from backend.utils.geo import get_distance_table, haversine, uk_hub
+from backend.services.scraper.scrape_cache import ScrapeCache
 import pgeocode
 
 app = Flask(__name__)
 CORS(app)
 
+scrape_cache = ScrapeCache()  # warmed from the product catalog at startup, see __main__
+
 # Helper function to determine transport mode based on distance
 def determine_transport_mode(distance_km):
     if distance_km < 1500:
@@ -65,16 +69,18 @@ def estimate():
     user_lat, user_lon = location.latitude, location.longitude
 
     # Scrape product
-    product = scrape_amazon_product_page(url)
+    product = scrape_cache.get_or_scrape(url, scrape_amazon_product_page)
     if not product:
         return jsonify({'error': 'Could not fetch product'}), 500
 
     print(f"🔍 Scraped product: {product.get('title', 'N/A')}")
 
-    origin = origin_hubs.get(product['brand_estimated_origin'], uk_hub)
+    table = get_distance_table()
+    origin_country = product['brand_estimated_origin']
+    origin_lat, origin_lon = table.coords(origin_country) if origin_country in table else (uk_hub['lat'], uk_hub['lon'])
 
     # Distance from origin to user
-    distance = haversine(origin['lat'], origin['lon'], user_lat, user_lon)
+    distance = haversine(origin_lat, origin_lon, user_lat, user_lon)
     origin_distance = round(distance, 1)
 
     # Distance from UK hub to user
@@ -150,4 +156,5 @@ def estimate():
 
 
 if __name__ == '__main__':
+    scrape_cache.warm()
     app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
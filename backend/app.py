@@ -1,15 +1,27 @@
 
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, Response, stream_with_context
 from flask_cors import CORS
-import joblib
 import sys
 import os
 import json
+import math
+import numpy as np
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from backend.auth import auth
-import pandas as pd
-from backend.services.scraper.scrape_amazon_titles  import (scrape_amazon_product_page, estimate_origin_country, resolve_brand_origin, save_brand_locations)
-import csv
+from backend.utils.write_behind import WriteBehindWriter, read_jsonl
+from backend.utils.eco_data_cache import EcoDataCache, encode_cursor, decode_cursor
+from backend.utils.insights_store import InsightsStore
+from backend.utils.jobs import JobManager, JobQueueFull, sse_stream
+from backend.utils.normalizer import get_normalizer
+from backend.services.ml_interface.decision_table import DecisionTable, default_table_path
+from backend.services.ml_interface.serving_bundle import load_serving_bundle, memory_usage
+from backend.services.ml_interface.feature_pipeline import normalize_value as normalize_feature
+from backend.services.scraper.scrape_cache import ScrapeCache
+from backend.services.scraper.browser_pool import get_browser_pool
+from backend.services.scraper.page_fetcher import get_page_fetcher
+from backend.services.scraper.product_catalog import get_product_catalog
+from backend.services.scraper.scrape_amazon_titles  import (scrape_amazon_product_page, estimate_origin_country, resolve_brand_origin, save_brand_locations, brand_locations,
+                                                              cleaned_products)
 import re
 
 # === Load Flask ===
@@ -46,51 +58,106 @@ def apply_cors(response):
     return response
 
 
-SUBMISSION_FILE = "submitted_predictions.json"
+# Request-time log writes go through one background group-commit writer
+log_writer = WriteBehindWriter().start()
+
+# === Scrape result cache (memory LRU + shared SQLite, keyed by ASIN) ===
+scrape_cache = ScrapeCache()
+
+
+def warm_caches():
+    """Startup work that reads the product catalog; kept out of import so importing the app touches no data files."""
+    scrape_cache.warm()
+
+
+# Launch the pooled Chromes in the background so the first scrape doesn't wait for them
+if os.environ.get("ECO_BROWSER_PREWARM", "false").lower() == "true":
+    get_browser_pool().prewarm(background=True)
+
+SUBMISSION_FILE = "submitted_predictions.jsonl"
+LEGACY_SUBMISSION_FILE = "submitted_predictions.json"
+FEEDBACK_FILE = os.path.join("ml_model", "user_feedback.jsonl")
+
+
+def load_submissions():
+    log_writer.flush()
+    data = []
+    if os.path.exists(LEGACY_SUBMISSION_FILE):
+        with open(LEGACY_SUBMISSION_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    return data + read_jsonl(SUBMISSION_FILE)
 
 
 @app.route("/admin/submissions")
 def get_submissions():
-    if not os.path.exists(SUBMISSION_FILE):
-        return jsonify([])
-    with open(SUBMISSION_FILE, "r", encoding="utf-8") as f:
-        return jsonify(json.load(f))
+    return jsonify(load_submissions())
 
 @app.route("/admin/update", methods=["POST"])
 def update_submission():
     item = request.json
-    with open(SUBMISSION_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = load_submissions()
     for i, row in enumerate(data):
         if row["title"] == item["title"]:
             data[i] = item
             break
-    with open(SUBMISSION_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+
+    # Rare admin edit: rewrite the log once (folding in the legacy JSON file)
+    tmp_path = SUBMISSION_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for row in data:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, SUBMISSION_FILE)
+    if os.path.exists(LEGACY_SUBMISSION_FILE):
+        os.remove(LEGACY_SUBMISSION_FILE)
     return jsonify({"status": "success"})
 
+@app.route("/admin/write-queue")
+def get_write_queue_metrics():
+    return jsonify(log_writer.metrics())
+
+@app.route("/admin/scrape-cache")
+def get_scrape_cache_metrics():
+    return jsonify(scrape_cache.metrics())
+
+@app.route("/admin/browser-pool")
+def get_browser_pool_metrics():
+    return jsonify(get_browser_pool().metrics())
+
+@app.route("/admin/fetcher")
+def get_fetcher_metrics():
+    return jsonify(get_page_fetcher().stats())
+
+@app.route("/admin/brand-store")
+def get_brand_store_metrics():
+    return jsonify(brand_locations.stats())
+
+@app.route("/admin/cleaned-products")
+def get_cleaned_products_metrics():
+    return jsonify(cleaned_products.stats())
+
+@app.route("/admin/catalog")
+def get_catalog_metrics():
+    return jsonify(get_product_catalog().metrics())
+
+@app.route("/admin/serving")
+def get_serving_metrics():
+    return jsonify({
+        "pid": os.getpid(),
+        "bundle": bundle.path,
+        "mmap": bundle.mapped,
+        "fingerprint": bundle.fingerprint,
+        "engine": type(engine).__name__,
+        "memory": memory_usage(),
+    })
+
 
 def log_submission(product):
-    path = "submitted_predictions.json"
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    else:
-        data = []
-    data.append(product)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-        
-def load_material_co2_data():
-    try:
-        import pandas as pd
-        df = pd.read_csv("ml_model/defra_material_intensity.csv")
-        return {str(row["material"]).lower(): float(row["co2_per_kg"]) for _, row in df.iterrows()}
-    except Exception as e:
-        print(f"⚠️ Could not load CO₂ map: {e}")
-        return {}
+    log_submissions([product])
+
+def log_submissions(products):
+    for product in products:
+        log_writer.write_json(SUBMISSION_FILE, product)
 
-material_co2_map = load_material_co2_data()
 
 @app.route("/predict", methods=["POST"])
 def predict_eco_score():
@@ -119,52 +186,25 @@ def predict_eco_score():
         recyclability = normalize_feature(data.get("recyclability"), "Medium")
         origin = normalize_feature(data.get("origin"), "Other")
 
-        # === Encode features
-        material_encoded = safe_encode(material, material_encoder, "Other")
-        transport_encoded = safe_encode(transport, transport_encoder, "Land")
-        recycle_encoded = safe_encode(recyclability, recycle_encoder, "Medium")
-        origin_encoded = safe_encode(origin, origin_encoder, "Other")
-
-        # === Bin weight (for 6th feature)
-        def bin_weight(w):
-            if w < 0.5:
-                return 0
-            elif w < 2:
-                return 1
-            elif w < 10:
-                return 2
-            else:
-                return 3
-
-        weight_bin_encoded = bin_weight(weight)
-
-        # === Prepare input for model
-        X = [[
-            material_encoded,
-            weight,
-            transport_encoded,
-            recycle_encoded,
-            origin_encoded,
-            weight_bin_encoded
-        ]]
-        
-        prediction = model.predict(X)
-        decoded_score = label_encoder.inverse_transform([prediction[0]])[0]
+        # === Encode features (same pipeline the model was trained with)
+        X = pipeline.transform_one({
+            "material": material,
+            "weight": weight,
+            "transport": transport,
+            "recyclability": recyclability,
+            "origin": origin
+        })
+        encoded_input = pipeline.describe(X[0])
 
-        confidence = 0.0
-        if hasattr(model, "predict_proba"):
-            proba = model.predict_proba(X)
-            confidence = round(max(proba[0]) * 100, 1)
+        prediction, proba = engine.predict_with_proba(X)
+        decoded_score = pipeline.decode_labels(prediction)[0]
+        confidence = round(max(proba[0]) * 100, 1)
 
         # === Feature Importance (optional)
-        global_importance = model.feature_importances_
+        global_importance = feature_importances
         local_impact = {
-            "material": to_python_type(material_encoded * global_importance[0]),
-            "weight": to_python_type(weight * global_importance[1]),
-            "transport": to_python_type(transport_encoded * global_importance[2]),
-            "recyclability": to_python_type(recycle_encoded * global_importance[3]),
-            "origin": to_python_type(origin_encoded * global_importance[4]),
-            "weight_bin": to_python_type(weight_bin_encoded * global_importance[5]),
+            column: to_python_type(value * global_importance[i])
+            for i, (column, value) in enumerate(encoded_input.items())
         }
 
         # === Log the prediction
@@ -192,14 +232,7 @@ def predict_eco_score():
                 "recyclability": recyclability,
                 "origin": origin
             },
-            "encoded_input": {
-                "material": to_python_type(material_encoded),
-                "weight": to_python_type(weight),
-                "transport": to_python_type(transport_encoded),
-                "recyclability": to_python_type(recycle_encoded),
-                "origin": to_python_type(origin_encoded),
-                "weight_bin": to_python_type(weight_bin_encoded)
-            },
+            "encoded_input": encoded_input,
             "feature_impact": local_impact
         })
 
@@ -208,18 +241,138 @@ def predict_eco_score():
         return jsonify({"error": str(e)}), 500
 
 
+# === Batch scoring ===
+MAX_BATCH_SIZE = 1000
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def parse_batch_payload():
+    """
+    Reads the batch body as NDJSON (one product per line) or as a JSON list,
+    optionally wrapped as {"products": [...]}.
+    Returns (rows, errors) where rows is a list of (index, product) pairs,
+    or (None, None) if the body is not a batch at all.
+    """
+    rows, errors = [], []
+
+    if request.mimetype in NDJSON_MIMETYPES:
+        lines = [line for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        for index, line in enumerate(lines):
+            try:
+                rows.append((index, json.loads(line)))
+            except ValueError as e:
+                errors.append({"index": index, "error": f"Invalid JSON: {e}"})
+        return rows, errors
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("products")
+    if not isinstance(data, list):
+        return None, None
+    return list(enumerate(data)), errors
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_eco_score_batch():
+    rows, errors = parse_batch_payload()
+    if rows is None:
+        return jsonify({"error": "Expected a JSON list of products or an NDJSON body"}), 400
+
+    if len(rows) + len(errors) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Batch too large: max {MAX_BATCH_SIZE} products per request"}), 413
+
+    print(f"📦 /predict/batch received {len(rows) + len(errors)} products")
+
+    # === Validate + normalize each row, collecting per-row errors
+    valid = []
+    for index, item in rows:
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "Product must be a JSON object"})
+            continue
+        try:
+            weight = float(item.get("weight") or 0.0)
+        except (TypeError, ValueError):
+            errors.append({"index": index, "error": f"Invalid weight: {item.get('weight')!r}"})
+            continue
+        if not math.isfinite(weight) or weight < 0:
+            errors.append({"index": index, "error": f"Invalid weight: {item.get('weight')!r}"})
+            continue
+
+        valid.append((index, {
+            "title": item.get("title", "Manual Submission"),
+            "material": normalize_feature(item.get("material"), "Other"),
+            "weight": weight,
+            "transport": normalize_feature(item.get("transport"), "Land"),
+            "recyclability": normalize_feature(item.get("recyclability"), "Medium"),
+            "origin": normalize_feature(item.get("origin"), "Other"),
+        }))
+
+    results = []
+    if valid:
+        products = [p for _, p in valid]
+
+        # === Encode column-wise
+        X = pipeline.transform(products)
+
+        # === One pass over the whole matrix
+        predictions, proba = engine.predict_with_proba(X)
+        labels = pipeline.decode_labels(predictions)
+        confidences = np.round(proba.max(axis=1) * 100, 1)
+
+        for row, ((index, product), label, confidence) in enumerate(zip(valid, labels, confidences)):
+            results.append({
+                "index": index,
+                "title": product["title"],
+                "predicted_label": str(label),
+                "confidence": f"{to_python_type(confidence)}%",
+                "raw_input": {k: product[k] for k in ("material", "weight", "transport", "recyclability", "origin")},
+                "encoded_input": pipeline.describe(X[row])
+            })
+
+        # === Log the whole batch in one write
+        log_submissions([{
+            "title": r["title"],
+            "raw_input": r["raw_input"],
+            "predicted_label": r["predicted_label"],
+            "confidence": r["confidence"]
+        } for r in results])
+
+    errors.sort(key=lambda e: e["index"])
+    return jsonify({
+        "results": results,
+        "errors": errors,
+        "count": len(results),
+        "failed": len(errors)
+    })
+
+
 # === Load Model and Encoders ===
 model_dir = "ml_model"
-encoders_dir = os.path.join(model_dir, "encoders")
 
-model = joblib.load(os.path.join(model_dir, "eco_model.pkl"))
-material_encoder = joblib.load(os.path.join(encoders_dir, "material_encoder.pkl"))
-transport_encoder = joblib.load(os.path.join(encoders_dir, "transport_encoder.pkl"))
-recycle_encoder = joblib.load(os.path.join(encoders_dir, "recycle_encoder.pkl"))
-label_encoder = joblib.load(os.path.join(encoders_dir, "label_encoder.pkl"))
-origin_encoder = joblib.load(os.path.join(encoders_dir, "origin_encoder.pkl"))
+# "compiled" walks the flattened forest, "table" answers from the precomputed decision table
+SERVING_MODE = os.environ.get("ECO_SERVING_MODE", "compiled")
 
-valid_scores = list(label_encoder.classes_)
+def load_serving_engine(bundle, mode):
+    if mode == "table":
+        table_path = default_table_path(model_dir)
+        if not os.path.exists(table_path):
+            print(f"⚠️ No decision table at {table_path}. Build it with: python -m backend.services.ml_interface.decision_table build")
+        else:
+            table = DecisionTable.load(table_path)
+            if table.fingerprint == bundle.fingerprint:
+                print(f"🗂️ Serving predictions from decision table ({len(table.entries)} keys)")
+                return table
+            print("⚠️ Decision table was built from a different model. Rebuild it; using compiled forest.")
+    return bundle.forest
+
+# Model arrays, encoders and DEFRA factors come from one mmap'd bundle (see serving_bundle.py);
+# under the pre-fork server the parent has already opened it and workers share its pages
+bundle = load_serving_bundle()
+engine = load_serving_engine(bundle, SERVING_MODE)
+feature_importances = bundle.feature_importances_
+pipeline = bundle.pipeline
+
+valid_scores = pipeline.labels
 print("✅ Loaded label classes:", valid_scores)
 
 
@@ -251,33 +404,13 @@ def get_model_metrics():
         return jsonify({"error": str(e)}), 500
 
     
-# === Load CO2 Map ===
-def load_material_co2_data():
-    try:
-        df = pd.read_csv(os.path.join(model_dir, "defra_material_intensity.csv"))
-        return dict(zip(df["material"], df["co2_per_kg"]))
-    except Exception as e:
-        print(f"⚠️ Could not load DEFRA data: {e}")
-        return {}
-
-material_co2_map = load_material_co2_data()
-
-# === Helpers ===
-def normalize_feature(value, default):
-    clean = str(value or default).strip().title()
-    return default if clean.lower() == "unknown" else clean
-
-def safe_encode(value, encoder, default):
-    value = normalize_feature(value, default)
-    if value not in encoder.classes_:
-        print(f"⚠️ '{value}' not in encoder classes. Defaulting to '{default}'.")
-        value = default
-    return encoder.transform([value])[0]
+# === CO2 Map (DEFRA factors, packed into the serving bundle) ===
+material_co2_map = bundle.material_co2
 
 @app.route("/api/feature-importance")
 def get_feature_importance():
     try:
-        importances = model.feature_importances_
+        importances = feature_importances
         features = ["material", "weight", "transport", "recyclability", "origin"]
         data = [{"feature": f, "importance": round(i * 100, 2)} for f, i in zip(features, importances)]
         return jsonify(data)
@@ -297,64 +430,92 @@ def to_python_type(obj):
 
 # === Fuzzy Matching Helpers ===
 def fuzzy_match_material(material):
-    material_keywords = {
-        "Plastic": ["plastic", "plastics"],
-        "Glass": ["glass"],
-        "Aluminium": ["aluminium", "aluminum"],
-        "Steel": ["steel"],
-        "Paper": ["paper", "papers"],
-        "Cardboard": ["cardboard", "corrugated"],
-    }
-
-    material_lower = material.lower()
-    for clean, keywords in material_keywords.items():
-        if any(keyword in material_lower for keyword in keywords):
-            return clean
-    return material
+    return get_normalizer().material(material) or material
 
 def fuzzy_match_origin(origin):
-    origin_keywords = {
-        "China": ["china"],
-        "UK": ["uk", "united kingdom"],
-        "USA": ["usa", "united states", "america"],
-        "Germany": ["germany"],
-        "France": ["france"],
-        "Italy": ["italy"],
-    }
+    return get_normalizer().origin(origin) or origin
+
+eco_data_cache = EcoDataCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), "eco_dataset.csv"))
+
+ECO_DATA_DEFAULT_LIMIT = 100
+ECO_DATA_MAX_LIMIT = 1000
+ECO_DATA_FILTERS = {
+    "material": "material",
+    "origin": "origin",
+    "score": "true_eco_score",
+    "transport": "transport",
+    "recyclability": "recyclability",
+}
 
-    origin_lower = origin.lower()
-    for clean, keywords in origin_keywords.items():
-        if any(keyword in origin_lower for keyword in keywords):
-            return clean
-    return origin
 
 @app.route("/api/eco-data", methods=["GET"])
 def fetch_eco_dataset():
+    """
+    Without query parameters this returns every row, as before.
+
+    Query parameters switch to a paged view:
+      fields=title,material      column projection
+      material=Steel,Glass       filters (also origin, score, transport, recyclability)
+      min_co2=0.5&max_co2=3      CO₂ range
+      sort=co2_emissions&order=desc
+      limit=100&offset=0 or cursor=<next_cursor>
+    """
     try:
+        snapshot = eco_data_cache.snapshot()
 
-        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(BASE_DIR, 'eco_dataset.csv')
+        if not request.args:
+            return app.response_class(snapshot.full_json, mimetype="application/json")
 
-        df = pd.read_csv(file_path)
+        args = request.args
+        fields = [f for f in args.get("fields", "").split(",") if f] or None
+        unknown = [f for f in (fields or []) + [args.get("sort")] if f and f not in snapshot.fields]
+        if unknown:
+            return jsonify({"error": f"Unknown column(s): {', '.join(unknown)}"}), 400
 
-        df = df.dropna(subset=["material", "true_eco_score", "co2_emissions"])
-        return jsonify(df.to_dict(orient="records"))
+        filters = {
+            column: args.get(param).split(",")
+            for param, column in ECO_DATA_FILTERS.items()
+            if args.get(param) and column in snapshot.index
+        }
+        co2_range = (args.get("min_co2", type=float), args.get("max_co2", type=float))
+
+        limit = min(args.get("limit", ECO_DATA_DEFAULT_LIMIT, type=int), ECO_DATA_MAX_LIMIT)
+        try:
+            offset = decode_cursor(args["cursor"]) if args.get("cursor") else args.get("offset", 0, type=int)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if limit < 1 or offset < 0:
+            return jsonify({"error": "limit must be positive and offset non-negative"}), 400
+
+        rows, total = snapshot.query(
+            filters=filters,
+            co2_range=co2_range,
+            fields=fields,
+            sort=args.get("sort"),
+            descending=args.get("order", "asc").lower() == "desc",
+            offset=offset,
+            limit=limit,
+        )
+        next_offset = offset + len(rows)
+        return jsonify({
+            "rows": rows,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "next_cursor": encode_cursor(next_offset) if next_offset < total else None,
+        })
     except Exception as e:
         print(f"❌ Failed to return eco dataset: {e}")
         return jsonify({"error": str(e)}), 500
 
+insights_store = InsightsStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), "eco_dataset.csv"))
+
 @app.route("/insights", methods=["GET"])
 def insights_dashboard():
     try:
-        # Load the logged data
-        df = pd.read_csv(os.path.join(os.path.dirname(__file__), "eco_dataset.csv"))
-        df = df.dropna(subset=["material", "true_eco_score", "co2_emissions"])  # Clean
-
-        # Keep only the needed fields
-        insights = df[["material", "true_eco_score", "co2_emissions"]]
-        insights = insights.head(1000)  # Limit for frontend performance
-
-        return jsonify(insights.to_dict(orient="records"))
+        # Picks up only rows appended since the last request
+        insights_store.refresh()
+        return jsonify(insights_store.cubes(top=request.args.get("top", type=int)))
     except Exception as e:
         print(f"❌ Failed to serve insights: {e}")
         return jsonify({"error": str(e)}), 500
@@ -363,19 +524,8 @@ def insights_dashboard():
 def save_feedback():
     try:
         data = request.get_json()
-        feedback_dir = os.path.join("ml_model", "user_feedback.json")
         print("Received feedback:", data)
-        # Append to file
-        import json
-        existing = []
-        if os.path.exists(feedback_dir):
-            with open(feedback_dir, "r") as f:
-                existing = json.load(f)
-
-        existing.append(data)
-
-        with open(feedback_dir, "w") as f:
-            json.dump(existing, f, indent=2)
+        log_writer.write_json(FEEDBACK_FILE, data)
 
         return jsonify({"message": "✅ Feedback saved!"}), 200
 
@@ -383,228 +533,310 @@ def save_feedback():
         print(f"❌ Feedback error: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route("/estimate_emissions", methods=["POST", "OPTIONS"])
-def estimate_emissions():
-    if request.method == "OPTIONS":
-        # This is a preflight request (CORS)
-        return '', 200
+class EstimateError(Exception):
+    pass
 
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Missing JSON in request"}), 400
 
-    # ... your existing logic ...
+def compute_estimate(data, progress=lambda stage, **info: None):
+    """
+    Scrapes (or takes the manual fields), predicts and logs one product.
+    Returns the /estimate_emissions response body; raises EstimateError when
+    the product cannot be scraped. `progress(stage, **info)` reports each step.
+    """
+    url = data.get("amazon_url")
+    user_transport = data.get("transport")  # User's selected mode like "Air"
+    include_packaging = data.get("include_packaging", True)
 
-    try:
-        data = request.get_json()
-        url = data.get("amazon_url")
-        user_transport = data.get("transport")  # User's selected mode like "Air"
-        include_packaging = data.get("include_packaging", True)
+    # Default empty product
+    product = {}
 
-        # Default empty product
-        product = {}
+    # Use mock product if scraping is skipped
+    if url:
+        print("🌐 Scraping real product:", url)
+        progress("scraping", url=url)
+        product = scrape_cache.get_or_scrape(url, scrape_amazon_product_page)
+        if not product:
+            raise EstimateError("Failed to scrape product")
+        progress("scraped", title=product.get("title"))
 
-        # Use mock product if scraping is skipped
-        if url:
-            print("🌐 Scraping real product:", url)
-            product = scrape_amazon_product_page(url)
-            if not product:
-                return jsonify({"error": "Failed to scrape product"}), 500
+        title = product.get("title", "Amazon Product")
+        material = normalize_feature(product.get("material_type"), "Other")
+        transport = normalize_feature(data.get("transport"), "Land")
+        print("🛫 Transport received from frontend:", data.get("transport"))
 
-            title = product.get("title", "Amazon Product")
-            material = normalize_feature(product.get("material_type"), "Other")
-            transport = normalize_feature(data.get("transport"), "Land")
-            print("🛫 Transport received from frontend:", data.get("transport"))
 
 
+        recyclability = normalize_feature(product.get("recyclability"), "Medium")
 
-            recyclability = normalize_feature(product.get("recyclability"), "Medium")
+        origin = normalize_feature(
+            product.get("brand_estimated_origin") or product.get("origin"), 
+            "Other"
+        )
 
-            origin = normalize_feature(
-                product.get("brand_estimated_origin") or product.get("origin"), 
-                "Other"
-            )
+        if origin in ["Unknown", "Other", None, ""] and title:
+            guessed = estimate_origin_country(title)
+            if guessed and guessed.lower() != "other":
+                print(f"🧠 Fallback origin estimate from title: {guessed}")
+                origin = guessed
+            else:
+                print(f"🔒 Skipped fallback — origin already trusted: {origin}")
 
-            if origin in ["Unknown", "Other", None, ""] and title:
-                guessed = estimate_origin_country(title)
-                if guessed and guessed.lower() != "other":
-                    print(f"🧠 Fallback origin estimate from title: {guessed}")
-                    origin = guessed
-                else:
-                    print(f"🔒 Skipped fallback — origin already trusted: {origin}")
+        dimensions = product.get("dimensions_cm")
+        raw_weight = product.get("raw_product_weight_kg")
+        estimated_weight = product.get("estimated_weight_kg")
 
-            dimensions = product.get("dimensions_cm")
-            raw_weight = product.get("raw_product_weight_kg")
-            estimated_weight = product.get("estimated_weight_kg")
+        try:
+            weight = float(raw_weight if raw_weight not in [None, 0] else estimated_weight if estimated_weight not in [None, 0] else 0.5)
+        except:
+            weight = 0.5
 
-            try:
-                weight = float(raw_weight if raw_weight not in [None, 0] else estimated_weight if estimated_weight not in [None, 0] else 0.5)
-            except:
-                weight = 0.5
 
+        if include_packaging:
+            weight *= 1.05
 
-            if include_packaging:
-                weight *= 1.05
+        print(f"✅ Final product weight used: {weight:.2f} kg (5% packaging included)")
 
-            print(f"✅ Final product weight used: {weight:.2f} kg (5% packaging included)")
 
+        raw_weight = product.get("raw_product_weight_kg")
+        estimated_weight = product.get("estimated_weight_kg")
+        weight = float(raw_weight or estimated_weight or 0.5)
+        if include_packaging:
+            weight *= 1.05
 
-            raw_weight = product.get("raw_product_weight_kg")
-            estimated_weight = product.get("estimated_weight_kg")
+        try:
             weight = float(raw_weight or estimated_weight or 0.5)
-            if include_packaging:
-                weight *= 1.05
-
-            try:
-                weight = float(raw_weight or estimated_weight or 0.5)
-            except:
-                weight = 0.5
+        except:
+            weight = 0.5
 
-            if include_packaging:
-                weight *= 1.05
+        if include_packaging:
+            weight *= 1.05
 
-            print(f"✅ Final product weight used: {weight:.2f} kg (5% packaging included)")
+        print(f"✅ Final product weight used: {weight:.2f} kg (5% packaging included)")
 
 
-        else:
-            title = data.get("title", "Manual Product")
-            material = normalize_feature(data.get("material"), "Other")
-            transport = normalize_feature(data.get("transport"), "Land")
-            print("🛫 Transport received from frontend:", data.get("transport"))
+    else:
+        title = data.get("title", "Manual Product")
+        material = normalize_feature(data.get("material"), "Other")
+        transport = normalize_feature(data.get("transport"), "Land")
+        print("🛫 Transport received from frontend:", data.get("transport"))
 
-            recyclability = normalize_feature(data.get("recyclability"), "Medium")
-            origin = normalize_feature(data.get("origin"), "Other")
-            dimensions = None
+        recyclability = normalize_feature(data.get("recyclability"), "Medium")
+        origin = normalize_feature(data.get("origin"), "Other")
+        dimensions = None
+        raw_weight = estimated_weight = None
 
-            try:
-                weight = float(data.get("weight") or 0.5)
-            except:
-                weight = 0.5
-
-            if include_packaging:
-                weight *= 1.05
-
-            print(f"✅ Final manual product weight used: {weight} kg")
-
-        # Fuzzy material and origin mappings
-        material = fuzzy_match_material(material)
-        origin = fuzzy_match_origin(origin)
-
-        # Calculate carbon
-        carbon_kg = round(weight * material_co2_map.get(material, 2.0), 2)
-
-        X = pd.DataFrame([[ 
-            safe_encode(material, material_encoder, "Other"),
-            weight,
-            safe_encode(transport, transport_encoder, "Land"),
-            safe_encode(recyclability, recycle_encoder, "Medium"),
-            safe_encode(origin, origin_encoder, "Other")
-        ]], columns=[
-            "material_encoded", 
-            "weight", 
-            "transport_encoded", 
-            "recycle_encoded", 
-            "origin_encoded"
-        ])
-
-        # ML prediction
-        decoded_score = "C"
-        confidence = 0.0
-        try:
-            prediction = model.predict(X)[0]
-            decoded_score = label_encoder.inverse_transform([prediction])[0]
-            if decoded_score not in valid_scores:
-                decoded_score = "C"
-
-            if hasattr(model, "predict_proba"):
-                try:
-                    proba = model.predict_proba(X)
-                    print("🔍 Probabilities:", proba)
-                    if proba is not None and len(proba[0]) > 0:
-                        confidence = round(max(proba[0]) * 100, 1)
-                except Exception as e:
-                    print(f"⚠️ predict_proba failed: {e}")
-        except Exception as e:
-            print(f"⚠️ Prediction failed: {e}")
-
-
-        # Logging
-        try:
-            log_path = os.path.join(model_dir, "eco_dataset.csv")
-            with open(log_path, "a", newline='', encoding="utf-8") as f:
-                writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
-                writer.writerow([title, material, f"{weight:.2f}", transport, recyclability, decoded_score, carbon_kg, origin])
-        except Exception as log_error:
-            print(f"⚠️ Logging skipped: {log_error}")
-            
-        # 🔒 Log only real, valid scraped entries to a separate dataset for training
         try:
-            if url:  # confirms this was a scraped product
-                valid_materials = list(material_encoder.classes_)
-                valid_transports = list(transport_encoder.classes_)
-                valid_recyclability = list(recycle_encoder.classes_)
-                valid_origins = list(origin_encoder.classes_)
-
-                if (
-                    decoded_score in valid_scores and
-                    material in valid_materials and
-                    transport in valid_transports and
-                    recyclability in valid_recyclability and
-                    origin in valid_origins
-                ):
-                    clean_log_path = os.path.join(model_dir, "real_scraped_dataset.csv")
-                    with open(clean_log_path, "a", newline='', encoding="utf-8") as f:
-                        writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
-                        writer.writerow([title, material, f"{weight:.2f}", transport, recyclability, decoded_score, carbon_kg, origin])
-                    print("✅ Logged to real_scraped_dataset.csv")
-                else:
-                    print("⚠️ Skipped real_scraped_dataset.csv log: one or more values are invalid.")
-        except Exception as clean_log_error:
-            print(f"⚠️ Logging to real_scraped_dataset.csv failed: {clean_log_error}")
-
-        # Emojis
-        emoji_map = {
-            "A+": "🌍", "A": "🌿", "B": "🍃",
-            "C": "🌱", "D": "⚠️", "E": "❌", "F": "💀"
-        }
-        origin_distance_km = float(product.get("distance_origin_to_uk", 0) or 0)
-        uk_distance_km = float(product.get("distance_uk_to_user", 0) or 0)
-        
-        # Always create formatted strings for distances
-        origin_distance_formatted = f"{origin_distance_km:.1f} km"
-        uk_distance_formatted = f"{uk_distance_km:.1f} km"
+            weight = float(data.get("weight") or 0.5)
+        except:
+            weight = 0.5
+
+        if include_packaging:
+            weight *= 1.05
+
+        print(f"✅ Final manual product weight used: {weight} kg")
+
+    # Fuzzy material and origin mappings
+    material = fuzzy_match_material(material)
+    origin = fuzzy_match_origin(origin)
+
+    # Calculate carbon
+    carbon_kg = round(weight * material_co2_map.get(material, 2.0), 2)
+
+    # Same feature pipeline as /predict
+    X = pipeline.transform_one({
+        "material": material,
+        "weight": weight,
+        "transport": transport,
+        "recyclability": recyclability,
+        "origin": origin
+    })
+
+    # ML prediction
+    progress("predicting")
+    decoded_score = "C"
+    confidence = 0.0
+    try:
+        prediction, proba = engine.predict_with_proba(X)
+        print("🔍 Probabilities:", proba)
+        decoded_score = pipeline.decode_labels(prediction)[0]
+        if decoded_score not in valid_scores:
+            decoded_score = "C"
+        confidence = round(max(proba[0]) * 100, 1)
+    except Exception as e:
+        print(f"⚠️ Prediction failed: {e}")
+
+
+    # Logging
+    try:
+        log_path = os.path.join(model_dir, "eco_dataset.csv")
+        log_writer.write_csv(log_path, [title, material, f"{weight:.2f}", transport, recyclability, decoded_score, carbon_kg, origin])
+    except Exception as log_error:
+        print(f"⚠️ Logging skipped: {log_error}")
         
-        print(f"🎯 Formatted distances: {origin_distance_formatted}, {uk_distance_formatted}")
+    # 🔒 Log only real, valid scraped entries to a separate dataset for training
+    try:
+        if url:  # confirms this was a scraped product
+            if (
+                decoded_score in valid_scores and
+                pipeline.is_known("material", material) and
+                pipeline.is_known("transport", transport) and
+                pipeline.is_known("recyclability", recyclability) and
+                pipeline.is_known("origin", origin)
+            ):
+                clean_log_path = os.path.join(model_dir, "real_scraped_dataset.csv")
+                log_writer.write_csv(clean_log_path, [title, material, f"{weight:.2f}", transport, recyclability, decoded_score, carbon_kg, origin])
+                print("✅ Queued for real_scraped_dataset.csv")
+            else:
+                print("⚠️ Skipped real_scraped_dataset.csv log: one or more values are invalid.")
+    except Exception as clean_log_error:
+        print(f"⚠️ Logging to real_scraped_dataset.csv failed: {clean_log_error}")
+
+    # Emojis
+    emoji_map = {
+        "A+": "🌍", "A": "🌿", "B": "🍃",
+        "C": "🌱", "D": "⚠️", "E": "❌", "F": "💀"
+    }
+    origin_distance_km = float(product.get("distance_origin_to_uk", 0) or 0)
+    uk_distance_km = float(product.get("distance_uk_to_user", 0) or 0)
+    
+    # Always create formatted strings for distances
+    origin_distance_formatted = f"{origin_distance_km:.1f} km"
+    uk_distance_formatted = f"{uk_distance_km:.1f} km"
+    
+    print(f"🎯 Formatted distances: {origin_distance_formatted}, {uk_distance_formatted}")
+
+    return {
+        "data": {
+            "attributes": {
+                "eco_score_ml": f"{decoded_score} {emoji_map.get(decoded_score, '')} ({confidence}%)",
+                "eco_score_confidence": f"{confidence}%",
+                "ml_carbon_kg": round(weight * 1.2, 2),
+                "trees_to_offset": max(1, round(carbon_kg / 15)),
+                "material_type": material,
+                "weight_kg": round(weight, 2),
+                "raw_product_weight_kg": round(raw_weight or estimated_weight or 0.5, 2),
+                "transport_mode": transport,
+                "recyclability": recyclability,
+                "origin": origin,
+                "dimensions_cm": dimensions,
+                "carbon_kg": round(carbon_kg, 2),
+                
+                "distance_from_origin_km": origin_distance_km,
+                "distance_from_uk_hub_km": uk_distance_km,
+                "intl_distance_km": origin_distance_km,
+                "uk_distance_km": uk_distance_km
 
-        return jsonify({
-            "data": {
-                "attributes": {
-                    "eco_score_ml": f"{decoded_score} {emoji_map.get(decoded_score, '')} ({confidence}%)",
-                    "eco_score_confidence": f"{confidence}%",
-                    "ml_carbon_kg": round(weight * 1.2, 2),
-                    "trees_to_offset": max(1, round(carbon_kg / 15)),
-                    "material_type": material,
-                    "weight_kg": round(weight, 2),
-                    "raw_product_weight_kg": round(raw_weight or estimated_weight or 0.5, 2),
-                    "transport_mode": transport,
-                    "recyclability": recyclability,
-                    "origin": origin,
-                    "dimensions_cm": dimensions,
-                    "carbon_kg": round(carbon_kg, 2),
-                    
-                    "distance_from_origin_km": origin_distance_km,
-                    "distance_from_uk_hub_km": uk_distance_km,
-                    "intl_distance_km": origin_distance_km,
-                    "uk_distance_km": uk_distance_km
-
-                },
-                "title": title
-            }
-        })
+            },
+            "title": title
+        }
+    }
 
-    except Exception as e:
-        print(f"❌ Uncaught error: {e}")
-        return jsonify({"error": str(e)}), 500
+
+# === Estimate jobs: scraping runs on a bounded worker pool, not on request threads ===
+ESTIMATE_SYNC_TIMEOUT = float(os.environ.get("ECO_ESTIMATE_TIMEOUT", "120"))
+MAX_JOB_ITEMS = 50
+
+estimate_jobs = JobManager(
+    compute_estimate,
+    max_workers=int(os.environ.get("ECO_JOB_WORKERS", "2")),
+    max_pending=int(os.environ.get("ECO_JOB_MAX_PENDING", "200")),
+)
+
+
+def job_links(job):
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total": len(job.items),
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }
+
+
+@app.route("/estimate_emissions", methods=["POST", "OPTIONS"])
+def estimate_emissions():
+    if request.method == "OPTIONS":
+        # This is a preflight request (CORS)
+        return '', 200
+
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "Missing JSON in request"}), 400
+
+    # Thin wrapper over the job API: wait for the result up to a timeout
+    try:
+        job = estimate_jobs.submit([data])
+    except JobQueueFull:
+        return jsonify({"error": "Server busy, try again shortly"}), 503
+
+    if not job.wait(ESTIMATE_SYNC_TIMEOUT):
+        return jsonify(job_links(job)), 202
+
+    item = job.results[0]
+    if item["status"] == "done":
+        return jsonify(item["result"])
+    print(f"❌ Uncaught error: {item['error']}")
+    return jsonify({"error": item["error"]}), 500
+
+
+@app.route("/jobs/estimate", methods=["POST"])
+def submit_estimate_job():
+    """
+    Accepts one estimate payload, a list of them, {"items": [...]}, or
+    {"amazon_urls": [...], <shared fields>}. Returns a job id immediately.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, list):
+        items = data
+    elif isinstance(data, dict) and isinstance(data.get("items"), list):
+        items = data["items"]
+    elif isinstance(data, dict) and isinstance(data.get("amazon_urls"), list):
+        shared = {k: v for k, v in data.items() if k != "amazon_urls"}
+        items = [{**shared, "amazon_url": url} for url in data["amazon_urls"]]
+    elif isinstance(data, dict) and data:
+        items = [data]
+    else:
+        return jsonify({"error": "Expected an estimate payload or a list of them"}), 400
+
+    if not items or not all(isinstance(item, dict) for item in items):
+        return jsonify({"error": "Every item must be a JSON object"}), 400
+    if len(items) > MAX_JOB_ITEMS:
+        return jsonify({"error": f"Too many items: {len(items)} > {MAX_JOB_ITEMS}"}), 413
+
+    try:
+        job = estimate_jobs.submit(items)
+    except JobQueueFull:
+        return jsonify({"error": "Server busy, try again shortly"}), 503
+    return jsonify(job_links(job)), 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_estimate_job(job_id):
+    job = estimate_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.as_dict())
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def stream_estimate_job(job_id):
+    job = estimate_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", -1))
+    except ValueError:
+        last_event_id = -1
+    return Response(
+        stream_with_context(sse_stream(job, last_event_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/admin/jobs")
+def get_job_metrics():
+    return jsonify(estimate_jobs.metrics())
 
 
 @app.route("/test_post", methods=["POST"])
@@ -634,4 +866,5 @@ def test():
 
 
 if __name__ == "__main__":
+    warm_caches()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,177 @@
+# server.py
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+HOST = os.environ.get("ECO_HOST", "0.0.0.0")
+PORT = int(os.environ.get("ECO_PORT", "5000"))
+WORKERS = int(os.environ.get("ECO_WORKERS", "2"))
+MAX_CRASHES = int(os.environ.get("ECO_WORKER_MAX_CRASHES", "5"))  # restarts of a crashing worker before giving up
+HEALTHY_AFTER = 60  # seconds a worker has to stay up for its crash count to reset
+
+
+def preload():
+    """
+    Everything the workers can share read-only: the serving bundle plus the
+    heavy, side-effect-free imports. Runs in the parent before forking, so its
+    pages are shared copy-on-write instead of being loaded once per worker.
+    """
+    import flask  # noqa: F401
+    import flask_cors  # noqa: F401
+    import numpy  # noqa: F401
+    import werkzeug.serving  # noqa: F401
+    from backend.services.ml_interface.serving_bundle import load_serving_bundle
+    import backend.services.scraper.scrape_amazon_titles  # noqa: F401
+
+    bundle = load_serving_bundle()
+    # Fault the mapped arrays in once so workers don't each take the page faults
+    for arr in bundle.arrays.values():
+        arr.sum()
+    return bundle
+
+
+def listen(host, port, backlog=128):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(sock, host, port, worker_id=0):
+    """Imports the app (threads, caches, DB handles are created here, per worker) and serves on `sock`."""
+    from werkzeug.serving import make_server
+    from backend.app import app, warm_caches
+    from backend.services.ml_interface.serving_bundle import memory_usage
+
+    warm_caches()
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    print(f"🧵 Worker {worker_id} (pid {os.getpid()}) serving on {host}:{port}, memory: {memory_usage()}")
+    server.serve_forever()
+
+
+def close_stores():
+    """
+    Flushes the write-behind log, pending brand saves and segment appends.
+    These are atexit handlers, which a forked worker leaving through
+    os._exit() would skip.
+    """
+    app_module = sys.modules.get("backend.app")
+    if app_module is not None:
+        app_module.log_writer.close()
+    scraper = sys.modules.get("backend.services.scraper.scrape_amazon_titles")
+    if scraper is not None:
+        scraper.brand_locations.close()
+        scraper.cleaned_products.close()
+
+
+def _request_exit(signum, frame):
+    raise SystemExit(0)  # unwinds serve_forever() in the worker's main thread
+
+
+def run_worker(sock, host, port, worker_id):
+    """Body of a forked worker: serves until SIGTERM/SIGINT, flushes its stores and never returns."""
+    signal.signal(signal.SIGTERM, _request_exit)
+    signal.signal(signal.SIGINT, _request_exit)
+    code = 0
+    try:
+        serve(sock, host, port, worker_id)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 0
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    try:
+        close_stores()
+    except Exception:
+        traceback.print_exc()
+        code = code or 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)  # don't fall back into the parent's supervisor loop
+
+
+def run_prefork(sock, host, port, workers):
+    children = {}  # pid -> (worker_id, started)
+    crashes = {}  # worker_id -> crashes in a row
+
+    def spawn(worker_id):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(sock, host, port, worker_id)
+        children[pid] = (worker_id, time.monotonic())
+
+    def stop_children():
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        # Let the workers flush their stores before the parent goes
+        for pid in list(children):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+            children.pop(pid, None)
+
+    def stop(signum, frame):
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        stop_children()
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for worker_id in range(workers):
+        spawn(worker_id)
+
+    # Supervise: replace any worker that dies, backing off while one keeps crashing
+    while True:
+        pid, status = os.wait()
+        worker_id, started = children.pop(pid, (None, None))
+        if worker_id is None:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        if time.monotonic() - started >= HEALTHY_AFTER:
+            crashes[worker_id] = 0
+        crashes[worker_id] = crashes.get(worker_id, 0) + 1
+        if crashes[worker_id] > MAX_CRASHES:
+            print(f"❌ Worker {worker_id} crashed {crashes[worker_id]} times in a row (last exit code {code}), shutting down")
+            stop_children()
+            raise SystemExit(1)
+        delay = min(2 ** (crashes[worker_id] - 1), 30)
+        print(f"⚠️ Worker {worker_id} (pid {pid}) exited with code {code}, restarting it in {delay}s")
+        time.sleep(delay)
+        spawn(worker_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="🌍 Production server: preload the serving bundle, then fork workers.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    preload()
+    sock = listen(args.host, args.port)
+    print(f"🚀 Preloaded in {(time.perf_counter() - start) * 1000:.0f} ms, starting {args.workers} worker(s)")
+
+    if args.workers <= 1 or not hasattr(os, "fork"):
+        # Single process (and the only option on Windows): still no debug reloader
+        signal.signal(signal.SIGTERM, _request_exit)  # exit normally so the atexit flushes run
+        serve(sock, args.host, args.port)
+    else:
+        run_prefork(sock, args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -2,15 +2,22 @@
 
 import json
 import csv
+import os
 import argparse
 from collections import defaultdict
 
+from backend.utils.normalizer import get_normalizer
+
 # === CONFIG ===
 INPUT_JSON = "bulk_scraped_products.json"
+INPUT_STORE = "store"  # the scraper's cleaned-products segment store
 OUTPUT_JSON = "cleaned_products.json"
 OUTPUT_CSV = "cleaned_products.csv"
 
 def load_products(path):
+    if os.path.isdir(path):  # a segment store, e.g. the scheduler's bulk_scraped_products/
+        from backend.utils.segment_store import SegmentStore
+        return list(SegmentStore(path).iter_records())
     try:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
@@ -18,6 +25,11 @@ def load_products(path):
         print(f"❌ Failed to load {path}: {e}")
         return []
 
+def load_store_products():
+    """Merged view of the cleaned-products segment store (already one record per ASIN)."""
+    from backend.services.scraper.scrape_amazon_titles import cleaned_products
+    return list(cleaned_products.iter_records())
+
 def deduplicate(products):
     deduped = {}
     for p in products:
@@ -26,6 +38,18 @@ def deduplicate(products):
             deduped[asin] = p
     return list(deduped.values())
 
+def normalize_fields(products):
+    """Canonical material / origin names, one batch per column."""
+    normalizer = get_normalizer()
+    materials = normalizer.materials([p.get("material_type") for p in products])
+    origins = normalizer.origins([p.get("brand_estimated_origin") for p in products])
+    for product, material, origin in zip(products, materials, origins):
+        if material:
+            product["material_type"] = material
+        if origin:
+            product["brand_estimated_origin"] = origin
+    return products
+
 def filter_by_confidence(products, level="All"):
     if level == "All":
         return products
@@ -54,13 +78,16 @@ def export_csv(products, path):
 
     print(f"📄 CSV exported: {path}")
 
-def main(confidence_filter, csv_export, top_n=None):
-    raw = load_products(INPUT_JSON)
+def main(confidence_filter, csv_export, top_n=None, source=INPUT_STORE):
+    raw = load_store_products() if source == INPUT_STORE else load_products(source)
     print(f"📥 Loaded: {len(raw)} products")
 
     deduped = deduplicate(raw)
     print(f"🧼 Deduplicated: {len(deduped)} unique ASINs")
 
+    normalize_fields(deduped)
+    print("🔤 Normalized material / origin names")
+
     filtered = filter_by_confidence(deduped, confidence_filter)
     print(f"🔍 Filtered: {len(filtered)} products with confidence='{confidence_filter}'")
 
@@ -78,6 +105,8 @@ if __name__ == "__main__":
     parser.add_argument("--confidence", choices=["All", "High", "Estimated"], default="All", help="Confidence level to filter by")
     parser.add_argument("--csv", action="store_true", help="Export to CSV")
     parser.add_argument("--top", type=int, help="Only include top N results")
+    parser.add_argument("--input", default=INPUT_STORE,
+                        help=f"'{INPUT_STORE}' for the scraper's cleaned products, a segment store directory, or a JSON file such as {INPUT_JSON}")
 
     args = parser.parse_args()
-    main(confidence_filter=args.confidence, csv_export=args.csv, top_n=args.top)
+    main(confidence_filter=args.confidence, csv_export=args.csv, top_n=args.top, source=args.input)
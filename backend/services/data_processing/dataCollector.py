@@ -2,6 +2,7 @@
 
 from bs4 import BeautifulSoup
 import requests
+from backend.utils.normalizer import get_normalizer
 
 # Function to scrape CO2 emissions from a product page
 def scrape_co2_emissions(url):
@@ -42,17 +43,8 @@ def get_emissions(weight, distance, api_key="28rYCUXK2Wdbv0EjvYaFg"):
     
     
 def detect_origin_from_text(text):
-    text = text.lower()
-    if "made in china" in text or "country of origin: china" in text:
-        return "China"
-    elif "made in germany" in text or "country of origin: germany" in text:
-        return "Germany"
-    elif "made in usa" in text or "country of origin: usa" in text:
-        return "USA"
-    elif "made in japan" in text:
-        return "Japan"
-    # Add more if needed
-    return None
+    # "Made in X" / "Country of origin: X" for every country the normalizer knows
+    return get_normalizer().origin_from_text(text)
 
 
 # Main logic
@@ -1,14 +1,14 @@
 # export_priority_products.py
 
-import json
 import csv
 
-input_path = "priority_products.json"
+from backend.services.scraper.product_catalog import get_product_catalog
+
 output_path = "eco_dataset.csv"
 
-# Load product data
-with open(input_path, "r", encoding="utf-8") as f:
-    products = json.load(f)
+# Load product data (streamed from the product catalog)
+catalog = get_product_catalog()
+count = 0
 
 fields = ["material", "weight", "transport", "recyclability", "origin", "true_eco_score"]
 
@@ -16,7 +16,7 @@ with open(output_path, "w", newline='', encoding="utf-8") as f:
     writer = csv.DictWriter(f, fieldnames=fields)
     writer.writeheader()
 
-    for asin, product in products.items():
+    for asin, product in catalog.items():
         row = {
             "material": product.get("material_type", "Other"),
             "weight": product.get("estimated_weight_kg", 0.5),
@@ -26,5 +26,6 @@ with open(output_path, "w", newline='', encoding="utf-8") as f:
             "true_eco_score": ""  # <-- You will fill this manually (A+, A, B, ...)
         }
         writer.writerow(row)
+        count += 1
 
-print(f"✅ Exported {len(products)} rows to {output_path}")
+print(f"✅ Exported {count} rows to {output_path}")
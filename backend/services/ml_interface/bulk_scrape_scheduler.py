@@ -1,25 +1,38 @@
 # bulk_scrape_scheduler.py
 
-import time
-import random
-import json
+import argparse
 import os
 import csv
+import threading
 from datetime import datetime
-from backend.services.scraper.scrape_amazon_titles import scrape_amazon_titles, is_high_confidence, Log
+from backend.services.scraper.browser_pool import POOL_SIZE
+from backend.services.scraper.scrape_amazon_titles import add_to_priority
+from backend.services.scraper.product_catalog import ProductCatalog, get_product_catalog
+from backend.services.scraper.crawler import (DEFAULT_FRONTIER_PATH, Crawler, Frontier, HostRateLimiter, ReplayServer,
+                                              fetch_search_page_browser, fetch_search_page_http)
+from backend.utils.incremental_backup import IncrementalBackup
+from backend.utils.seen_set import AsinSet, BloomFilter
+from backend.utils.segment_store import SegmentStore
 
 # === CONFIG ===
-priority_path = "priority_products.json"
-bulk_path = "bulk_scraped_products.json"
+priority_path = "priority_products.json"  # legacy, migrated into the product catalog once
+bulk_path = "bulk_scraped_products.json"  # legacy, imported once into bulk_dir
+bulk_dir = "bulk_scraped_products"
+frontier_path = DEFAULT_FRONTIER_PATH  # the same DB `crawler status` / `retry-dead` inspect
 log_path = "logs/scheduler_log.txt"
 backup_dir = "backups"
+seen_dir = "seen"  # asins.u64 (bulk ASINs) and urls.bloom (seeded page URLs)
 search_terms_csv = "search_terms.csv"
-failed_urls_path = "failed_urls.txt"
+failed_urls_path = "failed_urls.txt"  # legacy retry lists, seeded into the frontier once
 blocked_urls_path = "blocked_urls.txt"
 retry_tracker_path = "blocked_urls_retry.txt"
 pages_per_term = 2  # You can increase this later
-sleep_between_jobs = (600, 1200)  # 10–20 mins
-backup_every_n_loops = 5
+backup_every_n_pages = 10
+
+WORKERS = int(os.environ.get("ECO_CRAWL_WORKERS", "2"))  # each holds a pooled browser per page, see run()
+RATE = float(os.environ.get("ECO_CRAWL_RATE", "0.1"))  # requests per second per host (one per 10s)
+BURST = int(os.environ.get("ECO_CRAWL_BURST", "2"))
+RECRAWL_HOURS = float(os.environ.get("ECO_CRAWL_RECRAWL_HOURS", "24"))
 
 # === LOAD SEARCH TERMS ===
 def load_terms_from_csv(path):
@@ -28,173 +41,153 @@ def load_terms_from_csv(path):
     with open(path, "r", encoding="utf-8") as f:
         return [row[0] for row in csv.reader(f) if row]
 
-search_terms = load_terms_from_csv(search_terms_csv)
-if not search_terms:
-    search_terms = [
+def load_search_terms():
+    return load_terms_from_csv(search_terms_csv) or [
         "usb+c+charger", "eco+friendly+bottle", "coffee+mug",
         "mechanical+keyboard", "shampoo", "wireless+earbuds",
         "reusable+bag", "portable+fan", "toothbrush", "led+lamp",
         "recycled+notebook", "bamboo+cutlery", "solar+power+bank"
     ]
 
-# === LOAD DBs ===
-priority_db = {}
-if os.path.exists(priority_path):
-    with open(priority_path, "r", encoding="utf-8") as f:
-        priority_db = json.load(f)
-
-bulk_db = []
-if os.path.exists(bulk_path):
-    with open(bulk_path, "r", encoding="utf-8") as f:
-        bulk_db = json.load(f)
-
-existing_asins = {p["asin"] for p in bulk_db if p.get("asin")}
-seen_urls = set()
-loop_count = 0
+def load_url_list(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return sorted(set(line.strip() for line in f if line.strip()))
 
 # === LOGGING ===
+_log_lock = threading.Lock()
+
 def log(msg):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     line = f"[{timestamp}] {msg}\n"
     print(line.strip())
-    os.makedirs("logs", exist_ok=True)
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(line)
-        
-
-def maybe_add_to_priority(product, priority_db, priority_path):
-    asin = product.get("asin")
-    if not asin or asin in priority_db:
-        return False
-
-    if is_high_confidence(product):
-        product["confidence"] = "High"
-        priority_db[asin] = product
-        with open(priority_path, "w", encoding="utf-8") as f:
-            json.dump(priority_db, f, indent=2)
-        Log.success(f"🔐 Added {asin} to priority_products.json")
-        return True
-    return False
-
-
-failed_urls_path = "failed_urls.txt"
-
-def save_failed_url(url):
-    with open(failed_urls_path, "a", encoding="utf-8") as f:
-        f.write(url + "\n")
-        
-
-def load_failed_urls():
-    if not os.path.exists(failed_urls_path):
-        return []
-    with open(failed_urls_path, "r", encoding="utf-8") as f:
-        return list(set(line.strip() for line in f if line.strip()))
-
-def remove_url_from_failed(url):
-    if not os.path.exists(failed_urls_path):
-        return
-    with open(failed_urls_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    lines = [line for line in lines if line.strip() != url]
-    with open(failed_urls_path, "w", encoding="utf-8") as f:
-        f.writelines(lines)
-        
-def load_blocked_urls():
-    if not os.path.exists(blocked_urls_path):
-        return []
-    with open(blocked_urls_path, "r", encoding="utf-8") as f:
-        return list(set(line.strip() for line in f if line.strip()))
-
-def move_to_retry_tracker(url):
-    with open(retry_tracker_path, "a", encoding="utf-8") as f:
-        f.write(url + "\n")
-    if os.path.exists(blocked_urls_path):
-        with open(blocked_urls_path, "r", encoding="utf-8") as f:
-            lines = [line.strip() for line in f if line.strip() and line.strip() != url]
-        with open(blocked_urls_path, "w", encoding="utf-8") as f:
-            f.writelines(line + "\n" for line in lines)
-
-
-retry_queue = load_failed_urls()
-
-# === MAIN LOOP ===
-while True:
-    retry_mode = False
-    blocked_urls = load_blocked_urls()
-    if blocked_urls and random.random() < 0.5:  # try blocked URLs sometimes
-        url = random.choice(blocked_urls)
-        log(f"⚠️ Retrying previously blocked URL: {url}")
-        retry_mode = True
-    else:
-        term = random.choice(search_terms)
-        page = random.randint(1, pages_per_term)
-        url = f"https://www.amazon.co.uk/s?k={term}&page={page}"
-    
-    # Retry logic
-    if not retry_mode and retry_queue:
-        url = retry_queue.pop()
-        log(f"♻️ Retrying failed URL: {url}")
-
-
-    if url in seen_urls:
-        log("⚠️ Already tried this URL, skipping.")
-        continue
-    seen_urls.add(url)
-
-    log(f"🌐 Scraping: {url}")
-    try:
-        scraped = scrape_amazon_titles(url, max_items=30)
-    except Exception as e:
-        log(f"❌ Error scraping {url}: {e}")
-        if retry_mode:
-            move_to_retry_tracker(url)
+    with _log_lock:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class BulkSink:
+    """
+    Receives each crawled page from the worker threads: appends unseen ASINs
+    to the bulk store, catalogues the high-confidence ones and takes an
+    incremental backup every `backup_every` pages.
+    """
+
+    def __init__(self, bulk_db, catalog, backups=backup_dir, seen=seen_dir, backup_every=backup_every_n_pages):
+        self.bulk_db = bulk_db
+        self.catalog = catalog
+        self.backup_every = backup_every
+        self.existing_asins = AsinSet(os.path.join(seen, "asins.u64"))
+        if not len(self.existing_asins):  # first run: index what the bulk store already holds
+            self.existing_asins.add_many(record.get("asin") for record in bulk_db.iter_records())
+        self.bulk_backups = IncrementalBackup(os.path.join(backups, "bulk"))
+        self.priority_backups = IncrementalBackup(os.path.join(backups, "priority"))
+        self.pages = 0
+        self._in_flight = set()  # claimed by a page that is still being appended
+        self._lock = threading.Lock()
+
+    def __call__(self, url, scraped):
+        with self._lock:
+            new_bulk = []
+            for product in scraped:
+                asin = product.get("asin")
+                if asin and asin not in self._in_flight and asin not in self.existing_asins:
+                    self._in_flight.add(asin)  # first copy only
+                    new_bulk.append(product)
+            self.pages += 1
+            backup_due = self.pages % self.backup_every == 0
+
+        if new_bulk:
+            claimed = [product["asin"] for product in new_bulk]
+            try:
+                self.bulk_db.append_many(new_bulk)  # appends just the new products
+                new_priority = len(add_to_priority(new_bulk, self.catalog))
+                # Only marked seen once stored: if the append raises, the crawler's retry of this page re-adds them
+                self.existing_asins.add_many(claimed)
+            finally:
+                with self._lock:
+                    self._in_flight.difference_update(claimed)
+            log(f"➕ {url}: {len(new_bulk)} new products, {new_priority} high-confidence.")
         else:
-            save_failed_url(url)
-        time.sleep(10)
-        continue
-
-
-
-    new_bulk = []
-    new_priority = 0
-
-    for product in scraped:
-        asin = product.get("asin")
-        if not asin or asin in existing_asins:
-            continue
-
-        existing_asins.add(asin)
-        new_bulk.append(product)
-
-        if maybe_add_to_priority(product, priority_db, priority_path):
-            new_priority += 1
-
-    if new_bulk:
-        remove_url_from_failed(url)
-        bulk_db.extend(new_bulk)
-        log(f"➕ Added {len(new_bulk)} new products. {new_priority} high-confidence.")
-
-        with open(bulk_path, "w", encoding="utf-8") as f:
-            json.dump(bulk_db, f, indent=2)
-
-        with open(priority_path, "w", encoding="utf-8") as f:
-            json.dump(priority_db, f, indent=2)
-
+            log(f"🤷 {url}: no new unique products.")
+
+        if backup_due:
+            self.backup()
+
+    def backup(self):
+        with self._lock:
+            written = [
+                self.bulk_backups.backup(self.bulk_db.iter_records()),
+                self.priority_backups.backup(product for _, product in self.catalog.items()),
+            ]
+        written = [f"{point.kind} #{point.seq}" for point in written if point]
+        log(f"💾 Backup created: {', '.join(written)}." if written else "💾 Nothing changed since the last backup.")
+
+
+def run(workers=WORKERS, rate=RATE, burst=BURST, pages=pages_per_term, recrawl_hours=RECRAWL_HOURS):
+    if workers > POOL_SIZE:
+        # Extra workers would only queue for a browser and time out on the pool checkout
+        raise ValueError(f"{workers} crawl workers need ECO_BROWSER_POOL_SIZE >= {workers} (it is {POOL_SIZE})")
+
+    catalog = get_product_catalog()
+    catalog.migrate_json(priority_path)
+
+    bulk_db = SegmentStore(bulk_dir).start()
+    if not bulk_db.segment_numbers() and os.path.exists(bulk_path):
+        bulk_db.import_json(bulk_path)
+
+    frontier = Frontier(frontier_path, recrawl_after=recrawl_hours * 3600 if recrawl_hours else None,
+                        seen=BloomFilter(os.path.join(seen_dir, "urls.bloom")))
+    recovered = frontier.recover()
+    frontier.prune(older_than=7 * 24 * 3600)
+    seeded = frontier.seed_search(load_search_terms(), pages)
+    legacy_retries = load_url_list(failed_urls_path) + load_url_list(blocked_urls_path) + load_url_list(retry_tracker_path)
+    seeded += frontier.seed((url, None, None) for url in legacy_retries)
+    log(f"🗺️ Frontier: {frontier.counts()} ({seeded} new URLs, {recovered} recovered from a previous run)")
+
+    crawler = Crawler(frontier, fetch_search_page_browser, HostRateLimiter(rate, burst), workers,
+                      on_result=BulkSink(bulk_db, catalog), poll_interval=5.0)
+    log(f"🕷️ Crawling with {workers} workers at {rate} req/s per host (burst {burst})")
+    stats = crawler.run(until_empty=False)
+    log(f"🏁 Crawler stopped: {stats}")
+
+
+def replay(workers=WORKERS, rate=10.0, burst=BURST, terms=20, pages=5, latency=0.2, pages_dir=None):
+    """The full pipeline (frontier, rate limiter, sink, backups) against a local stand-in, in a scratch directory."""
+    import tempfile
+
+    global log_path
+    with tempfile.TemporaryDirectory() as tmp, ReplayServer(latency, pages_dir) as server:
+        log_path = os.path.join(tmp, "scheduler_log.txt")
+        frontier = Frontier(os.path.join(tmp, "frontier.db"))
+        frontier.seed_search([f"term{i}" for i in range(terms)], pages, server.url_template)
+        bulk_db = SegmentStore(os.path.join(tmp, "bulk")).start()
+        sink = BulkSink(bulk_db, ProductCatalog(os.path.join(tmp, "catalog.db")), os.path.join(tmp, "backups"),
+                        os.path.join(tmp, "seen"))
+        crawler = Crawler(frontier, fetch_search_page_http, HostRateLimiter(rate, burst), workers,
+                          on_result=sink, poll_interval=0.05)
+        stats = crawler.run(until_empty=True)
+        bulk_db.close()
+    print(f"🏁 Replay: {stats['pages']} pages, {stats['products']} products in {stats['elapsed_seconds']}s "
+          f"= {stats['pages_per_second']} pages/s with {workers} workers at {rate} req/s")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="🕷️ Bulk search-page crawler feeding the product catalog.")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--rate", type=float, default=RATE, help="Requests per second per host")
+    parser.add_argument("--burst", type=int, default=BURST)
+    parser.add_argument("--pages", type=int, default=pages_per_term, help="Result pages per search term")
+    parser.add_argument("--recrawl-hours", type=float, default=RECRAWL_HOURS)
+    parser.add_argument("--replay", action="store_true", help="Benchmark offline against a local HTTP stand-in")
+    parser.add_argument("--latency", type=float, default=0.2, help="Replay: seconds per simulated page")
+    parser.add_argument("--pages-dir", help="Replay: serve saved search-result HTML files")
+    args = parser.parse_args()
+
+    if args.replay:
+        replay(args.workers, args.rate, args.burst, pages=args.pages, latency=args.latency, pages_dir=args.pages_dir)
     else:
-        log("🤷 No new unique products found.")
-
-    # 🔁 Periodic Backup
-    loop_count += 1
-    if loop_count % backup_every_n_loops == 0:
-        os.makedirs(backup_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        with open(f"{backup_dir}/bulk_{timestamp}.json", "w", encoding="utf-8") as f:
-            json.dump(bulk_db, f, indent=2)
-        with open(f"{backup_dir}/priority_{timestamp}.json", "w", encoding="utf-8") as f:
-            json.dump(priority_db, f, indent=2)
-        log("💾 Backup created.")
-
-    # 💤 Sleep before next round
-    delay = random.randint(*sleep_between_jobs)
-    log(f"⏲️ Sleeping for {delay // 60} mins...")
-    time.sleep(delay)
+        run(args.workers, args.rate, args.burst, args.pages, args.recrawl_hours)
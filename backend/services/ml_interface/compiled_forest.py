@@ -0,0 +1,154 @@
+# compiled_forest.py
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+
+class CompiledForest:
+    """
+    A RandomForestClassifier flattened into contiguous NumPy arrays.
+
+    Every tree is laid out back to back in the same node arrays (feature index,
+    threshold, left/right child, normalised class distribution). Leaves point at
+    themselves, so a batch of rows can be walked through all trees at once in
+    vectorized steps with no per-estimator Python dispatch.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes, n_features, is_leaf=None):
+        self.is_leaf = left == np.arange(len(left)) if is_leaf is None else is_leaf
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features = n_features
+        self.n_trees = len(roots)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        if not hasattr(model, "estimators_"):
+            raise TypeError(f"Expected a fitted forest, got {type(model).__name__}")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+
+            # Leaves point back at themselves; that is also how is_leaf is derived
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+            n_features=model.n_features_in_,
+        )
+
+    def apply(self, X):
+        """Returns the leaf index reached in every tree, shape (n_rows, n_trees)."""
+        # sklearn evaluates trees on float32 inputs, so we do too
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features}")
+
+        # One flat (row, tree) cursor per pair; only cursors still on a split node
+        # are advanced, so shallow paths stop costing anything once they hit a leaf
+        n_rows = X.shape[0]
+        nodes = np.tile(self.roots, n_rows)
+        rows = np.repeat(np.arange(n_rows), self.n_trees)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            goes_left = X[rows[active], self.feature[current]] <= self.threshold[current]
+            current = np.where(goes_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[~self.is_leaf[current]]
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X):
+        return self.value[self.apply(X)].sum(axis=1) / self.n_trees
+
+    def predict_with_proba(self, X):
+        """Label and class probabilities for every row in one pass."""
+        proba = self.predict_proba(X)
+        return self.classes_[proba.argmax(axis=1)], proba
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
+
+
+# === Parity + benchmark helpers ===
+def load_dataset_matrix(csv_path=os.path.join("ml_model", "eco_dataset.csv"), model_dir="ml_model"):
+    """Encodes eco_dataset.csv with the model's feature pipeline (the /predict layout)."""
+    import pandas as pd
+    from backend.services.ml_interface.feature_pipeline import load_pipeline
+
+    df = pd.read_csv(csv_path)
+    df["weight"] = pd.to_numeric(df["weight"], errors="coerce").fillna(0.5)
+    return load_pipeline(model_dir).transform(df)
+
+
+def benchmark(model, engine, X, repeats=200):
+    def per_row_ms(fn, rows):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn(rows)
+        return (time.perf_counter() - start) / (repeats * len(rows)) * 1000
+
+    single = X[:1]
+    return {
+        "sklearn_single_row_ms": per_row_ms(model.predict_proba, single),
+        "compiled_single_row_ms": per_row_ms(engine.predict_proba, single),
+        "sklearn_batch_row_ms": per_row_ms(model.predict_proba, X) if repeats else 0.0,
+        "compiled_batch_row_ms": per_row_ms(engine.predict_proba, X) if repeats else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import joblib
+
+    parser = argparse.ArgumentParser(description="⚡ Benchmark the compiled forest against sklearn.")
+    parser.add_argument("--model", default=os.path.join("ml_model", "eco_model.pkl"))
+    parser.add_argument("--rows", type=int, default=1000, help="Batch size for the batch benchmark")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    start = time.perf_counter()
+    engine = CompiledForest.from_sklearn(model)
+    print(f"🧱 Compiled {engine.n_trees} trees / {len(engine.feature)} nodes in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    X = load_dataset_matrix()[:args.rows]
+
+    for name, ms in benchmark(model, engine, X, repeats=args.repeats).items():
+        print(f"⏱️ {name}: {ms:.4f} ms/row")
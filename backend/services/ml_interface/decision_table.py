@@ -0,0 +1,266 @@
+# decision_table.py
+
+import argparse
+import hashlib
+import itertools
+import os
+import time
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+from backend.services.ml_interface.feature_pipeline import BIN_EDGES, SERVING_COLUMNS
+
+# /predict feature layout: material, weight, transport, recyclability, origin, weight_bin
+CONTINUOUS_INDEX = SERVING_COLUMNS.index("weight")
+BIN_INDEX = SERVING_COLUMNS.index("weight_bin")
+
+
+def model_fingerprint(model):
+    """Hash of every split and leaf in the forest, so a stale table is never served."""
+    digest = hashlib.sha1()
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        digest.update(tree.feature.tobytes())
+        digest.update(tree.threshold.tobytes())
+        digest.update(tree.value.tobytes())
+    return digest.hexdigest()
+
+
+def float32_floor(values):
+    """Largest float32 <= each value (as float64)."""
+    values = np.asarray(values, dtype=np.float64)
+    as32 = values.astype(np.float32)
+    too_big = as32.astype(np.float64) > values
+    as32[too_big] = np.nextafter(as32[too_big], np.float32(-np.inf))
+    return as32.astype(np.float64)
+
+
+class DecisionTable:
+    """
+    The forest as a lookup table: categorical tuple -> sorted weight breakpoints.
+
+    Trees see float32 inputs and only compare the continuous feature against a
+    finite set of thresholds, so for a fixed categorical tuple the prediction is
+    piecewise constant between those thresholds. Each key stores the breakpoints
+    where the prediction changes plus one probability row per piece; serving is
+    a dict lookup and a bisect.
+    """
+
+    def __init__(self, entries, proba_rows, classes, n_features, continuous_index, fingerprint=None):
+        self.entries = entries
+        self.proba_rows = proba_rows
+        self.classes_ = classes
+        self.n_features = n_features
+        self.continuous_index = continuous_index
+        self.fingerprint = fingerprint
+        self.categorical_index = [i for i in range(n_features) if i != continuous_index]
+
+    def lookup(self, row):
+        """Probability row for a single encoded input."""
+        key = tuple(int(row[i]) for i in self.categorical_index)
+        breakpoints, pieces = self.entries[key]
+        x = float(np.float32(row[self.continuous_index]))
+        return self.proba_rows[pieces[bisect_left(breakpoints, x)]]
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, but the table expects {self.n_features}")
+        return np.array([self.lookup(row) for row in X])
+
+    def predict_with_proba(self, X):
+        proba = self.predict_proba(X)
+        return self.classes_[proba.argmax(axis=1)], proba
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
+
+    def save(self, path):
+        import joblib
+        joblib.dump({
+            "entries": self.entries,
+            "proba_rows": self.proba_rows,
+            "classes": self.classes_,
+            "n_features": self.n_features,
+            "continuous_index": self.continuous_index,
+            "fingerprint": self.fingerprint,
+        }, path)
+
+    @classmethod
+    def load(cls, path):
+        import joblib
+        data = joblib.load(path)
+        return cls(data["entries"], data["proba_rows"], data["classes"], data["n_features"],
+                   data["continuous_index"], data.get("fingerprint"))
+
+
+def weight_breakpoints(model, continuous_index):
+    thresholds = np.concatenate([
+        e.tree_.threshold[e.tree_.feature == continuous_index] for e in model.estimators_
+    ])
+    # Thresholds with the same float32 floor split float32 inputs identically
+    return np.unique(float32_floor(thresholds))
+
+
+def bin_ranges(bin_edges):
+    edges = [-np.inf] + list(bin_edges) + [np.inf]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def interval_representatives(breakpoints, lo):
+    """
+    One input per interval (-inf, b0], (b0, b1], ..., (bn, inf).
+    Each breakpoint is itself a float32 value, so it represents its interval exactly.
+    """
+    if len(breakpoints):
+        last = np.nextafter(np.float32(breakpoints[-1]), np.float32(np.inf))
+        return np.append(breakpoints, np.float64(last))
+    return np.array([lo if np.isfinite(lo) else 0.0])
+
+
+def build_decision_table(model, cardinalities, continuous_index=CONTINUOUS_INDEX,
+                         bin_index=BIN_INDEX, bin_edges=BIN_EDGES, chunk_rows=200_000):
+    """
+    Evaluates the model once per (categorical tuple, weight interval) and keeps
+    the breakpoints where the prediction changes.
+
+    `cardinalities[i]` is the number of encoded values of feature i (ignored for
+    the continuous feature). When `bin_index` is given, that feature is a bin of
+    the continuous one, so each bin only enumerates breakpoints inside its range.
+    """
+    n_features = len(cardinalities)
+    categorical_index = [i for i in range(n_features) if i != continuous_index]
+    breakpoints = weight_breakpoints(model, continuous_index)
+
+    if bin_index is None:
+        segments = [(None, breakpoints, -np.inf)]
+    else:
+        segments = []
+        for b, (lo, hi) in enumerate(bin_ranges(bin_edges)):
+            inside = breakpoints[(breakpoints >= lo) & (breakpoints < hi)]
+            segments.append((b, inside, lo))
+
+    other_index = [i for i in categorical_index if i != bin_index]
+    other_keys = list(itertools.product(*[range(cardinalities[i]) for i in other_index]))
+
+    entries = {}
+    proba_ids = {}
+    proba_rows = []
+
+    for b, bps, lo in segments:
+        reps = interval_representatives(bps, lo)
+        keys_per_chunk = max(1, chunk_rows // len(reps))
+
+        for start in range(0, len(other_keys), keys_per_chunk):
+            keys = np.array(other_keys[start:start + keys_per_chunk], dtype=np.float64)
+            X = np.empty((len(keys) * len(reps), n_features))
+            X[:, other_index] = np.repeat(keys, len(reps), axis=0)
+            X[:, continuous_index] = np.tile(reps, len(keys))
+            if bin_index is not None:
+                X[:, bin_index] = b
+
+            proba = model.predict_proba(X).reshape(len(keys), len(reps), -1)
+
+            for key, key_proba in zip(keys.astype(int), proba):
+                # Merge neighbouring intervals with identical predictions
+                changes = np.flatnonzero(np.any(key_proba[1:] != key_proba[:-1], axis=1))
+                pieces = []
+                for row in key_proba[np.r_[0, changes + 1]]:
+                    row_key = row.tobytes()
+                    if row_key not in proba_ids:
+                        proba_ids[row_key] = len(proba_rows)
+                        proba_rows.append(row)
+                    pieces.append(proba_ids[row_key])
+
+                full_key = dict(zip(other_index, key))
+                if bin_index is not None:
+                    full_key[bin_index] = b
+                # Compact typed arrays: bisect works on them directly
+                entries[tuple(int(full_key[i]) for i in categorical_index)] = (
+                    array("d", bps[changes]),
+                    array("i", pieces),
+                )
+
+    return DecisionTable(entries, np.array(proba_rows), np.asarray(model.classes_), n_features,
+                         continuous_index, fingerprint=model_fingerprint(model))
+
+
+def verify_decision_table(table, model, X, samples=20_000, seed=0):
+    """
+    Compares table and model on X, plus random serving-shaped rows and rows sitting
+    exactly on (and just above) every breakpoint. Returns the number of mismatches.
+    """
+    rng = np.random.default_rng(seed)
+    checks = [np.asarray(X, dtype=np.float64)]
+
+    # Random keys from the table, with weights on and around their breakpoints
+    keys = list(table.entries)
+    picked = [keys[i] for i in rng.integers(0, len(keys), size=min(samples, len(keys)))]
+    rows = []
+    for key in picked:
+        breakpoints, _ = table.entries[key]
+        weights = list(breakpoints) + [float(np.nextafter(np.float32(b), np.float32(np.inf))) for b in breakpoints]
+        weights.append(float(rng.uniform(0, 20)))
+        for w in weights:
+            row = np.empty(table.n_features)
+            row[table.categorical_index] = key
+            row[table.continuous_index] = w
+            rows.append(row)
+    if rows:
+        checks.append(np.array(rows))
+
+    X_all = np.vstack(checks)
+    if BIN_INDEX < table.n_features and table.continuous_index == CONTINUOUS_INDEX:
+        # Keep the bin consistent with the weight, as the app does
+        X_all = X_all[np.digitize(X_all[:, CONTINUOUS_INDEX], BIN_EDGES) == X_all[:, BIN_INDEX]]
+
+    expected = model.predict_proba(X_all)
+    actual = table.predict_proba(X_all)
+    mismatched = ~np.all(np.isclose(actual, expected, rtol=0, atol=1e-12), axis=1)
+    return int(mismatched.sum()), len(X_all)
+
+
+def default_table_path(model_dir="ml_model"):
+    return os.path.join(model_dir, "eco_model_table.pkl")
+
+
+def encoder_cardinalities(encoders_dir=os.path.join("ml_model", "encoders")):
+    import joblib
+
+    def size(name):
+        return len(joblib.load(os.path.join(encoders_dir, f"{name}_encoder.pkl")).classes_)
+
+    return [size("material"), None, size("transport"), size("recycle"), size("origin"), len(BIN_EDGES) + 1]
+
+
+if __name__ == "__main__":
+    import joblib
+    from backend.services.ml_interface.compiled_forest import load_dataset_matrix
+
+    parser = argparse.ArgumentParser(description="🗂️ Build or verify the precomputed eco-score decision table.")
+    parser.add_argument("command", choices=["build", "verify"])
+    parser.add_argument("--model", default=os.path.join("ml_model", "eco_model.pkl"))
+    parser.add_argument("--table", default=default_table_path())
+    parser.add_argument("--samples", type=int, default=20_000, help="Random keys to probe when verifying")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        table = build_decision_table(model, encoder_cardinalities())
+        table.save(args.table)
+        pieces = sum(len(p) for _, p in table.entries.values())
+        print(f"✅ Built {len(table.entries)} keys / {pieces} pieces in {time.perf_counter() - start:.1f}s → {args.table}")
+    else:
+        table = DecisionTable.load(args.table)
+        if table.fingerprint != model_fingerprint(model):
+            raise SystemExit("❌ Table was built from a different model. Rebuild it.")
+        mismatches, total = verify_decision_table(table, model, load_dataset_matrix(), samples=args.samples)
+        if mismatches:
+            raise SystemExit(f"❌ {mismatches}/{total} rows differ from the model")
+        print(f"✅ Table matches the model on all {total} rows")
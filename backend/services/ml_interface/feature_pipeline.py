@@ -0,0 +1,182 @@
+# feature_pipeline.py
+
+import json
+import os
+
+import numpy as np
+
+# Categorical inputs and the value used when one is missing, "Unknown" or unseen
+DEFAULTS = {"material": "Other", "transport": "Land", "recyclability": "Medium", "origin": "Other"}
+INTERACTIONS = {"material_transport": ("material", "transport"), "origin_recycle": ("origin", "recyclability")}
+BIN_EDGES = (0.5, 2, 10)  # weight_bin: [<0.5, <2, <10, >=10]
+WEIGHT_COLUMNS = ("weight", "weight_log", "weight_bin")
+
+# Column layouts: the random forest served by app.py, and the XGBoost experiment
+SERVING_COLUMNS = ("material", "weight", "transport", "recyclability", "origin", "weight_bin")
+XGB_COLUMNS = ("material", "transport", "recyclability", "origin", "weight_log", "weight_bin",
+               "material_transport", "origin_recycle")
+
+
+def normalize_value(value, default):
+    clean = str(value or default).strip().title()
+    return default if clean.lower() == "unknown" else clean
+
+
+def normalize_column(values, default):
+    """normalize_value over a column; repeated values (the common case) are normalized once."""
+    seen = {}
+    out = []
+    for value in values:
+        key = value if isinstance(value, str) or value is None else str(value)
+        if key not in seen:
+            seen[key] = normalize_value(value, default)
+        out.append(seen[key])
+    return out
+
+
+def default_pipeline_path(model_dir="ml_model"):
+    return os.path.join(model_dir, "feature_pipeline.json")
+
+
+class FeaturePipeline:
+    """
+    Raw product fields -> model feature matrix, shared by training and serving.
+
+    Every encoder is a plain {class: code} dict (codes follow LabelEncoder's
+    sorted order, so pickled encoders convert losslessly). transform() works a
+    column at a time: normalization, fallback to the default class, weight
+    log/bin and interaction columns, then one np.column_stack in `columns` order.
+    Fitted by the training scripts and saved as JSON next to the model.
+    """
+
+    def __init__(self, vocab, labels, columns=SERVING_COLUMNS, defaults=DEFAULTS, bin_edges=BIN_EDGES):
+        for column in columns:
+            if column not in vocab and column not in WEIGHT_COLUMNS:
+                raise ValueError(f"Unknown feature column: {column!r}")
+        self.vocab = {name: dict(index) for name, index in vocab.items()}
+        self.labels = list(labels)
+        self.columns = tuple(columns)
+        self.defaults = dict(defaults)
+        self.bin_edges = tuple(bin_edges)
+        self._label_index = {label: i for i, label in enumerate(self.labels)}
+
+    # === Fitting ===
+    @classmethod
+    def fit(cls, rows, labels, columns=SERVING_COLUMNS, defaults=DEFAULTS, bin_edges=BIN_EDGES):
+        """`rows` is anything indexable by column name (a DataFrame or a dict of lists)."""
+        normalized = {name: normalize_column(rows[name], default) for name, default in defaults.items()}
+        vocab = {}
+        for name, default in defaults.items():
+            vocab[name] = sorted(set(normalized[name]) | {default})
+        for name, (a, b) in INTERACTIONS.items():
+            if name in columns:
+                seen = {f"{x}_{y}" for x, y in zip(normalized[a], normalized[b])}
+                vocab[name] = sorted(seen | {f"{defaults[a]}_{defaults[b]}"})
+
+        label_classes = sorted(set(normalize_column(labels, "")))
+        return cls({name: {cls_: i for i, cls_ in enumerate(classes)} for name, classes in vocab.items()},
+                   label_classes, columns, defaults, bin_edges)
+
+    @classmethod
+    def from_label_encoders(cls, encoders, label_encoder, columns=SERVING_COLUMNS):
+        """For models trained before the pipeline existed: {feature: fitted LabelEncoder}."""
+        vocab = {name: {str(c): i for i, c in enumerate(enc.classes_)} for name, enc in encoders.items()}
+        return cls(vocab, [str(c) for c in label_encoder.classes_], columns)
+
+    # === Encoding ===
+    def classes(self, name):
+        return list(self.vocab[name])
+
+    def is_known(self, name, value):
+        return value in self.vocab[name]
+
+    def encode(self, name, values, default):
+        index = self.vocab[name]
+        fallback = index[default]
+        codes = np.fromiter((index.get(v, fallback) for v in values), dtype=np.float64, count=len(values))
+        unseen = sorted({v for v in values if v not in index})
+        if unseen:
+            print(f"⚠️ {unseen} not in {name} classes. Defaulting to '{default}'.")
+        return codes
+
+    def weight_features(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        return {
+            "weight": weights,
+            "weight_log": np.log1p(weights),
+            "weight_bin": np.digitize(weights, self.bin_edges).astype(np.float64),
+        }
+
+    def transform(self, rows):
+        """
+        Feature matrix for a batch. `rows` is a list of product dicts or
+        anything indexable by column name (DataFrame, dict of lists), with
+        raw categorical values and numeric weights.
+        """
+        if isinstance(rows, list):
+            rows = {name: [row.get(name) for row in rows] for name in (*self.defaults, "weight")}
+
+        normalized = {name: normalize_column(rows[name], default) for name, default in self.defaults.items()}
+        features = self.weight_features(rows["weight"])
+        for name, default in self.defaults.items():
+            if name in self.columns:
+                features[name] = self.encode(name, normalized[name], default)
+        for name, (a, b) in INTERACTIONS.items():
+            if name in self.columns:
+                combos = [f"{x}_{y}" for x, y in zip(normalized[a], normalized[b])]
+                features[name] = self.encode(name, combos, f"{self.defaults[a]}_{self.defaults[b]}")
+
+        return np.column_stack([features[column] for column in self.columns])
+
+    def transform_one(self, record):
+        return self.transform([record])
+
+    def describe(self, row):
+        """One encoded row as {column: value}, codes as ints (for JSON responses)."""
+        return {column: float(v) if column in ("weight", "weight_log") else int(v) for column, v in zip(self.columns, row)}
+
+    def encode_labels(self, values):
+        return np.array([self._label_index[v] for v in normalize_column(values, "")], dtype=np.intp)
+
+    def decode_labels(self, codes):
+        return [self.labels[int(c)] for c in codes]
+
+    # === Persistence ===
+    def to_dict(self):
+        return {
+            "columns": list(self.columns),
+            "defaults": self.defaults,
+            "bin_edges": list(self.bin_edges),
+            "vocab": {name: list(index) for name, index in self.vocab.items()},
+            "labels": self.labels,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        vocab = {name: {cls_: i for i, cls_ in enumerate(classes)} for name, classes in data["vocab"].items()}
+        return cls(vocab, data["labels"], data["columns"], data["defaults"], data["bin_edges"])
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def load_pipeline(model_dir="ml_model"):
+    """The saved pipeline, or one converted from the pickled LabelEncoders of an older model."""
+    path = default_pipeline_path(model_dir)
+    if os.path.exists(path):
+        return FeaturePipeline.load(path)
+
+    import joblib
+    encoders_dir = os.path.join(model_dir, "encoders")
+    files = {"material": "material", "transport": "transport", "recyclability": "recycle", "origin": "origin"}
+    encoders = {name: joblib.load(os.path.join(encoders_dir, f"{file}_encoder.pkl")) for name, file in files.items()}
+    return FeaturePipeline.from_label_encoders(encoders, joblib.load(os.path.join(encoders_dir, "label_encoder.pkl")))
@@ -0,0 +1,312 @@
+# serving_bundle.py
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from backend.services.ml_interface.compiled_forest import CompiledForest
+from backend.services.ml_interface.feature_pipeline import FeaturePipeline, default_pipeline_path, load_pipeline
+
+MAGIC = b"ECOBNDL1"
+FORMAT_VERSION = 2
+ALIGN = 64
+ENCODER_NAMES = ("material", "transport", "recycle", "label", "origin")
+
+MODEL_DIR = "ml_model"
+DATA_DIR = os.path.join("backend", "data")
+DEFAULT_BUNDLE_PATH = os.environ.get("ECO_SERVING_BUNDLE", os.path.join(MODEL_DIR, "serving_bundle.bin"))
+
+# Layout:  MAGIC | u64 header length | JSON header | padding | 64-byte aligned arrays
+# The header holds the small tables (feature pipeline, DEFRA factors, hubs, brand
+# origins) and an {name: dtype/shape/offset} index for the arrays, which are read
+# straight out of the mapping with np.frombuffer (no copy, no unpickling).
+
+
+class ServingBundle:
+    """Everything /predict and /estimate_emissions need, in one read-only artifact."""
+
+    def __init__(self, header, arrays, path=None, mapping=None):
+        self.header = header
+        self.arrays = arrays
+        self.path = path
+        self._mapping = mapping  # keeps the mmap alive as long as the arrays are
+
+        forest = header["forest"]
+        self.forest = CompiledForest(
+            feature=arrays["feature"], threshold=arrays["threshold"], left=arrays["left"],
+            right=arrays["right"], value=arrays["value"], roots=arrays["roots"],
+            max_depth=forest["max_depth"], classes=arrays["classes"], n_features=forest["n_features"],
+            is_leaf=arrays["is_leaf"],
+        )
+        self.pipeline = FeaturePipeline.from_dict(header["pipeline"])
+        self.feature_importances_ = arrays["feature_importances"]
+        self.fingerprint = header["fingerprint"]
+        self.material_co2 = header["defra"]
+        self.origin_hubs = header["origin_hubs"]
+        self.uk_hub = header["uk_hub"]
+        self.brand_origins = header["brand_origins"]
+
+    @property
+    def mapped(self):
+        return self._mapping is not None
+
+    @classmethod
+    def open(cls, path=DEFAULT_BUNDLE_PATH):
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapping[:len(MAGIC)] != MAGIC:
+            mapping.close()
+            raise ValueError(f"{path} is not a serving bundle")
+        (header_len,) = struct.unpack_from("<Q", mapping, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(mapping[start:start + header_len].decode("utf-8"))
+        if header.get("version") != FORMAT_VERSION:
+            mapping.close()
+            raise ValueError(f"{path} has bundle format {header.get('version')}, expected {FORMAT_VERSION}")
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            arrays[name] = np.frombuffer(mapping, dtype=dtype, count=count, offset=spec["offset"]).reshape(spec["shape"])
+        return cls(header, arrays, path=path, mapping=mapping)
+
+
+# === Build ===
+def source_stamp(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def model_sources(model_dir=MODEL_DIR, data_dir=DATA_DIR):
+    paths = [os.path.join(model_dir, "eco_model.pkl")]
+    paths += [os.path.join(model_dir, "encoders", f"{name}_encoder.pkl") for name in ENCODER_NAMES]
+    paths.append(default_pipeline_path(model_dir))
+    paths.append(os.path.join(model_dir, "defra_material_intensity.csv"))
+    paths.append(os.path.join(data_dir, "brand_origins.csv"))  # served from the bundle by the scraper
+    return paths
+
+
+def collect_sections(model_dir=MODEL_DIR, data_dir=DATA_DIR):
+    """Loads the pickles/CSVs the old way and returns (header, arrays) for a bundle."""
+    import joblib
+    from backend.services.ml_interface.decision_table import model_fingerprint
+    from backend.utils.geo import origin_hubs, uk_hub
+
+    model = joblib.load(os.path.join(model_dir, "eco_model.pkl"))
+    forest = CompiledForest.from_sklearn(model)
+    pipeline = load_pipeline(model_dir)
+
+    defra = {}
+    with open(os.path.join(model_dir, "defra_material_intensity.csv"), "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            defra[row["material"]] = float(row["co2_per_kg"])
+
+    brand_origins = {}
+    brand_csv = os.path.join(data_dir, "brand_origins.csv")
+    if os.path.exists(brand_csv):
+        with open(brand_csv, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                brand_origins[row["brand"].lower()] = {"country": row["hq_country"], "city": row["hq_city"]}
+
+    arrays = {
+        "feature": forest.feature.astype(np.int64),
+        "threshold": forest.threshold,
+        "left": forest.left.astype(np.int64),
+        "right": forest.right.astype(np.int64),
+        "value": forest.value,
+        "roots": forest.roots.astype(np.int64),
+        "is_leaf": forest.is_leaf,
+        "classes": np.asarray(forest.classes_),
+        "feature_importances": np.asarray(model.feature_importances_, dtype=np.float64),
+    }
+    header = {
+        "version": FORMAT_VERSION,
+        "built_at": time.time(),
+        "fingerprint": model_fingerprint(model),
+        "sources": {os.path.basename(p): source_stamp(p) for p in model_sources(model_dir, data_dir) if os.path.exists(p)},
+        "forest": {"max_depth": forest.max_depth, "n_features": forest.n_features, "n_trees": forest.n_trees},
+        "pipeline": pipeline.to_dict(),
+        "defra": defra,
+        "origin_hubs": origin_hubs,
+        "uk_hub": uk_hub,
+        "brand_origins": brand_origins,
+    }
+    return header, arrays
+
+
+def write_bundle(path, header, arrays):
+    header = dict(header)
+    index = {}
+    offset = 0
+    for name, arr in arrays.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        index[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += arr.nbytes
+
+    # Offsets above are relative to the data section; fix them up once its start is known
+    data_start = 0
+    while True:
+        header["arrays"] = {n: dict(s, offset=s["offset"] + data_start) for n, s in index.items()}
+        blob = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        start = -(-(len(MAGIC) + 8 + len(blob)) // ALIGN) * ALIGN
+        if start <= data_start:
+            break
+        data_start = start
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(blob)))
+        f.write(blob)
+        for name, arr in arrays.items():
+            f.write(b"\0" * (header["arrays"][name]["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(arr).tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def build_bundle(path=DEFAULT_BUNDLE_PATH, model_dir=MODEL_DIR, data_dir=DATA_DIR):
+    header, arrays = collect_sections(model_dir, data_dir)
+    return write_bundle(path, header, arrays)
+
+
+def is_stale(bundle, model_dir=MODEL_DIR, data_dir=DATA_DIR):
+    """True when a source pickle/CSV changed (or appeared) after the bundle was built."""
+    for path in model_sources(model_dir, data_dir):
+        name = os.path.basename(path)
+        if os.path.exists(path) and bundle.header["sources"].get(name) != source_stamp(path):
+            return True
+    return False
+
+
+# === Process-wide bundle ===
+_bundle = None
+_bundle_lock = threading.Lock()
+
+
+def load_serving_bundle(path=DEFAULT_BUNDLE_PATH, model_dir=MODEL_DIR, data_dir=DATA_DIR):
+    """
+    The bundle this process serves from. Opened once, so a pre-fork parent can
+    load it and its workers inherit the mapping. Falls back to building the same
+    structures in memory from the pickles when the file is missing or stale.
+    """
+    global _bundle
+    with _bundle_lock:
+        if _bundle is not None:
+            return _bundle
+
+        start = time.perf_counter()
+        bundle = None
+        if os.path.exists(path):
+            try:
+                bundle = ServingBundle.open(path)
+            except ValueError as e:
+                print(f"⚠️ {e}")
+            if bundle is None or is_stale(bundle, model_dir, data_dir):
+                print(f"⚠️ {path} is out of date, ignoring it. Rebuild it with: python -m backend.services.ml_interface.serving_bundle build")
+                bundle = None
+        else:
+            print(f"⚠️ No serving bundle at {path}. Build it with: python -m backend.services.ml_interface.serving_bundle build")
+
+        if bundle is None:
+            header, arrays = collect_sections(model_dir, data_dir)
+            bundle = ServingBundle(header, arrays)
+        print(f"📦 Serving bundle ready in {(time.perf_counter() - start) * 1000:.1f} ms ({'mmap' if bundle.mapped else 'in-memory'})")
+        _bundle = bundle
+        return _bundle
+
+
+def loaded_serving_bundle():
+    """The bundle if this process already loaded one, else None (never triggers a load)."""
+    return _bundle
+
+
+# === Cold-start / memory report ===
+def memory_usage(pid="self"):
+    """RSS / PSS / private memory in KiB from /proc (Linux); None elsewhere."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if value and " " not in key:
+                    fields[key] = value
+    except OSError:
+        return None
+
+    def kib(key):
+        return int(fields.get(key, "0 kB").split()[0])
+
+    return {
+        "rss_kib": kib("Rss"),
+        "pss_kib": kib("Pss"),
+        "private_kib": kib("Private_Clean") + kib("Private_Dirty"),
+    }
+
+
+LEGACY_PROBE = """
+import time; t = time.perf_counter()
+import os, joblib, pandas as pd
+model = joblib.load(os.path.join("ml_model", "eco_model.pkl"))
+encoders = [joblib.load(os.path.join("ml_model", "encoders", f"{{n}}_encoder.pkl")) for n in {names!r}]
+for _ in range(2):
+    df = pd.read_csv(os.path.join("ml_model", "defra_material_intensity.csv"))
+from backend.services.ml_interface.compiled_forest import CompiledForest
+CompiledForest.from_sklearn(model)
+from backend.services.ml_interface.serving_bundle import memory_usage
+print(repr(((time.perf_counter() - t) * 1000, memory_usage())))
+"""
+
+BUNDLE_PROBE = """
+import time; t = time.perf_counter()
+from backend.services.ml_interface.serving_bundle import ServingBundle, memory_usage
+bundle = ServingBundle.open({path!r})
+bundle.forest.predict_proba([[0, 1.0, 0, 0, 0, 1]])
+print(repr(((time.perf_counter() - t) * 1000, memory_usage())))
+"""
+
+
+def cold_start_report(path=DEFAULT_BUNDLE_PATH, runs=3):
+    """Best-of-`runs` load time and memory of a fresh interpreter, pickles vs bundle."""
+    import ast
+
+    def probe(code):
+        results = []
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True, check=True)
+            results.append(ast.literal_eval(out.stdout.strip().splitlines()[-1]))
+        return min(results, key=lambda r: r[0])
+
+    legacy_ms, legacy_mem = probe(LEGACY_PROBE.format(names=ENCODER_NAMES))
+    bundle_ms, bundle_mem = probe(BUNDLE_PROBE.format(path=path))
+    return {
+        "pickles": {"load_ms": round(legacy_ms, 1), "memory": legacy_mem},
+        "bundle": {"load_ms": round(bundle_ms, 1), "memory": bundle_mem, "size_kib": os.path.getsize(path) // 1024},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="📦 Build or inspect the mmap serving bundle.")
+    parser.add_argument("command", choices=["build", "info", "bench"])
+    parser.add_argument("--path", default=DEFAULT_BUNDLE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        build_bundle(args.path)
+        print(f"✅ Wrote {args.path} ({os.path.getsize(args.path) // 1024} KiB) in {(time.perf_counter() - start) * 1000:.0f} ms")
+    elif args.command == "info":
+        bundle = ServingBundle.open(args.path)
+        print(json.dumps({k: v for k, v in bundle.header.items() if k in ("version", "built_at", "fingerprint", "forest", "sources", "arrays")}, indent=2))
+    else:
+        print(json.dumps(cold_start_report(args.path), indent=2))
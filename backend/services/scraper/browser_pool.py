@@ -0,0 +1,247 @@
+# browser_pool.py
+
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.abspath(os.path.join(base_dir, "../../data"))
+# Chrome profiles and the patched driver are machine state, not source: keep them out of the package
+BROWSER_CACHE_DIR = os.environ.get("ECO_BROWSER_CACHE_DIR", os.path.join(data_dir, "browser_cache"))
+PROFILE_ROOT = os.path.join(BROWSER_CACHE_DIR, "selenium_profiles")
+DRIVER_CACHE_DIR = os.path.join(BROWSER_CACHE_DIR, "driver")
+
+POOL_SIZE = int(os.environ.get("ECO_BROWSER_POOL_SIZE", "2"))
+MAX_PAGES = int(os.environ.get("ECO_BROWSER_MAX_PAGES", "50"))
+HEADLESS = os.environ.get("ECO_BROWSER_HEADLESS", "false").lower() == "true"
+
+_driver_lock = threading.Lock()
+
+
+def patched_driver_path():
+    """
+    Patches chromedriver once and keeps the binary, so later launches skip
+    undetected-chromedriver's download + patch step.
+    """
+    from undetected_chromedriver.patcher import Patcher
+
+    exe = "chromedriver.exe" if sys.platform.startswith("win") else "chromedriver"
+    path = os.path.join(DRIVER_CACHE_DIR, exe)
+    with _driver_lock:
+        if not os.path.exists(path):
+            os.makedirs(DRIVER_CACHE_DIR, exist_ok=True)
+            patcher = Patcher()
+            patcher.auto()
+            shutil.copy2(patcher.executable_path, path)
+            print(f"🧩 Cached patched chromedriver at {path}")
+    return path
+
+
+def launch_chrome(profile_dir, headless=HEADLESS):
+    import undetected_chromedriver as uc
+
+    def start():
+        options = uc.ChromeOptions()
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--lang=en-GB")
+        options.add_argument("window-size=1280,800")
+        return uc.Chrome(options=options, user_data_dir=profile_dir, headless=headless,
+                         driver_executable_path=patched_driver_path())
+
+    try:
+        return start()
+    except Exception as e:
+        # Usually a Chrome update left the cached driver on the wrong version
+        print(f"⚠️ Chrome launch failed ({e}), re-patching driver and retrying...")
+        with _driver_lock:
+            shutil.rmtree(DRIVER_CACHE_DIR, ignore_errors=True)
+        return start()
+
+
+class PooledBrowser:
+    def __init__(self, slot, driver):
+        self.slot = slot
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+
+class BrowserPool:
+    """
+    A fixed number of long-lived Chrome instances shared by the scrapers.
+
+    Callers check a browser out, use its tab for one page and hand it back.
+    Every slot has its own profile directory (so cookies persist without two
+    Chromes fighting over one profile). A browser is health-checked on
+    checkout and replaced after `max_pages` pages or when it stops responding.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES, profile_root=PROFILE_ROOT, launch=launch_chrome):
+        self.size = size
+        self.max_pages = max_pages
+        self.profile_root = profile_root
+        self.launch = launch
+
+        self._idle = []
+        self._free_slots = list(range(size))
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {"launches": 0, "checkouts": 0, "reuses": 0, "recycled": 0, "unhealthy": 0, "waits": 0}
+
+    # === Lifecycle ===
+    def _launch(self, slot):
+        profile_dir = os.path.join(self.profile_root, f"browser-{slot}")
+        os.makedirs(profile_dir, exist_ok=True)
+        print(f"🚀 Launching pooled Chrome #{slot}...")
+        driver = self.launch(profile_dir)
+        with self._cond:
+            self._stats["launches"] += 1
+        return PooledBrowser(slot, driver)
+
+    def _quit(self, browser):
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def _release_slot(self, slot):
+        with self._cond:
+            self._free_slots.append(slot)
+            self._cond.notify()
+
+    def is_healthy(self, browser):
+        try:
+            browser.driver.execute_script("return 1")
+            return bool(browser.driver.window_handles)
+        except Exception:
+            return False
+
+    def prewarm(self, background=False):
+        """Launches every free slot up front, so the first requests don't pay the start-up cost."""
+        def run():
+            while True:
+                with self._cond:
+                    if self._closed or not self._free_slots:
+                        return
+                    slot = self._free_slots.pop()
+                try:
+                    browser = self._launch(slot)
+                except Exception as e:
+                    print(f"⚠️ Could not pre-launch Chrome #{slot}: {e}")
+                    self._release_slot(slot)
+                    return
+                with self._cond:
+                    self._idle.append(browser)
+                    self._cond.notify()
+
+        if background:
+            threading.Thread(target=run, name="browser-prewarm", daemon=True).start()
+        else:
+            run()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for browser in idle:
+            self._quit(browser)
+
+    # === Checkout / return ===
+    def checkout(self, timeout=120):
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while not self._idle and not self._free_slots:
+                    self._stats["waits"] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        raise TimeoutError(f"No browser free after {timeout}s")
+                if self._idle:
+                    browser, slot = self._idle.pop(), None
+                else:
+                    browser, slot = None, self._free_slots.pop()
+                self._stats["checkouts"] += 1
+
+            if browser is None:
+                try:
+                    return self._launch(slot)
+                except Exception:
+                    self._release_slot(slot)
+                    raise
+
+            if self.is_healthy(browser):
+                with self._cond:
+                    self._stats["reuses"] += 1
+                return browser
+
+            print(f"🩺 Pooled Chrome #{browser.slot} is unresponsive, replacing it")
+            with self._cond:
+                self._stats["unhealthy"] += 1
+            self._quit(browser)
+            self._release_slot(browser.slot)
+
+    def checkin(self, browser, healthy=True):
+        browser.pages += 1
+        if healthy and browser.pages < self.max_pages and not self._closed:
+            try:
+                # Reuse the first tab: drop any extras and park it on a blank page
+                handles = browser.driver.window_handles
+                for handle in handles[1:]:
+                    browser.driver.switch_to.window(handle)
+                    browser.driver.close()
+                browser.driver.switch_to.window(handles[0])
+                browser.driver.get("about:blank")
+            except Exception:
+                healthy = False
+
+        if healthy and browser.pages < self.max_pages and not self._closed:
+            with self._cond:
+                self._idle.append(browser)
+                self._cond.notify()
+            return
+
+        if healthy and browser.pages >= self.max_pages:
+            with self._cond:
+                self._stats["recycled"] += 1
+        self._quit(browser)
+        self._release_slot(browser.slot)
+
+    @contextmanager
+    def browser(self, timeout=120):
+        """`with pool.browser() as driver:` — the browser goes back to the pool afterwards."""
+        pooled = self.checkout(timeout)
+        healthy = True
+        try:
+            yield pooled.driver
+        except Exception:
+            healthy = self.is_healthy(pooled)
+            raise
+        finally:
+            self.checkin(pooled, healthy)
+
+    def metrics(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+            stats["free_slots"] = len(self._free_slots)
+        stats["size"] = self.size
+        stats["in_use"] = self.size - stats["idle"] - stats["free_slots"]
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """The process-wide pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import atexit
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
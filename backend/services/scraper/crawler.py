@@ -0,0 +1,548 @@
+# crawler.py
+
+import argparse
+import hashlib
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote_plus, urlparse
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.abspath(os.path.join(base_dir, "../../data"))
+
+DEFAULT_FRONTIER_PATH = os.environ.get("ECO_FRONTIER_DB", os.path.join(data_dir, "crawl_frontier.db"))
+SEARCH_URL = "https://www.amazon.co.uk/s?k={term}&page={page}"
+
+
+# === Rate limiting ===
+class TokenBucket:
+    """
+    `rate` requests per second with bursts of up to `burst`. acquire() reserves
+    a token (the balance may go negative) and sleeps until it is due, so
+    waiting threads are served in arrival order without polling.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes a token; returns how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class HostRateLimiter:
+    """One TokenBucket per host; `overrides` maps a host to its own (rate, burst)."""
+
+    def __init__(self, rate, burst=1, overrides=None):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(*self.overrides.get(host, (self.rate, self.burst)))
+            return bucket
+
+    def acquire(self, url):
+        wait = self.bucket(urlparse(url).hostname or "").acquire()
+        with self._lock:
+            self.waited += wait
+        return wait
+
+
+# === Frontier ===
+
+# error class -> (base delay in seconds, attempts before the URL is dead-lettered)
+RETRY_POLICIES = {
+    "blocked": (900, 4),   # back well off from a bot check instead of hammering it
+    "not_found": (0, 1),   # 404/410 won't get better
+}
+
+
+class FetchError(Exception):
+    """A fetch that failed in a known way; `kind` selects the frontier's retry policy."""
+
+    def __init__(self, kind, message=None):
+        super().__init__(message or kind)
+        self.kind = kind
+
+
+def classify_error(error):
+    """Short error class for the retry policy: blocked / not_found / timeout / the exception's name."""
+    if isinstance(error, FetchError):
+        return error.kind
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status in (429, 503):
+        return "blocked"
+    if status in (404, 410):
+        return "not_found"
+    if isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower():
+        return "timeout"
+    return type(error).__name__
+
+
+def _owner_alive(owner):
+    """Whether the process that took a lease ("pid:worker:nonce") is still running on this machine."""
+    try:
+        pid = int(str(owner).split(":", 1)[0])
+        os.kill(pid, 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+FRONTIER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS frontier (
+        url TEXT PRIMARY KEY,
+        term TEXT,
+        page INTEGER,
+        state TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        not_before REAL DEFAULT 0,
+        owner TEXT,
+        found INTEGER,
+        error_class TEXT,
+        last_error TEXT,
+        updated_at REAL NOT NULL
+    )
+"""
+
+
+class Frontier:
+    """
+    The crawl queue and retry queue in one SQLite table, so a restarted
+    crawler resumes where it stopped.
+
+    Each URL moves pending -> in_progress -> done, or back to pending after a
+    failure, or to dead (the dead-letter state) once its error class runs out
+    of attempts. `not_before` is the time a row is next due in any state: the
+    retry time of a pending URL, the lease expiry of an in-progress one (a
+    dead worker's URL is handed out again), the recrawl time of a done one,
+    NULL when never. One index on it makes the table a heap: claim() pops the
+    earliest due URL and never sees one that isn't due yet.
+
+    Retries back off exponentially from the error class's base delay (see
+    RETRY_POLICIES), capped at `max_backoff` and shortened by up to `jitter`
+    at random so a burst of failures doesn't come due in lockstep.
+
+    With a `seen` BloomFilter, every seeded URL is remembered there too, so
+    finished pages can be pruned from the table without being seeded (and
+    crawled) again; about the filter's error rate of genuinely new URLs are
+    skipped as well.
+    """
+
+    def __init__(self, db_path=DEFAULT_FRONTIER_PATH, lease_ttl=300, max_attempts=4, backoff=60,
+                 max_backoff=6 * 3600, jitter=0.5, policies=None, recrawl_after=None, seen=None):
+        self.db_path = db_path
+        self.lease_ttl = lease_ttl
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.policies = {**RETRY_POLICIES, **(policies or {})}
+        self.recrawl_after = recrawl_after
+        self.seen = seen
+        self._local = threading.local()
+        self._init_db()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(frontier)")}
+        if columns and "error_class" not in columns:
+            # Frontiers from before the retry heap kept leases in lease_until and a 'failed' state
+            conn.executescript(f"""
+                BEGIN IMMEDIATE;
+                ALTER TABLE frontier RENAME TO frontier_old;
+                {FRONTIER_SCHEMA};
+                INSERT INTO frontier (url, term, page, state, attempts, not_before, owner, found, last_error, updated_at)
+                    SELECT url, term, page, CASE state WHEN 'failed' THEN 'dead' ELSE state END, attempts,
+                           CASE state WHEN 'pending' THEN not_before WHEN 'in_progress' THEN lease_until END,
+                           owner, found, last_error, updated_at
+                    FROM frontier_old;
+                DROP TABLE frontier_old;
+                COMMIT;
+            """)
+        conn.execute(FRONTIER_SCHEMA)
+        conn.execute("DROP INDEX IF EXISTS frontier_due")
+        conn.execute("CREATE INDEX IF NOT EXISTS frontier_heap ON frontier (not_before)")
+
+    def seed(self, entries):
+        """Adds (url, term, page) entries; URLs already in the frontier keep their state. Returns how many were new."""
+        now = time.time()
+        if self.seen is not None:
+            entries = [entry for entry in entries if self.seen.add(entry[0])]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO frontier (url, term, page, updated_at) VALUES (?, ?, ?, ?)",
+                             [(url, term, page, now) for url, term, page in entries])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return conn.total_changes - before
+
+    def seed_search(self, terms, pages, url_template=SEARCH_URL):
+        return self.seed((url_template.format(term=quote_plus(term.replace("+", " ")), page=page), term, page)
+                         for term in terms for page in range(1, pages + 1))
+
+    def claim(self, owner):
+        """Leases the earliest due URL to `owner`; None when nothing is due right now."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT url FROM frontier WHERE not_before <= ? ORDER BY not_before LIMIT 1",
+                               (now,)).fetchone()
+            if row is not None:
+                conn.execute("""
+                    UPDATE frontier SET state = 'in_progress', owner = ?, not_before = ?,
+                        attempts = attempts + 1, updated_at = ?
+                    WHERE url = ?
+                """, (owner, now + self.lease_ttl, now, row[0]))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return row[0] if row else None
+
+    def complete(self, url, found=0):
+        now = time.time()
+        self._conn().execute("""
+            UPDATE frontier SET state = 'done', found = ?, attempts = 0, not_before = ?, owner = NULL,
+                error_class = NULL, last_error = NULL, updated_at = ?
+            WHERE url = ?
+        """, (found, now + self.recrawl_after if self.recrawl_after else None, now, url))
+
+    def fail(self, url, error):
+        """
+        Schedules a retry according to the error's class. Returns the delay in
+        seconds, or None if the URL was dead-lettered instead.
+        """
+        now = time.time()
+        kind = classify_error(error)
+        base, limit = self.policies.get(kind, (self.backoff, self.max_attempts))
+        conn = self._conn()
+        attempts = (conn.execute("SELECT attempts FROM frontier WHERE url = ?", (url,)).fetchone() or (1,))[0]
+        if attempts >= limit:
+            conn.execute("UPDATE frontier SET state = 'dead', not_before = NULL, owner = NULL, error_class = ?, "
+                         "last_error = ?, updated_at = ? WHERE url = ?", (kind, str(error)[:500], now, url))
+            return None
+        delay = min(self.max_backoff, base * 2 ** (attempts - 1)) * (1 - self.jitter * random.random())
+        conn.execute("UPDATE frontier SET state = 'pending', not_before = ?, owner = NULL, error_class = ?, "
+                     "last_error = ?, updated_at = ? WHERE url = ?", (now + delay, kind, str(error)[:500], now, url))
+        return delay
+
+    def recover(self):
+        """
+        After a crash: hands URLs leased by workers of a process that is no
+        longer running straight back out, instead of waiting for the lease.
+        """
+        conn = self._conn()
+        dead = [owner for (owner,) in conn.execute("SELECT DISTINCT owner FROM frontier WHERE state = 'in_progress'")
+                if not _owner_alive(owner)]
+        recovered = 0
+        for owner in dead:
+            cur = conn.execute("UPDATE frontier SET state = 'pending', not_before = ?, owner = NULL, "
+                               "attempts = MAX(attempts - 1, 0) WHERE state = 'in_progress' AND owner IS ?",
+                               (time.time(), owner))
+            recovered += cur.rowcount
+        return recovered
+
+    def prune(self, older_than):
+        """Drops done URLs that aren't due for a recrawl, finished more than `older_than` seconds ago."""
+        if self.seen is None:
+            return 0  # without the filter, pruned URLs would just be seeded again
+        cur = self._conn().execute("DELETE FROM frontier WHERE state = 'done' AND not_before IS NULL "
+                                   "AND updated_at < ?", (time.time() - older_than,))
+        return cur.rowcount
+
+    def dead_letters(self, limit=50):
+        rows = self._conn().execute("SELECT url, error_class, last_error, attempts, updated_at FROM frontier "
+                                    "WHERE state = 'dead' ORDER BY updated_at DESC LIMIT ?", (limit,))
+        return [{"url": url, "error_class": kind, "last_error": error, "attempts": attempts, "updated_at": updated}
+                for url, kind, error, attempts, updated in rows]
+
+    def retry_dead(self, error_class=None):
+        """Requeues dead-lettered URLs (optionally only one error class) as due now."""
+        cur = self._conn().execute("UPDATE frontier SET state = 'pending', attempts = 0, not_before = ? "
+                                   "WHERE state = 'dead' AND (? IS NULL OR error_class = ?)",
+                                   (time.time(), error_class, error_class))
+        return cur.rowcount
+
+    def counts(self):
+        counts = {"pending": 0, "in_progress": 0, "done": 0, "dead": 0}
+        counts.update(self._conn().execute("SELECT state, COUNT(*) FROM frontier GROUP BY state"))
+        return counts
+
+    def next_due_in(self):
+        """Seconds until the next URL is due (0 if one is due now), or None if nothing ever will be."""
+        row = self._conn().execute("SELECT MIN(not_before) FROM frontier").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+
+# === Crawler ===
+class Crawler:
+    """
+    `workers` threads draining a Frontier. Each claims a URL, waits for its
+    host's token bucket, calls `fetch(url)` (a list of products) and hands
+    the result to `on_result(url, products)`. A fetch that raises, or finds
+    no products, goes back to the frontier to be retried when due.
+    """
+
+    def __init__(self, frontier, fetch, limiter, workers=2, on_result=None, poll_interval=1.0):
+        self.frontier = frontier
+        self.fetch = fetch
+        self.limiter = limiter
+        self.workers = workers
+        self.on_result = on_result
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {"pages": 0, "products": 0, "errors": 0, "fetch_seconds": 0.0}
+        self._started = None
+
+    def _bump(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self._stats[name] += amount
+
+    def _worker(self, worker_id, until_empty, max_pages):
+        owner = f"{os.getpid()}:{worker_id}:{uuid.uuid4().hex[:8]}"
+        while not self._stop.is_set():
+            if max_pages is not None and self._stats["pages"] + self._stats["errors"] >= max_pages:
+                return
+            url = self.frontier.claim(owner)
+            if url is None:
+                counts = self.frontier.counts()
+                if until_empty and not counts["pending"] and not counts["in_progress"]:
+                    return
+                due_in = self.frontier.next_due_in()
+                self._stop.wait(min(self.poll_interval, due_in) if due_in else self.poll_interval)
+                continue
+
+            self.limiter.acquire(url)
+            start = time.perf_counter()
+            try:
+                products = self.fetch(url) or []
+                if not products:
+                    raise FetchError("empty", "no products on the page")
+                if self.on_result:
+                    self.on_result(url, products)
+            except Exception as e:
+                delay = self.frontier.fail(url, e)
+                self._bump(errors=1, fetch_seconds=time.perf_counter() - start)
+                retry = f"retry in {delay:.0f}s" if delay is not None else "dead-lettered"
+                print(f"⚠️ Crawl of {url} failed ({classify_error(e)}: {e}), {retry}")
+                continue
+            self.frontier.complete(url, len(products))
+            self._bump(pages=1, products=len(products), fetch_seconds=time.perf_counter() - start)
+
+    def run(self, until_empty=True, max_pages=None):
+        """Runs the workers until the frontier is drained (or forever), `max_pages` is reached, or stop()."""
+        self._started = time.perf_counter()
+        threads = [threading.Thread(target=self._worker, args=(i, until_empty, max_pages), name=f"crawler-{i}",
+                                    daemon=True) for i in range(self.workers)]
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(timeout=0.5)
+        except KeyboardInterrupt:
+            print("🛑 Stopping crawler, finishing in-flight pages...")
+            self.stop()
+            for t in threads:
+                t.join()
+        return self.stats()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["pages_per_second"] = round(stats["pages"] / elapsed, 3) if elapsed else 0.0
+        stats["rate_limit_wait_seconds"] = round(self.limiter.waited, 3)
+        stats["fetch_seconds"] = round(stats["fetch_seconds"], 3)
+        stats["frontier"] = self.frontier.counts()
+        return stats
+
+
+# === Fetchers ===
+_http = threading.local()
+
+
+def fetch_search_page_http(url, timeout=15):
+    """Search results over plain HTTP (used for replay; Amazon itself needs the browser scraper)."""
+    import requests
+    from backend.services.scraper.page_parser import is_blocked, parse_search_results
+
+    session = getattr(_http, "session", None)
+    if session is None:
+        session = _http.session = requests.Session()
+    response = session.get(url, timeout=timeout)
+    if is_blocked(response.text, response.status_code):
+        raise FetchError("blocked", f"HTTP {response.status_code}, bot check page or blocking status")
+    response.raise_for_status()
+    return parse_search_results(response.text)
+
+
+def fetch_search_page_browser(url, max_items=30):
+    """Search results in a pooled browser; bot checks and failed loads raise FetchError for the retry policy."""
+    from backend.services.scraper.scrape_amazon_titles import scrape_amazon_titles
+    return scrape_amazon_titles(url, max_items=max_items, strict=True)
+
+
+# === Replay (offline benchmarking) ===
+def synthetic_search_page(term, page, per_page=24):
+    cards = []
+    for i in range(per_page):
+        asin = "B" + hashlib.md5(f"{term}|{page}|{i}".encode()).hexdigest()[:9].upper()
+        cards.append(
+            f'<div data-asin="{asin}" class="s-result-item"><h2><a class="a-link-normal s-no-outline" '
+            f'href="/dp/{asin}"><span class="a-size-medium a-color-base a-text-normal">'
+            f'{term.title()} item {page}-{i}</span></a></h2></div>'
+        )
+    return f'<html><body><div class="s-main-slot">{"".join(cards)}</div></body></html>'
+
+
+class ReplayServer:
+    """
+    Local HTTP stand-in for the search pages: serves saved HTML from
+    `pages_dir` (cycled) or synthetic result pages, after `latency` seconds,
+    so crawl throughput can be measured without touching Amazon.
+    """
+
+    def __init__(self, latency=0.2, pages_dir=None, per_page=24):
+        saved = []
+        if pages_dir:
+            for name in sorted(os.listdir(pages_dir)):
+                if name.endswith(".html"):
+                    with open(os.path.join(pages_dir, name), "r", encoding="utf-8", errors="replace") as f:
+                        saved.append(f.read())
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                term = query.get("k", ["item"])[0]
+                page = int(query.get("page", ["1"])[0])
+                time.sleep(latency)
+                if saved:
+                    body = saved[int(hashlib.md5(f"{term}|{page}".encode()).hexdigest(), 16) % len(saved)]
+                else:
+                    body = synthetic_search_page(term, page, per_page)
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                with server._lock:
+                    server.requests += 1
+
+            def log_message(self, *args):
+                pass
+
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.host = "127.0.0.1"
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="replay-server", daemon=True)
+
+    @property
+    def url_template(self):
+        return f"http://{self.host}:{self.port}/s?k={{term}}&page={{page}}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def benchmark(workers=4, rate=10.0, burst=2, terms=20, pages=5, latency=0.2, pages_dir=None):
+    """Crawls terms x pages synthetic search pages through a ReplayServer and reports throughput."""
+    with tempfile.TemporaryDirectory() as tmp, ReplayServer(latency, pages_dir) as server:
+        frontier = Frontier(os.path.join(tmp, "frontier.db"))
+        frontier.seed_search([f"term{i}" for i in range(terms)], pages, server.url_template)
+        crawler = Crawler(frontier, fetch_search_page_http, HostRateLimiter(rate, burst), workers, poll_interval=0.05)
+        return crawler.run(until_empty=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="🕷️ Crawl frontier tools and offline replay benchmark.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="Replay benchmark against a local HTTP stand-in")
+    bench.add_argument("--workers", type=int, default=4)
+    bench.add_argument("--rate", type=float, default=10.0, help="Requests per second per host")
+    bench.add_argument("--burst", type=int, default=2)
+    bench.add_argument("--terms", type=int, default=20)
+    bench.add_argument("--pages", type=int, default=5)
+    bench.add_argument("--latency", type=float, default=0.2, help="Seconds per simulated page load")
+    bench.add_argument("--pages-dir", help="Serve saved search-result HTML files instead of synthetic pages")
+    status = sub.add_parser("status", help="Frontier state counts and recent dead letters")
+    status.add_argument("--db", default=DEFAULT_FRONTIER_PATH)
+    retry = sub.add_parser("retry-dead", help="Requeue dead-lettered URLs")
+    retry.add_argument("--db", default=DEFAULT_FRONTIER_PATH)
+    retry.add_argument("--error-class", help="Only URLs that died of this error class (e.g. blocked)")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        stats = benchmark(args.workers, args.rate, args.burst, args.terms, args.pages, args.latency, args.pages_dir)
+        print(f"🏁 {stats['pages']} pages, {stats['products']} products in {stats['elapsed_seconds']}s "
+              f"= {stats['pages_per_second']} pages/s (rate-limit wait {stats['rate_limit_wait_seconds']}s)")
+    elif args.command == "retry-dead":
+        print(f"♻️ Requeued {Frontier(args.db).retry_dead(args.error_class)} dead-lettered URLs")
+    else:
+        frontier = Frontier(args.db)
+        print(frontier.counts())
+        for letter in frontier.dead_letters(limit=20):
+            print(f"💀 {letter['error_class']:<10} x{letter['attempts']}  {letter['url']}  {letter['last_error']}")
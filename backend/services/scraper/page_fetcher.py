@@ -0,0 +1,233 @@
+# page_fetcher.py
+
+import queue
+import random
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.services.scraper.page_parser import is_blocked
+
+PRODUCT_FIELDS = ("productTitle",)
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0) Gecko/20100101 Firefox/123.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_3) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3 Safari/605.1.15",
+]
+
+
+def missing_fields(html, required):
+    """Element ids from `required` that do not appear in the page."""
+    return [field for field in required if not re.search(rf'id=["\']{re.escape(field)}["\']', html)]
+
+
+class FetchResult:
+    def __init__(self, url, html, status, backend, elapsed_ms, attempts):
+        self.url = url
+        self.html = html
+        self.status = status
+        self.backend = backend
+        self.elapsed_ms = elapsed_ms
+        self.attempts = attempts  # [(backend, outcome), ...]
+
+    @property
+    def ok(self):
+        return self.html is not None
+
+
+# === Backends ===
+class HttpBackend:
+    """Plain HTTP through a small pool of keep-alive requests.Sessions."""
+
+    name = "http"
+
+    def __init__(self, pool_size=4, timeout=15):
+        self.timeout = timeout
+        self._sessions = queue.LifoQueue()
+        for _ in range(pool_size):
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "User-Agent": random.choice(USER_AGENTS),
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-GB,en;q=0.9",
+            })
+            self._sessions.put(session)
+
+    def fetch(self, url):
+        session = self._sessions.get()
+        try:
+            response = session.get(url, timeout=self.timeout)
+            return response.status_code, response.text
+        finally:
+            self._sessions.put(session)
+
+
+class BrowserBackend:
+    """A pooled (undetected) Chrome; slow, but gets past most bot checks."""
+
+    name = "browser"
+
+    def __init__(self, pool=None, settle=1.0):
+        self.pool = pool
+        self.settle = settle
+
+    def fetch(self, url):
+        from backend.services.scraper.browser_pool import get_browser_pool
+
+        with (self.pool or get_browser_pool()).browser() as driver:
+            driver.get(url)
+            driver.implicitly_wait(5)
+            time.sleep(self.settle)
+            return 200, driver.page_source
+
+
+class BackendStats:
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.attempts = 0
+        self.successes = 0
+        self.blocked = 0
+        self.incomplete = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.success_ewma = 1.0  # optimistic until proven otherwise
+        self.latency_ewma_ms = None
+
+    def record(self, outcome, elapsed_ms):
+        self.attempts += 1
+        self.total_ms += elapsed_ms
+        if outcome == "ok":
+            self.successes += 1
+        elif outcome == "blocked":
+            self.blocked += 1
+        elif outcome == "incomplete":
+            self.incomplete += 1
+        else:
+            self.errors += 1
+        hit = 1.0 if outcome == "ok" else 0.0
+        self.success_ewma += self.alpha * (hit - self.success_ewma)
+        if self.latency_ewma_ms is None:
+            self.latency_ewma_ms = elapsed_ms
+        else:
+            self.latency_ewma_ms += self.alpha * (elapsed_ms - self.latency_ewma_ms)
+
+    def as_dict(self):
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "blocked": self.blocked,
+            "incomplete": self.incomplete,
+            "errors": self.errors,
+            "success_rate": round(self.successes / self.attempts, 4) if self.attempts else None,
+            "recent_success_rate": round(self.success_ewma, 4),
+            "avg_ms": round(self.total_ms / self.attempts, 1) if self.attempts else None,
+            "recent_ms": round(self.latency_ewma_ms, 1) if self.latency_ewma_ms is not None else None,
+        }
+
+
+class PageFetcher:
+    """
+    Fetches a page on the cheapest backend that returns a usable response.
+
+    Backends are ordered cheapest first. A response is escalated to the next
+    tier when it is blocked (bot check / 403 / 503) or lacks one of the
+    required element ids. Each tier tracks its recent success rate; a tier
+    that keeps failing is skipped as a starting point, except for every
+    `probe_every`-th fetch, which starts from the bottom again to notice when
+    it recovers.
+    """
+
+    def __init__(self, backends=None, min_success=0.2, probe_every=20):
+        self.backends = backends or [HttpBackend(), BrowserBackend()]
+        self.min_success = min_success
+        self.probe_every = probe_every
+        self._stats = {b.name: BackendStats() for b in self.backends}
+        self._lock = threading.Lock()
+        self._fetches = 0
+        self._escalations = 0
+        self._failures = 0
+
+    def _start_tier(self):
+        with self._lock:
+            self._fetches += 1
+            if self._fetches % self.probe_every == 0:
+                return 0
+            for i, backend in enumerate(self.backends[:-1]):
+                if self._stats[backend.name].success_ewma >= self.min_success:
+                    return i
+            return len(self.backends) - 1
+
+    def fetch(self, url, required=PRODUCT_FIELDS, browser=True):
+        """
+        The page from the cheapest backend that returns it usable. With
+        browser=False the last (browser) tier is never tried, for callers that
+        already hold a pooled browser and would otherwise wait on the pool.
+        """
+        attempts = []
+        tiers = self.backends if browser else self.backends[:-1]
+        start = self._start_tier() if browser else 0
+        for tier, backend in enumerate(tiers[start:], start):
+            t0 = time.perf_counter()
+            status, html = None, None
+            try:
+                status, html = backend.fetch(url)
+                if is_blocked(html, status):
+                    outcome = "blocked"
+                elif missing_fields(html, required):
+                    outcome = "incomplete"
+                else:
+                    outcome = "ok"
+            except Exception as e:
+                print(f"⚠️ {backend.name} fetch failed for {url}: {e}")
+                outcome = "error"
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+
+            with self._lock:
+                self._stats[backend.name].record(outcome, elapsed_ms)
+            attempts.append((backend.name, outcome))
+
+            if outcome == "ok":
+                return FetchResult(url, html, status, backend.name, elapsed_ms, attempts)
+
+            if tier < len(tiers) - 1:
+                with self._lock:
+                    self._escalations += 1
+                print(f"🔼 {backend.name} gave '{outcome}' for {url}, escalating")
+
+        with self._lock:
+            self._failures += 1
+        return FetchResult(url, None, None, None, 0.0, attempts)
+
+    def stats(self):
+        with self._lock:
+            backends = {name: s.as_dict() for name, s in self._stats.items()}
+            last = self.backends[-1].name
+            return {
+                "fetches": self._fetches,
+                "escalations": self._escalations,
+                "failures": self._failures,
+                # Pages served below the last tier are browser sessions we didn't need
+                "browser_pages_saved": sum(s.successes for name, s in self._stats.items() if name != last),
+                "backends": backends,
+            }
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_page_fetcher():
+    """The process-wide fetcher, created on first use."""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = PageFetcher()
+        return _fetcher
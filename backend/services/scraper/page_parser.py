@@ -0,0 +1,196 @@
+# page_parser.py
+
+import json
+
+from lxml import html as lxml_html
+
+# The one bot-check test, shared by the page fetcher, the parser and the crawler. Markers are only
+# looked for near the top: a block page is small, a product page's scripts can mention "captcha"
+BLOCK_MARKERS = ("captcha", "robot check", "enter the characters you see below", "api-services-support@amazon.com",
+                 "to discuss automated access")
+BLOCK_STATUSES = {403, 429, 503}
+BLOCK_SCAN_CHARS = 20000
+SHIPPING_MARKERS = ("Ships from", "Sold by", "Dispatches from")
+
+# Element ids whose subtree we read; everything else is found in the same walk
+ANCHOR_IDS = {
+    "productTitle", "title", "bylineInfo", "detailBullets_feature_div", "productDescription",
+    "productDetails_techSpec_section_1", "feature-bullets", "merchant-info", "tabular-buybox",
+}
+
+
+def is_blocked(page_source, status=None):
+    """True for a bot-check page, or for a blocking HTTP status when one is given."""
+    if status in BLOCK_STATUSES:
+        return True
+    head = (page_source or "")[:BLOCK_SCAN_CHARS].lower()
+    return any(marker in head for marker in BLOCK_MARKERS)
+
+
+def _text(el):
+    """Visible-ish text of an element: whitespace collapsed, script/style skipped."""
+    parts = el.xpath(".//text()[not(ancestor::script) and not(ancestor::style)]")
+    return " ".join(" ".join(parts).split())
+
+
+def _own_text(el):
+    return (el.text or "") + "".join(child.tail or "" for child in el)
+
+
+def _classes(el):
+    return (el.get("class") or "").split()
+
+
+def parse_product_page(page_source):
+    """
+    Extracts everything the product scraper needs from one page_source snapshot.
+
+    The document is parsed once and walked once; the few nested selectors
+    (spec rows, bullet items) are resolved inside their anchor element. Works
+    the same on live browser HTML, plain HTTP responses and saved pages.
+    """
+    root = lxml_html.fromstring(page_source or "<html></html>")
+
+    anchors = {}
+    keyvalue_tables = []
+    title_fallback = None
+    json_ld = []
+    data_blobs = {}
+    shipping_texts = []
+    asin = None
+
+    for el in root.iter():
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue  # comments / processing instructions
+
+        el_id = el.get("id")
+        if el_id in ANCHOR_IDS and el_id not in anchors:
+            anchors[el_id] = el
+
+        if tag == "input" and el_id == "ASIN":
+            asin = el.get("value")
+        elif tag == "table" and "a-keyvalue" in _classes(el):
+            keyvalue_tables.append(el)
+        elif tag == "h1" and title_fallback is None and "a-size-large" in _classes(el):
+            title_fallback = el
+        elif tag == "script":
+            script_type = el.get("type") or ""
+            if script_type == "application/ld+json":
+                try:
+                    json_ld.append(json.loads(el.text or ""))
+                except ValueError:
+                    pass
+            elif script_type == "a-state" and el.get("data-a-state"):
+                try:
+                    key = json.loads(el.get("data-a-state")).get("key")
+                    data_blobs[key] = json.loads(el.text or "")
+                except (ValueError, AttributeError):
+                    pass
+        elif tag == "div":
+            own = _own_text(el)
+            if any(marker in own for marker in SHIPPING_MARKERS):
+                shipping_texts.append(_text(el))
+
+    # === Title, same selector order as the old WebDriver lookups ===
+    title = None
+    candidates = [anchors.get("productTitle")]
+    if "title" in anchors:
+        candidates += anchors["title"].xpath(".//span")[:1]
+    if title_fallback is not None:
+        candidates += title_fallback.xpath(".//span")[:1]
+    for el in candidates:
+        if el is not None and _text(el):
+            title = _text(el)
+            break
+
+    byline = _text(anchors["bylineInfo"]) if "bylineInfo" in anchors else None
+
+    bullets = [_text(li) for li in anchors["detailBullets_feature_div"].iter("li")] \
+        if "detailBullets_feature_div" in anchors else []
+    feature_bullets = [_text(li) for li in anchors["feature-bullets"].iter("li")] \
+        if "feature-bullets" in anchors else []
+
+    kv_rows = []
+    specs = {}
+    for table in keyvalue_tables:
+        for row in table.iter("tr"):
+            kv_rows.append(_text(row))
+            cells = [c for c in row if isinstance(c.tag, str) and c.tag in ("th", "td")]
+            if len(cells) >= 2:
+                specs[_text(cells[0]).lower()] = _text(cells[1])
+
+    tech_spec_cells = [_text(td) for td in anchors["productDetails_techSpec_section_1"].iter("td")] \
+        if "productDetails_techSpec_section_1" in anchors else []
+
+    description = _text(anchors["productDescription"]) if "productDescription" in anchors else ""
+    merchant_info = _text(anchors["merchant-info"]) if "merchant-info" in anchors else ""
+    if "tabular-buybox" in anchors:
+        shipping_texts.append(_text(anchors["tabular-buybox"]))
+
+    text_blobs = [b.lower() for b in bullets] + [r.lower() for r in kv_rows] + \
+                 [c.lower() for c in tech_spec_cells] + ([description.lower()] if description else [])
+
+    return {
+        "title": title,
+        "byline": byline,
+        "bullets": bullets,
+        "feature_bullets": feature_bullets,
+        "kv_rows": kv_rows,
+        "specs": specs,
+        "tech_spec_cells": tech_spec_cells,
+        "description": description,
+        "merchant_info": merchant_info,
+        "shipping_texts": shipping_texts,
+        "json_ld": json_ld,
+        "data_blobs": data_blobs,
+        "text_blobs": text_blobs,
+        "blocked": is_blocked(page_source),
+        "asin": asin,
+    }
+
+
+SEARCH_TITLE_PATHS = (
+    ".//span[contains(@class, 'a-size-medium') and contains(@class, 'a-text-normal')]",
+    ".//span[contains(@class, 'a-size-base-plus') and contains(@class, 'a-text-normal')]",
+    ".//h2//span",
+)
+
+
+def parse_search_results(page_source):
+    """
+    Product cards from a search-results page: [{"asin", "title", "href"}].
+    The HTTP counterpart of the Selenium card loop in scrape_amazon_titles.
+    """
+    tree = lxml_html.fromstring(page_source or "<html/>")
+    products = []
+    for card in tree.xpath("//div[contains(@class, 's-main-slot')]//div[@data-asin]"):
+        asin = card.get("data-asin")
+        if not asin:
+            continue
+        title = None
+        for path in SEARCH_TITLE_PATHS:
+            found = card.xpath(path)
+            if found and _text(found[0]):
+                title = _text(found[0])
+                break
+        if not title:
+            continue
+        links = card.xpath(".//a[contains(@class, 'a-link-normal')]/@href")
+        products.append({"asin": asin, "title": title, "href": links[0] if links else None})
+    return products
+
+
+def parse_product_file(path):
+    """Offline helper: parse a saved product page."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_product_page(f.read())
+
+
+if __name__ == "__main__":
+    import sys
+
+    for path in sys.argv[1:]:
+        record = parse_product_file(path)
+        record.pop("data_blobs", None)
+        print(json.dumps(record, indent=2, ensure_ascii=False))
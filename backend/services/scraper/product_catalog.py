@@ -0,0 +1,260 @@
+# product_catalog.py
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.abspath(os.path.join(base_dir, "../../data"))
+
+DEFAULT_DB_PATH = os.environ.get("ECO_CATALOG_DB", os.path.join(data_dir, "product_catalog.db"))
+LEGACY_JSON_PATH = os.path.join(data_dir, "priority_products.json")
+LEGACY_COMMENT = "High-confidence product data."
+
+
+class ProductCatalog:
+    """
+    High-confidence products keyed by ASIN, in one SQLite file (WAL mode).
+
+    Replaces priority_products.json: a lookup or insert is one B-tree probe
+    instead of loading and rewriting the whole JSON document, and every
+    worker process and CLI can share the file. Products are stored as JSON,
+    with brand / origin / confidence pulled out into indexed columns.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_db()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    asin TEXT PRIMARY KEY,
+                    brand TEXT,
+                    origin TEXT,
+                    confidence TEXT,
+                    payload TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS products_brand ON products (brand)")
+            conn.execute("CREATE INDEX IF NOT EXISTS products_origin ON products (origin)")
+            conn.execute("CREATE INDEX IF NOT EXISTS products_confidence ON products (confidence)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS migrations (
+                    source TEXT PRIMARY KEY,
+                    rows INTEGER NOT NULL,
+                    migrated_at REAL NOT NULL
+                )
+            """)
+
+    @staticmethod
+    def _row(product, now):
+        brand = product.get("brand")
+        return (
+            product["asin"],
+            brand.lower().strip() if isinstance(brand, str) else None,
+            product.get("brand_estimated_origin"),
+            product.get("confidence"),
+            json.dumps(product, ensure_ascii=False),
+            now,
+        )
+
+    # === Lookups ===
+    def get(self, asin, default=None):
+        row = self._conn().execute("SELECT payload FROM products WHERE asin = ?", (asin,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __getitem__(self, asin):
+        product = self.get(asin)
+        if product is None:
+            raise KeyError(asin)
+        return product
+
+    def __contains__(self, asin):
+        return self._conn().execute("SELECT 1 FROM products WHERE asin = ?", (asin,)).fetchone() is not None
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def get_many(self, asins):
+        asins = list(asins)
+        found = {}
+        for i in range(0, len(asins), 500):  # stay under SQLite's bound-parameter limit
+            chunk = asins[i:i + 500]
+            rows = self._conn().execute(
+                f"SELECT asin, payload FROM products WHERE asin IN ({','.join('?' * len(chunk))})", chunk
+            )
+            found.update((asin, json.loads(payload)) for asin, payload in rows)
+        return found
+
+    def find(self, brand=None, origin=None, confidence=None, limit=100):
+        clauses, params = [], []
+        for column, value in (("brand", brand and brand.lower().strip()), ("origin", origin), ("confidence", confidence)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(f"SELECT payload FROM products {where} ORDER BY asin LIMIT ?", (*params, limit))
+        return [json.loads(payload) for (payload,) in rows]
+
+    def items(self):
+        """(asin, product) pairs in ASIN order, streamed from the database."""
+        for asin, payload in self._conn().execute("SELECT asin, payload FROM products ORDER BY asin"):
+            yield asin, json.loads(payload)
+
+    # === Writes ===
+    def upsert_many(self, products):
+        """Inserts or replaces products (dicts with an "asin") in one transaction."""
+        now = time.time()
+        rows = [self._row(p, now) for p in products if p.get("asin")]
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO products (asin, brand, origin, confidence, payload, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(asin) DO UPDATE SET brand = excluded.brand, origin = excluded.origin, "
+                "confidence = excluded.confidence, payload = excluded.payload, updated_at = excluded.updated_at",
+                rows,
+            )
+        return len(rows)
+
+    def upsert(self, product):
+        return self.upsert_many([product]) == 1
+
+    def insert_new(self, products):
+        """Inserts the products whose ASIN isn't catalogued yet; returns the ASINs that were added."""
+        now = time.time()
+        added = []
+        with self._conn() as conn:
+            for product in products:
+                if not product.get("asin"):
+                    continue
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO products (asin, brand, origin, confidence, payload, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", self._row(product, now),
+                )
+                if cur.rowcount == 1:
+                    added.append(product["asin"])
+        return added
+
+    def rescore_distances(self, batch=50_000):
+        """
+        Recomputes distance_origin_to_uk for every product from the shared
+        distance table, one batch of products per vectorized lookup. Returns
+        how many products changed.
+        """
+        from backend.utils.geo import get_distance_table
+
+        table = get_distance_table()
+        changed, after = 0, ""
+        while True:
+            rows = self._conn().execute("SELECT asin, payload FROM products WHERE asin > ? ORDER BY asin LIMIT ?",
+                                        (after, batch)).fetchall()
+            if not rows:
+                return changed
+            products = [json.loads(payload) for _, payload in rows]
+            distances = table.distances([p.get("brand_estimated_origin") for p in products]).round(1)
+            stale = []
+            for product, km in zip(products, distances.tolist()):
+                if product.get("distance_origin_to_uk") != km:
+                    product["distance_origin_to_uk"] = km
+                    stale.append(product)
+            changed += self.upsert_many(stale)
+            after = rows[-1][0]
+
+    # === Legacy JSON ===
+    def migrate_json(self, path=LEGACY_JSON_PATH):
+        """One-time import of a priority_products.json file; later calls for the same file are no-ops."""
+        source = os.path.abspath(path)
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM migrations WHERE source = ?", (source,)).fetchone():
+            return 0
+        try:
+            with open(source, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except FileNotFoundError:
+            return 0
+
+        products = [dict(product, asin=product.get("asin") or asin) for asin, product in legacy.items()
+                    if not asin.startswith("_") and isinstance(product, dict)]
+        added = self.insert_new(products)  # rows already in the catalog are newer than the JSON
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO migrations (source, rows, migrated_at) VALUES (?, ?, ?)",
+                         (source, len(added), time.time()))
+        print(f"📦 Migrated {len(added)} products from {source} into the catalog")
+        return len(added)
+
+    def export_json(self, path=LEGACY_JSON_PATH):
+        """Writes the catalog in the old priority_products.json layout (for the extension)."""
+        tmp_path = path + ".tmp"
+        count = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("{\n  " + json.dumps("_comment") + ": " + json.dumps(LEGACY_COMMENT))
+            for asin, product in self.items():
+                body = json.dumps(product, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                f.write(",\n  " + json.dumps(asin) + ": " + body)
+                count += 1
+            f.write("\n}\n")
+        os.replace(tmp_path, path)
+        return count
+
+    def metrics(self):
+        conn = self._conn()
+        by_confidence = dict(conn.execute("SELECT COALESCE(confidence, ''), COUNT(*) FROM products GROUP BY 1"))
+        return {
+            "products": sum(by_confidence.values()),
+            "by_confidence": by_confidence,
+            "migrations": [{"source": s, "rows": r} for s, r in conn.execute("SELECT source, rows FROM migrations")],
+            "db_path": self.db_path,
+        }
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_product_catalog():
+    """The process-wide catalog; the first call also migrates priority_products.json if it hasn't been."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ProductCatalog()
+            _catalog.migrate_json()
+        return _catalog
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="🗄️ Product catalog maintenance.")
+    parser.add_argument("command", choices=["migrate", "export", "stats", "get", "rescore-distances"])
+    parser.add_argument("arg", nargs="?", help="JSON path for migrate/export, ASIN for get")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    args = parser.parse_args()
+
+    catalog = ProductCatalog(args.db)
+    if args.command == "migrate":
+        print(f"📥 Migrated {catalog.migrate_json(args.arg or LEGACY_JSON_PATH)} products")
+    elif args.command == "export":
+        path = args.arg or LEGACY_JSON_PATH
+        print(f"📤 Exported {catalog.export_json(path)} products to {path}")
+    elif args.command == "rescore-distances":
+        print(f"🌍 Updated distances of {catalog.rescore_distances()} products")
+    elif args.command == "get":
+        print(json.dumps(catalog.get(args.arg), indent=2))
+    else:
+        print(json.dumps(catalog.metrics(), indent=2))
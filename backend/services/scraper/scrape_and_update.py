@@ -1,9 +1,10 @@
 # scrape_and_update.py
 
-import requests
 from bs4 import BeautifulSoup
 import json
 import random
+from backend.services.scraper.page_fetcher import get_page_fetcher
+from backend.utils.geo import get_distance_table, origin_hubs
 
 def estimate_origin_country(title):
     title = title.lower()
@@ -19,39 +20,15 @@ def estimate_origin_country(title):
         return "UK"
     return "China"
 
-origin_hubs = {
-    "China": {"lat": 31.2304, "lon": 121.4737, "city": "Shanghai"},
-    "Germany": {"lat": 50.1109, "lon": 8.6821, "city": "Frankfurt"},
-    "USA": {"lat": 37.7749, "lon": -122.4194, "city": "San Francisco"},
-    "Japan": {"lat": 35.6895, "lon": 139.6917, "city": "Tokyo"},
-    "UK": {"lat": 51.509865, "lon": -0.118092, "city": "London"}
-}
-
-uk_hub = {"lat": 51.8821, "lon": -0.5057, "city": "Dunstable"}
-
-def haversine(lat1, lon1, lat2, lon2):
-    from math import radians, cos, sin, sqrt, atan2
-    R = 6371
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return R * c
-
 def scrape_product_page(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-        "Accept-Language": "en-GB,en;q=0.9",
-    }
-    response = requests.get(url, headers=headers)
-    
-    # 🧪 Check for CAPTCHA block
-    if "captcha" in response.text.lower():
-        print("🚫 CAPTCHA detected. Amazon blocked the request.")
-        print(response.text[:1000])  # Still show the content
+    # Plain HTTP first; only escalates to a pooled browser if blocked or incomplete
+    result = get_page_fetcher().fetch(url)
+    if not result.ok:
+        print("🚫 Blocked or incomplete on every backend:", result.attempts)
         return []
+    print(f"📡 Fetched via {result.backend} in {result.elapsed_ms:.0f} ms")
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = BeautifulSoup(result.html, "html.parser")
 
     # Try fallback selectors for robustness
     title_elem = (
@@ -60,7 +37,7 @@ def scrape_product_page(url):
         soup.select_one("title")
     )
 
-    print(response.text[:1000])  # 👈 Preview the raw HTML
+    print(result.html[:1000])  # 👈 Preview the raw HTML
 
     if not title_elem:
         print("❌ Couldn't find title.")
@@ -72,7 +49,7 @@ def scrape_product_page(url):
     origin_country = estimate_origin_country(title)
     origin = origin_hubs[origin_country]
 
-    intl_distance = round(haversine(origin["lat"], origin["lon"], uk_hub["lat"], uk_hub["lon"]), 1)
+    intl_distance = round(get_distance_table().distance(origin_country), 1)
 
     product = {
         "title": title,
@@ -0,0 +1,316 @@
+# scrape_cache.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.abspath(os.path.join(base_dir, "../../data"))
+
+DEFAULT_DB_PATH = os.environ.get("ECO_SCRAPE_CACHE_DB", os.path.join(data_dir, "scrape_cache.db"))
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class _Flight:
+    """One in-progress scrape that other threads in this process can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.product = None
+
+
+class ScrapeCache:
+    """
+    Scrape results keyed by ASIN, in two tiers.
+
+    The first tier is a bounded in-process LRU. The second is a SQLite file
+    shared by every worker process, so a product scraped by one worker is a
+    hit for all of them. Failed scrapes (no title, CAPTCHA / bot check) are
+    cached as negative entries with a much shorter TTL, so a blocked product
+    is not retried on every request but is retried soon.
+
+    Misses are single-flight: within a process, concurrent callers for one
+    ASIN share a single scrape; across processes, the scraping worker holds a
+    lease row in the same SQLite file and the others poll for its result.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_entries=512, ttl=DAY, negative_ttl=15 * 60,
+                 priority_ttl=30 * DAY, wait_timeout=90, lease_ttl=180, poll_interval=0.25):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.priority_ttl = priority_ttl
+        self.wait_timeout = wait_timeout
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+
+        self._inflight = {}  # asin -> _Flight, scrapes running in this process
+        self._memory = OrderedDict()  # asin -> (expires_at, product or None)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "stores": 0,
+            "negative_stores": 0,
+            "warmed": 0,
+            "scrapes": 0,
+            "coalesced": 0,
+            "lease_waits": 0,
+            "wait_timeouts": 0,
+        }
+        self._init_db()
+
+    # === SQLite tier ===
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_cache (
+                    asin TEXT PRIMARY KEY,
+                    payload TEXT,
+                    negative INTEGER NOT NULL DEFAULT 0,
+                    reason TEXT,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_leases (
+                    asin TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def _read_disk(self, asin):
+        row = self._conn().execute(
+            "SELECT payload, negative, expires_at FROM scrape_cache WHERE asin = ?", (asin,)
+        ).fetchone()
+        if row is None:
+            return None
+        payload, negative, expires_at = row
+        return expires_at, (None if negative else json.loads(payload))
+
+    def _write_disk(self, entries):
+        """entries: (asin, product or None, expires_at, reason) tuples, written in one transaction."""
+        now = time.time()
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scrape_cache (asin, payload, negative, reason, stored_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(asin, None if product is None else json.dumps(product, ensure_ascii=False),
+                  int(product is None), reason, now, expires_at)
+                 for asin, product, expires_at, reason in entries],
+            )
+
+    def _acquire_lease(self, asin, owner):
+        now = time.time()
+        with self._conn() as conn:
+            # A lease left behind by a crashed worker expires instead of blocking forever
+            conn.execute("DELETE FROM scrape_leases WHERE asin = ? AND expires_at <= ?", (asin, now))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO scrape_leases (asin, owner, expires_at) VALUES (?, ?, ?)",
+                (asin, owner, now + self.lease_ttl),
+            )
+            return cur.rowcount == 1
+
+    def _release_lease(self, asin, owner):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM scrape_leases WHERE asin = ? AND owner = ?", (asin, owner))
+
+    # === Memory tier ===
+    def _remember(self, asin, expires_at, product):
+        with self._lock:
+            self._memory[asin] = (expires_at, product)
+            self._memory.move_to_end(asin)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # === Public API ===
+    def lookup(self, asin):
+        """
+        Returns (hit, product). A hit with product None is a cached failure.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(asin)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(asin)
+                    self._stats["memory_hits"] += 1
+                    if entry[1] is None:
+                        self._stats["negative_hits"] += 1
+                    return True, entry[1]
+                del self._memory[asin]
+                self._stats["expired"] += 1
+
+        entry = self._read_disk(asin)
+        if entry is not None and entry[0] > now:
+            self._remember(asin, *entry)
+            self._bump("disk_hits")
+            if entry[1] is None:
+                self._bump("negative_hits")
+            return True, entry[1]
+        if entry is not None:
+            self._bump("expired")
+
+        self._bump("misses")
+        return False, None
+
+    def store(self, asin, product, ttl=None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._write_disk([(asin, product, expires_at, None)])
+        self._remember(asin, expires_at, product)
+        self._bump("stores")
+
+    def store_failure(self, asin, reason="scrape_failed"):
+        expires_at = time.time() + self.negative_ttl
+        self._write_disk([(asin, None, expires_at, reason)])
+        self._remember(asin, expires_at, None)
+        self._bump("negative_stores")
+
+    def invalidate(self, asin):
+        with self._lock:
+            self._memory.pop(asin, None)
+        with self._conn() as conn:
+            conn.execute("DELETE FROM scrape_cache WHERE asin = ?", (asin,))
+
+    def get_or_scrape(self, url, scrape, timeout=None):
+        """
+        Cached scrape for an Amazon URL. `scrape(url)` is only called on a miss,
+        and at most once at a time per ASIN across all workers; a falsy result
+        is cached as a negative entry. Callers waiting on someone else's scrape
+        give up after `timeout` seconds and get None. URLs without an ASIN are
+        scraped uncached.
+        """
+        from backend.services.scraper.scrape_amazon_titles import extract_asin
+
+        asin = extract_asin(url or "")
+        if not asin:
+            return scrape(url)
+
+        hit, product = self.lookup(asin)
+        if hit:
+            print(f"🗃️ Scrape cache hit for {asin}" + (" (cached failure)" if product is None else ""))
+            return product
+
+        deadline = time.monotonic() + (self.wait_timeout if timeout is None else timeout)
+        with self._lock:
+            flight = self._inflight.get(asin)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[asin] = _Flight()
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            print(f"⏳ Waiting for in-flight scrape of {asin}")
+            if not flight.done.wait(max(0.0, deadline - time.monotonic())):
+                self._bump("wait_timeouts")
+                return None
+            return flight.product
+
+        try:
+            flight.product = self._scrape_once(asin, url, scrape, deadline)
+            return flight.product
+        finally:
+            with self._lock:
+                self._inflight.pop(asin, None)
+            flight.done.set()
+
+    def _scrape_once(self, asin, url, scrape, deadline):
+        """Scrapes under the cross-process lease, or waits for the worker holding it."""
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        waited = False
+        while True:
+            if self._acquire_lease(asin, owner):
+                try:
+                    # The previous lease holder may have just finished
+                    entry = self._read_disk(asin) if waited else None
+                    if entry is not None and entry[0] > time.time():
+                        self._remember(asin, *entry)
+                        return entry[1]
+
+                    self._bump("scrapes")
+                    product = scrape(url)
+                    if product:
+                        self.store(asin, product)
+                    else:
+                        self.store_failure(asin)
+                    return product
+                finally:
+                    self._release_lease(asin, owner)
+
+            if not waited:
+                self._bump("lease_waits")
+                print(f"⏳ {asin} is being scraped by another worker, waiting...")
+                waited = True
+
+            entry = self._read_disk(asin)
+            if entry is not None and entry[0] > time.time():
+                self._remember(asin, *entry)
+                return entry[1]
+            if time.monotonic() >= deadline:
+                self._bump("wait_timeouts")
+                return None
+            time.sleep(self.poll_interval)
+
+    def warm(self, path=None):
+        """Pre-loads high-confidence products (the product catalog, or a legacy JSON file) so they never need a browser."""
+        if path is None:
+            from backend.services.scraper.product_catalog import get_product_catalog
+            products = get_product_catalog().items()
+        else:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    products = json.load(f).items()
+            except (FileNotFoundError, ValueError) as e:
+                print(f"⚠️ Could not warm scrape cache from {path}: {e}")
+                return 0
+
+        expires_at = time.time() + self.priority_ttl
+        entries = [(asin, product, expires_at, None) for asin, product in products
+                   if not asin.startswith("_") and isinstance(product, dict)]
+        self._write_disk(entries)
+        for asin, product, _, _ in entries[-self.max_entries:]:
+            self._remember(asin, expires_at, product)
+        self._bump("warmed", len(entries))
+        print(f"🔥 Warmed scrape cache with {len(entries)} priority products")
+        return len(entries)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        stats["memory_capacity"] = self.max_entries
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["disk_entries"] = self._conn().execute("SELECT COUNT(*) FROM scrape_cache").fetchone()[0]
+        return stats
+
+    def _bump(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
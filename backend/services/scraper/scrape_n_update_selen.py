@@ -9,6 +9,7 @@ from selenium.webdriver.support import expected_conditions as EC
 import json
 import random
 import time
+from backend.utils.geo import get_distance_table, origin_hubs
 
 # === CONFIG ===
 chrome_options = Options()
@@ -31,24 +32,6 @@ def estimate_origin_country(title):
         return "UK"
     return "China"
 
-origin_hubs = {
-    "China": {"lat": 31.2304, "lon": 121.4737, "city": "Shanghai"},
-    "Germany": {"lat": 50.1109, "lon": 8.6821, "city": "Frankfurt"},
-    "USA": {"lat": 37.7749, "lon": -122.4194, "city": "San Francisco"},
-    "Japan": {"lat": 35.6895, "lon": 139.6917, "city": "Tokyo"},
-    "UK": {"lat": 51.509865, "lon": -0.118092, "city": "London"}
-}
-uk_hub = {"lat": 51.8821, "lon": -0.5057, "city": "Dunstable"}
-
-def haversine(lat1, lon1, lat2, lon2):
-    from math import radians, cos, sin, sqrt, atan2
-    R = 6371
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return R * c
-
 # === SCRAPER ===
 def scrape_amazon_titles(url, max_items=5):
     driver = webdriver.Chrome(
@@ -73,7 +56,7 @@ def scrape_amazon_titles(url, max_items=5):
 
             origin_country = estimate_origin_country(title)
             origin = origin_hubs[origin_country]
-            distance = round(haversine(origin["lat"], origin["lon"], uk_hub["lat"], uk_hub["lon"]), 1)
+            distance = round(get_distance_table().distance(origin_country), 1)
 
             products.append({
                 "title": title,
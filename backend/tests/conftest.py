@@ -0,0 +1,10 @@
+# conftest.py
+
+import os
+import tempfile
+
+# The scrape cache and product catalog read their DB paths at import time, and importing
+# backend.app imports both: point them at a scratch directory before any test gets that far
+scratch_dir = tempfile.mkdtemp(prefix="eco-tests-")
+os.environ.setdefault("ECO_SCRAPE_CACHE_DB", os.path.join(scratch_dir, "scrape_cache.db"))
+os.environ.setdefault("ECO_CATALOG_DB", os.path.join(scratch_dir, "product_catalog.db"))
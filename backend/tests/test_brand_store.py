@@ -0,0 +1,66 @@
+# test_brand_store.py
+
+import json
+import threading
+import time
+
+from backend.utils.brand_store import BrandStore
+
+
+def test_updates_are_coalesced_into_one_atomic_flush(tmp_path):
+    path = tmp_path / "brand_locations.json"
+    path.write_text(json.dumps({"anker": {"origin": {"country": "China", "city": "Shenzhen"}, "fulfillment": "UK"}}))
+    store = BrandStore(str(path), flush_interval=60).load()
+    before = store.snapshot()
+
+    threads = [
+        threading.Thread(target=lambda n=n: [store.set_origin(f"brand{n}-{i}", "UK") for i in range(25)])
+        for n in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(store) == 101 and store["brand3-24"]["origin"]["country"] == "UK"
+    assert len(before) == 1  # earlier snapshots never change under a reader
+    assert json.loads(path.read_text()) == before  # nothing written on the request path
+
+    assert store.flush() and not store.flush()
+    assert json.loads(path.read_text()) == store.snapshot()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["brand_locations.json", "brand_locations.json.lock"]
+    stats = store.stats()
+    assert stats["updates"] == 100 and stats["flushes"] == 1 and not stats["pending"]
+
+
+def test_background_flush_and_close(tmp_path):
+    path = tmp_path / "brand_locations.json"
+    store = BrandStore(str(path), flush_interval=0.01).load()
+    assert len(store) == 0
+
+    store.set_origin("huel", "UK", "London")
+    for _ in range(200):
+        if not store.pending:
+            break
+        time.sleep(0.01)
+    assert json.loads(path.read_text())["huel"]["origin"]["city"] == "London"
+
+    store.close()
+    store.set_origin("avm", "Germany")  # after shutdown, writes go straight to disk
+    assert "avm" in json.loads(path.read_text())
+
+
+def test_flush_keeps_brands_saved_by_another_process(tmp_path):
+    path = tmp_path / "brand_locations.json"
+    worker_a = BrandStore(str(path), flush_interval=60).load()
+    worker_b = BrandStore(str(path), flush_interval=60).load()
+
+    worker_a.set_origin("huel", "UK")
+    worker_b.set_origin("avm", "Germany")
+    assert worker_b.flush() and worker_a.flush()
+
+    assert set(json.loads(path.read_text())) == {"huel", "avm"}
+    assert "avm" in worker_a  # picked up on its own flush
+    worker_b.set_origin("anker", "China")
+    assert worker_b.flush()
+    assert set(json.loads(path.read_text())) == {"huel", "avm", "anker"}
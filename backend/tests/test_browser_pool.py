@@ -0,0 +1,81 @@
+# test_browser_pool.py
+
+import threading
+
+import pytest
+
+from backend.services.scraper.browser_pool import BrowserPool
+
+
+class FakeDriver:
+    def __init__(self, profile_dir):
+        self.profile_dir = profile_dir
+        self.alive = True
+        self.window_handles = ["main"]
+        self.visited = []
+        self.switch_to = self
+
+    def window(self, handle):
+        pass
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+        return 1
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def close(self):
+        pass
+
+    def quit(self):
+        self.alive = False
+
+
+def make_pool(tmp_path, **kwargs):
+    launched = []
+
+    def launch(profile_dir):
+        launched.append(FakeDriver(profile_dir))
+        return launched[-1]
+
+    return BrowserPool(profile_root=str(tmp_path), launch=launch, **kwargs), launched
+
+
+def test_browsers_are_reused_with_separate_profiles(tmp_path):
+    pool, launched = make_pool(tmp_path, size=2)
+    with pool.browser() as first:
+        with pool.browser() as second:
+            assert first.profile_dir != second.profile_dir
+    with pool.browser() as again:
+        assert again in (first, second)
+        assert again.visited[-1] == "about:blank"
+    assert len(launched) == 2
+    assert pool.metrics()["reuses"] == 1
+
+
+def test_recycle_after_max_pages_and_unhealthy(tmp_path):
+    pool, launched = make_pool(tmp_path, size=1, max_pages=2)
+    for _ in range(2):
+        with pool.browser():
+            pass
+    assert not launched[0].alive and pool.metrics()["recycled"] == 1
+
+    with pool.browser() as driver:
+        pass
+    driver.alive = False  # Chrome died while idle
+    with pool.browser() as replacement:
+        assert replacement is not driver
+    assert pool.metrics()["unhealthy"] == 1
+    assert len(launched) == 3
+
+
+def test_checkout_waits_for_a_free_browser(tmp_path):
+    pool, _ = make_pool(tmp_path, size=1)
+    held = pool.checkout()
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.05)
+
+    threading.Timer(0.05, pool.checkin, args=(held,)).start()
+    assert pool.checkout(timeout=2) is held
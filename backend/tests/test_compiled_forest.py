@@ -0,0 +1,48 @@
+# test_compiled_forest.py
+
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from backend.services.ml_interface.compiled_forest import CompiledForest, load_dataset_matrix
+
+MODEL_PATH = os.path.join("ml_model", "eco_model.pkl")
+
+
+@pytest.fixture(scope="module")
+def X():
+    return load_dataset_matrix()
+
+
+@pytest.fixture(scope="module")
+def model(X):
+    if os.path.exists(MODEL_PATH):
+        return joblib.load(MODEL_PATH)
+
+    # No trained model checked in: fit one with the training settings
+    from sklearn.ensemble import RandomForestClassifier
+    y = np.random.default_rng(0).integers(0, 7, size=len(X))
+    return RandomForestClassifier(n_estimators=100, class_weight="balanced", random_state=42).fit(X, y)
+
+
+def test_parity_with_sklearn_on_eco_dataset(model, X):
+    engine = CompiledForest.from_sklearn(model)
+    labels, proba = engine.predict_with_proba(X)
+
+    expected = model.predict_proba(X)
+    assert np.allclose(proba, expected, rtol=0, atol=1e-12)
+
+    # Only allow label differences on exact probability ties
+    top2 = np.sort(expected, axis=1)[:, -2:]
+    tie = np.isclose(top2[:, 0], top2[:, 1], rtol=0, atol=1e-12)
+    assert np.array_equal(labels[~tie], model.predict(X)[~tie])
+
+
+def test_single_row_and_shape_check(model, X):
+    engine = CompiledForest.from_sklearn(model)
+    assert np.allclose(engine.predict_proba(X[0]), model.predict_proba(X[:1]))
+    with pytest.raises(ValueError):
+        engine.predict_proba(X[:, :5])
+
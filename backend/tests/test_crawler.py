@@ -0,0 +1,141 @@
+# test_crawler.py
+
+import time
+
+import pytest
+
+from backend.services.scraper.crawler import (Crawler, FetchError, Frontier, HostRateLimiter, ReplayServer, TokenBucket,
+                                              classify_error, fetch_search_page_browser, fetch_search_page_http,
+                                              synthetic_search_page)
+from backend.services.scraper.page_parser import parse_search_results
+
+
+def test_token_bucket_spaces_requests_after_the_burst():
+    bucket = TokenBucket(rate=50, burst=2)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] > 0 and waits[4] > waits[3] > waits[2]
+    assert abs(waits[4] - 3 / 50) < 0.01
+
+
+def test_rate_limiter_buckets_are_per_host():
+    limiter = HostRateLimiter(rate=1, burst=1, overrides={"slow.example": (0.5, 1)})
+    assert limiter.acquire("http://a.example/x") == 0.0
+    assert limiter.acquire("http://b.example/x") == 0.0
+    assert limiter.bucket("slow.example").rate == 0.5
+
+
+def test_frontier_claim_complete_and_backoff(tmp_path):
+    frontier = Frontier(str(tmp_path / "frontier.db"), max_attempts=2, backoff=60, jitter=0)
+    assert frontier.seed_search(["coffee+mug"], 2, "http://x/s?k={term}&page={page}") == 2
+    assert frontier.seed_search(["coffee+mug"], 2, "http://x/s?k={term}&page={page}") == 0
+
+    first, second = frontier.claim("1:0:a"), frontier.claim("1:1:b")
+    assert first == "http://x/s?k=coffee+mug&page=1" and second.endswith("page=2")
+    assert frontier.claim("1:2:c") is None
+
+    frontier.complete(first, 24)
+    assert frontier.fail(second, TimeoutError("read timed out")) == 60  # back to pending, due in 60s
+    assert frontier.claim("1:2:c") is None
+    assert 59 < frontier.next_due_in() <= 60
+    assert frontier.counts() == {"pending": 1, "in_progress": 0, "done": 1, "dead": 0}
+
+    frontier._conn().execute("UPDATE frontier SET not_before = 0 WHERE state = 'pending'")
+    assert frontier.claim("1:2:c") == second
+    assert frontier.fail(second, TimeoutError("read timed out")) is None  # out of attempts
+    [letter] = frontier.dead_letters()
+    assert letter["url"] == second and letter["error_class"] == "timeout"
+    assert frontier.retry_dead("blocked") == 0
+    assert frontier.retry_dead("timeout") == 1
+    assert frontier.claim("1:2:c") == second
+
+
+def test_retry_policy_per_error_class(tmp_path):
+    frontier = Frontier(str(tmp_path / "frontier.db"), backoff=10, jitter=0.5)
+    frontier.seed([(f"http://x/{i}", "t", i) for i in range(3)])
+    urls = [frontier.claim("1:0:a") for _ in range(3)]
+
+    assert 450 <= frontier.fail(urls[0], FetchError("blocked")) <= 900
+    assert 5 <= frontier.fail(urls[1], ValueError("boom")) <= 10
+    assert frontier.fail(urls[2], FetchError("not_found")) is None  # never retried
+    assert frontier.counts() == {"pending": 2, "in_progress": 0, "done": 0, "dead": 1}
+    assert frontier.claim("1:0:a") is None  # nothing is due yet
+    assert classify_error(TimeoutError()) == "timeout"
+
+
+def test_empty_page_is_retried_not_completed(tmp_path):
+    frontier = Frontier(str(tmp_path / "frontier.db"))
+    frontier.seed([("http://x/1", "t", 1)])
+    stats = Crawler(frontier, lambda url: [], HostRateLimiter(rate=1000, burst=10), workers=1).run(max_pages=1)
+    assert stats["errors"] == 1 and stats["pages"] == 0
+    assert frontier.dead_letters() == [] and frontier.counts()["pending"] == 1
+
+
+class FakeDriver:
+    def __init__(self, page_source):
+        self.page_source = page_source
+
+    def get(self, url):
+        pass
+
+
+class FakePool:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def checkout(self):
+        return self
+
+    def checkin(self, pooled):
+        pass
+
+
+def test_browser_fetcher_raises_fetch_errors(monkeypatch):
+    from backend.services.scraper import scrape_amazon_titles as scraper
+
+    monkeypatch.setattr(scraper, "ensure_data_loaded", lambda: None)
+    monkeypatch.setattr(scraper, "get_browser_pool", lambda: FakePool(FakeDriver("<html>Robot Check</html>")))
+    with pytest.raises(FetchError) as blocked:
+        fetch_search_page_browser("http://x/s?k=mug")
+    assert blocked.value.kind == "blocked"  # gets the long back-off, not the generic "empty" one
+    assert scraper.scrape_amazon_titles("http://x/s?k=mug") == []  # other callers still get an empty list
+
+    monkeypatch.setattr(scraper, "safe_get", lambda driver, url: False)
+    with pytest.raises(FetchError) as failed:
+        fetch_search_page_browser("http://x/s?k=mug")
+    assert failed.value.kind == "load_failed"
+
+
+def test_recover_releases_leases_of_dead_processes(tmp_path):
+    frontier = Frontier(str(tmp_path / "frontier.db"))
+    frontier.seed([("http://x/1", "t", 1), ("http://x/2", "t", 2)])
+    frontier.claim("999999999:0:dead")
+    assert frontier.claim("999999999:1:dead") == "http://x/2"
+
+    assert frontier.recover() == 2
+    assert frontier.counts()["pending"] == 2
+    assert frontier.claim("1:0:a") == "http://x/1"
+
+
+def test_parse_search_results_reads_cards():
+    products = parse_search_results(synthetic_search_page("coffee mug", 2, per_page=3))
+    assert len(products) == 3
+    assert len({p["asin"] for p in products}) == 3
+    assert all(p["title"] and p["href"] for p in products)
+
+
+def test_replay_crawl_with_several_workers(tmp_path):
+    seen = []
+    with ReplayServer(latency=0.05, per_page=5) as server:
+        frontier = Frontier(str(tmp_path / "frontier.db"))
+        frontier.seed_search([f"term{i}" for i in range(4)], 3, server.url_template)
+        crawler = Crawler(frontier, fetch_search_page_http, HostRateLimiter(rate=1000, burst=10), workers=4,
+                          on_result=lambda url, products: seen.append((url, len(products))), poll_interval=0.01)
+        start = time.perf_counter()
+        stats = crawler.run(until_empty=True)
+        elapsed = time.perf_counter() - start
+
+    assert stats["pages"] == 12 and stats["products"] == 60 and stats["errors"] == 0
+    assert len({url for url, _ in seen}) == 12
+    assert stats["frontier"]["done"] == 12
+    assert elapsed < 12 * 0.05  # the workers overlap their waits
@@ -0,0 +1,39 @@
+# test_decision_table.py
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from backend.services.ml_interface.decision_table import (
+    DecisionTable, build_decision_table, verify_decision_table, model_fingerprint, BIN_EDGES
+)
+
+CARDINALITIES = [4, None, 3, 2, 3, len(BIN_EDGES) + 1]
+
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(1)
+    n = 600
+    weight = np.round(rng.uniform(0.1, 14, size=n), 2)
+    X = np.column_stack([
+        rng.integers(0, 4, n), weight, rng.integers(0, 3, n),
+        rng.integers(0, 2, n), rng.integers(0, 3, n), np.digitize(weight, BIN_EDGES),
+    ]).astype(float)
+    y = rng.integers(0, 5, size=n)
+    return RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y), X
+
+
+def test_table_matches_model(model, tmp_path):
+    forest, X = model
+    table = build_decision_table(forest, CARDINALITIES)
+
+    mismatches, total = verify_decision_table(table, forest, X, samples=500)
+    assert total > len(X)
+    assert mismatches == 0
+
+    path = tmp_path / "table.pkl"
+    table.save(path)
+    loaded = DecisionTable.load(path)
+    assert loaded.fingerprint == model_fingerprint(forest)
+    assert np.array_equal(loaded.predict(X), forest.predict(X))
@@ -0,0 +1,50 @@
+# test_eco_data_cache.py
+
+import os
+
+import pytest
+
+from backend.utils.eco_data_cache import EcoDataCache, encode_cursor, decode_cursor
+
+HEADER = "title,material,weight,transport,recyclability,true_eco_score,co2_emissions,origin\n"
+ROWS = [
+    "mug,Steel,1.85,Air,High,F,5.83,CHINA\n",
+    "bag,Cardboard,0.55,Land,Medium,B,0.35,UK\n",
+    "lamp,Steel,1.06,Land,Medium,C,0.57,China\n",
+    "broken,,1.0,Land,Medium,C,0.5,UK\n",
+]
+
+
+def test_query_and_reload(tmp_path):
+    path = tmp_path / "eco_dataset.csv"
+    path.write_text(HEADER + "".join(ROWS), encoding="utf-8")
+    cache = EcoDataCache(str(path))
+
+    snapshot = cache.snapshot()
+    assert snapshot.n_rows == 3  # row without a material is dropped
+    assert cache.snapshot() is snapshot
+
+    rows, total = snapshot.query(filters={"material": ["steel"], "origin": ["china"]},
+                                 sort="co2_emissions", descending=True, fields=["title"])
+    assert total == 2 and rows == [{"title": "mug"}, {"title": "lamp"}]
+
+    rows, total = snapshot.query(co2_range=(0.4, 1.0), fields=["title", "weight"])
+    assert rows == [{"title": "lamp", "weight": 1.06}]
+
+    rows, _ = snapshot.query(sort="title", offset=1, limit=1, fields=["title"])
+    assert rows == [{"title": "lamp"}]
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("fork,Glass,0.2,Ship,High,A,0.1,Italy\n")
+    os.utime(path, ns=(1, 1))  # force a different mtime even on coarse filesystems
+    assert cache.snapshot().n_rows == 4
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(250)) == 250
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bnVsbA==", "e30=", "WzFd", "eyJvZmZzZXQiOiAieCJ9"])
+def test_malformed_cursor_is_a_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
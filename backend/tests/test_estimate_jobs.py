@@ -0,0 +1,80 @@
+# test_estimate_jobs.py
+
+import os
+import threading
+
+import pytest
+
+from backend.utils.jobs import JobManager, JobQueueFull, sse_stream
+
+MODEL_PATH = os.path.join("ml_model", "eco_model.pkl")
+
+
+def test_job_runs_items_and_streams_events():
+    def worker(item, progress):
+        progress("working", value=item)
+        if item < 0:
+            raise ValueError("negative")
+        return item * 2
+
+    jobs = JobManager(worker, max_workers=2)
+    job = jobs.submit([1, -1, 3])
+    assert job.wait(5)
+
+    state = job.as_dict()
+    assert state["status"] == "partial" and state["completed"] == 2 and state["failed"] == 1
+    assert [r["result"] for r in state["results"] if r["status"] == "done"] == [2, 6]
+
+    stream = "".join(sse_stream(job))
+    assert stream.count("event: progress") == 3
+    assert stream.rstrip().splitlines()[-2] == "event: partial"
+
+    # A reconnecting client only gets what it missed
+    last_id = len(job.events) - 2
+    assert "".join(sse_stream(job, last_id)).count("id: ") == 1
+
+
+def test_pending_limit_rejects_new_jobs():
+    release = threading.Event()
+    jobs = JobManager(lambda item, progress: release.wait(5), max_workers=1, max_pending=2)
+    job = jobs.submit([1, 2])
+    with pytest.raises(JobQueueFull):
+        jobs.submit([3])
+    release.set()
+    assert job.wait(5) and job.status == "done"
+    assert jobs.metrics()["rejected"] == 1
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="eco_model.pkl has not been trained")
+def test_estimate_job_api(tmp_path, monkeypatch):
+    from backend import app as app_module
+    monkeypatch.chdir(tmp_path)  # estimate logging writes under ml_model/
+    monkeypatch.setattr(app_module.scrape_cache, "get_or_scrape", lambda url, scrape: {
+        "title": "Steel Mug", "material_type": "Steel", "raw_product_weight_kg": 0.4,
+        "recyclability": "High", "brand_estimated_origin": "Germany",
+        "distance_origin_to_uk": 900, "distance_uk_to_user": 100,
+    } if "good" in url else None)
+    client = app_module.app.test_client()
+
+    res = client.post("/jobs/estimate", json={"amazon_urls": ["https://x/good/dp/B000000001", "https://x/bad"],
+                                              "transport": "Ship"})
+    assert res.status_code == 202
+    job_id = res.get_json()["job_id"]
+    assert app_module.estimate_jobs.get(job_id).wait(10)
+
+    state = client.get(f"/jobs/{job_id}").get_json()
+    assert state["status"] == "partial"
+    done, failed = sorted(state["results"], key=lambda r: r["status"])
+    assert done["result"]["data"]["attributes"]["material_type"] == "Steel"
+    assert failed["error"] == "Failed to scrape product"
+
+    events = client.get(f"/jobs/{job_id}/events").get_data(as_text=True)
+    assert "event: progress" in events and "event: partial" in events
+
+    # The synchronous endpoint still answers inline, including manual entries
+    manual = client.post("/estimate_emissions", json={"title": "Jar", "material": "Glass", "weight": 1,
+                                                      "transport": "Land", "origin": "UK"})
+    assert manual.status_code == 200
+    assert manual.get_json()["data"]["attributes"]["raw_product_weight_kg"] == 0.5
+    assert client.post("/estimate_emissions", json={"amazon_url": "https://x/bad"}).status_code == 500
+    assert client.get("/jobs/nope").status_code == 404
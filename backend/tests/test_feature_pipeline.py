@@ -0,0 +1,92 @@
+# test_feature_pipeline.py
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import LabelEncoder
+
+from backend.services.ml_interface.feature_pipeline import FeaturePipeline, SERVING_COLUMNS, XGB_COLUMNS
+
+ROWS = {
+    "material": ["plastic", " Glass ", "Steel", "Unknown", None, "Plastic"],
+    "transport": ["Ship", "air", "Land", "Ship", "Ship", "Air"],
+    "recyclability": ["Low", "High", "Medium", "Low", "High", "low"],
+    "origin": ["China", "Uk", "Germany", "China", "Uk", "Germany"],
+    "weight": [0.2, 0.5, 1.9, 2.0, 10.0, 55.0],
+}
+LABELS = ["C", "a+", "B", "C", "D", "A"]
+
+
+def legacy_row(encoders, material, weight, transport, recyclability, origin):
+    """The per-row safe_encode + bin_weight path app.py used before the pipeline."""
+    def safe_encode(value, encoder, default):
+        value = str(value or default).strip().title()
+        value = default if value.lower() == "unknown" else value
+        if value not in encoder.classes_:
+            value = default
+        return encoder.transform([value])[0]
+
+    bin_ = 0 if weight < 0.5 else 1 if weight < 2 else 2 if weight < 10 else 3
+    return [safe_encode(material, encoders["material"], "Other"), weight,
+            safe_encode(transport, encoders["transport"], "Land"),
+            safe_encode(recyclability, encoders["recyclability"], "Medium"),
+            safe_encode(origin, encoders["origin"], "Other"), bin_]
+
+
+def test_matches_label_encoder_serving_path():
+    encoders = {
+        "material": LabelEncoder().fit(["Glass", "Other", "Plastic"]),
+        "transport": LabelEncoder().fit(["Air", "Land", "Ship"]),
+        "recyclability": LabelEncoder().fit(["High", "Low", "Medium"]),
+        "origin": LabelEncoder().fit(["China", "Other", "Uk"]),
+    }
+    pipeline = FeaturePipeline.from_label_encoders(encoders, LabelEncoder().fit(["A", "B", "C"]))
+
+    expected = [legacy_row(encoders, *values) for values in
+                zip(ROWS["material"], ROWS["weight"], ROWS["transport"], ROWS["recyclability"], ROWS["origin"])]
+    assert np.array_equal(pipeline.transform(ROWS), np.array(expected, dtype=float))
+
+    records = [dict(zip(ROWS, values)) for values in zip(*ROWS.values())]
+    assert np.array_equal(pipeline.transform(records), pipeline.transform(ROWS))
+    assert pipeline.decode_labels(np.array([2, 0])) == ["C", "A"]
+
+
+def test_fit_builds_sorted_vocab_with_defaults():
+    pipeline = FeaturePipeline.fit(ROWS, LABELS)
+    assert pipeline.classes("material") == ["Glass", "Other", "Plastic", "Steel"]
+    assert pipeline.is_known("recyclability", "Medium")
+    assert not pipeline.is_known("origin", "Mars")
+    assert pipeline.labels == ["A", "A+", "B", "C", "D"]
+    assert list(pipeline.encode_labels(LABELS)) == [3, 1, 2, 3, 4, 0]
+    assert pipeline.columns == SERVING_COLUMNS
+
+
+def test_xgb_layout_weight_features_and_interactions():
+    pipeline = FeaturePipeline.fit(ROWS, LABELS, columns=XGB_COLUMNS)
+    X = pipeline.transform(ROWS)
+    assert X.shape == (6, len(XGB_COLUMNS))
+
+    columns = dict(zip(XGB_COLUMNS, X.T))
+    assert np.allclose(columns["weight_log"], np.log1p(ROWS["weight"]))
+    assert list(columns["weight_bin"]) == [0, 1, 1, 2, 3, 3]
+
+    material_transport = pipeline.classes("material_transport")
+    assert "Plastic_Ship" in material_transport
+    assert material_transport[int(columns["material_transport"][0])] == "Plastic_Ship"
+
+    unseen = pipeline.transform_one({"material": "Wood", "weight": 1, "transport": "Rail",
+                                     "recyclability": "Low", "origin": "China"})
+    row = pipeline.describe(unseen[0])
+    assert material_transport[row["material_transport"]] == "Other_Land"
+
+
+def test_round_trips_through_json(tmp_path):
+    pipeline = FeaturePipeline.fit(ROWS, LABELS, columns=XGB_COLUMNS)
+    path = pipeline.save(str(tmp_path / "pipeline.json"))
+    loaded = FeaturePipeline.load(path)
+    assert loaded.to_dict() == pipeline.to_dict()
+    assert np.array_equal(loaded.transform(ROWS), pipeline.transform(ROWS))
+
+
+def test_rejects_unknown_columns():
+    with pytest.raises(ValueError):
+        FeaturePipeline({"material": {"Other": 0}}, ["A"], columns=("material", "colour"))
@@ -0,0 +1,50 @@
+# test_geo.py
+
+import numpy as np
+import pytest
+
+from backend.utils.geo import DistanceTable, amazon_fulfillment_centers, haversine, origin_hubs, uk_hub
+
+
+@pytest.fixture(scope="module")
+def table():
+    return DistanceTable()
+
+
+def test_haversine_scalars_and_arrays():
+    london, paris = (51.5074, -0.1278), (48.8566, 2.3522)
+    assert haversine(*london, *paris) == pytest.approx(343.5, abs=1)
+    assert isinstance(haversine(*london, *paris), float)
+    assert haversine(np.float64(london[0]), london[1], *paris) == pytest.approx(haversine(*london, *paris))
+
+    lats, lons = np.array([london[0], paris[0], 0.0]), np.array([london[1], paris[1], 0.0])
+    row = haversine(lats, lons, *paris)
+    assert row.shape == (3,) and row[1] == 0
+    grid = haversine(lats[:, None], lons[:, None], lats, lons)
+    assert grid.shape == (3, 3) and np.allclose(grid, grid.T)
+
+
+def test_table_matches_per_pair_haversine(table):
+    for country, hub in origin_hubs.items():
+        for center, fc in amazon_fulfillment_centers.items():
+            assert table.distance(country, center) == pytest.approx(haversine(hub["lat"], hub["lon"], fc["lat"], fc["lon"]))
+    china = origin_hubs["China"]
+    assert round(table.distance("China"), 1) == round(haversine(china["lat"], china["lon"], uk_hub["lat"], uk_hub["lon"]), 1)
+
+
+def test_every_country_has_a_centroid_and_unknowns_fall_back_to_the_uk(table):
+    assert len(table.origins) >= 195
+    assert table.distance("Taiwan") > 9000 and table.distance("Brazil") > 8000
+    assert table.distance("united states") == table.distance("USA") == table.distance("America")
+    assert "Mars" not in table and "Taiwan" in table
+    assert table.distance("Mars") == table.distance(None) == table.distance("UK")
+    assert table.distance("China", "Atlantis") == table.distance("China", "UK")
+
+
+def test_distances_is_the_vectorized_lookup(table):
+    countries = ["China", "Taiwan", "Germany", "Unknown"] * 1000
+    centers = ["UK", "Germany", "France", "UK"] * 1000
+    assert np.array_equal(table.distances(countries), [table.distance(c) for c in countries])
+    assert np.array_equal(table.distances(countries, centers), [table.distance(c, f) for c, f in zip(countries, centers)])
+    to_user = table.distances_to(["China", "UK"], 51.5074, -0.1278)
+    assert to_user[1] == pytest.approx(haversine(*table.coords("UK"), 51.5074, -0.1278))
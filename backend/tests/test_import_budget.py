@@ -0,0 +1,57 @@
+# test_import_budget.py
+
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODULE = "backend.services.scraper.scrape_amazon_titles"
+HEAVY = ("selenium", "undetected_chromedriver", "fake_useragent", "webdriver_manager", "pandas", "lxml")
+BUDGET_MS = 250
+
+# Runs the import under an audit hook that records every file opened for writing,
+# every data file opened for reading and every directory created.
+PROBE = f"""
+import sys
+
+touched = []
+
+def hook(event, args):
+    if event == "open":
+        path, mode = str(args[0]), args[1] or "r"
+        if any(c in mode for c in "wax+") or path.endswith((".json", ".csv", ".txt", ".pkl")):
+            touched.append((event, path, mode))
+    elif event in ("os.mkdir", "os.remove", "os.rename"):
+        touched.append((event, str(args[0]), None))
+
+sys.addaudithook(hook)
+import {MODULE}
+print(repr(touched))
+"""
+
+
+def _run(*args):
+    return subprocess.run([sys.executable, *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=60)
+
+
+def test_import_skips_heavy_dependencies_and_is_fast():
+    proc = _run("-X", "importtime", "-c", f"import {MODULE}")
+    assert proc.returncode == 0, proc.stderr
+
+    lines = [line for line in proc.stderr.splitlines() if line.startswith("import time:")]
+    names = [line.split("|")[-1].strip() for line in lines]
+    loaded = {name.split(".")[0] for name in names}
+    assert not loaded & set(HEAVY)
+
+    cumulative_us = int(lines[-1].split("|")[1])
+    assert names[-1] == MODULE
+    assert cumulative_us / 1000 < BUDGET_MS
+
+
+def test_import_does_no_file_io_or_logging():
+    proc = _run("-c", PROBE)
+    assert proc.returncode == 0, proc.stderr
+
+    *logged, touched = proc.stdout.strip().splitlines()
+    assert touched == "[]"
+    assert logged == []
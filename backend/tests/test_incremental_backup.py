@@ -0,0 +1,57 @@
+# test_incremental_backup.py
+
+import pytest
+
+from backend.utils.incremental_backup import IncrementalBackup
+
+
+def catalog(n):
+    return [{"asin": f"A{i:03d}", "title": f"Product {i}", "v": 0} for i in range(n)]
+
+
+def test_base_then_small_deltas_restore_any_point(tmp_path):
+    backups = IncrementalBackup(str(tmp_path), base_every=3, keep_bases=5, keep_deltas=5)
+    history = [catalog(50), catalog(60), catalog(60), catalog(60)]
+    history[3][0]["v"] = 1  # one edit
+
+    kinds = [(p.kind if p else None) for p in (backups.backup(records) for records in history)]
+    assert kinds == ["base", "delta", None, "delta"]
+
+    points = backups.points()
+    assert [p.seq for p in points] == [1, 2, 3]
+    assert points[2].path.endswith(".json.gz")
+    assert len(backups._read(points[2])) == 1  # only the edited product
+
+    assert backups.restore(1) == {r["asin"]: r for r in history[0]}
+    assert backups.restore(2) == {r["asin"]: r for r in history[1]}
+    assert backups.restore() == {r["asin"]: r for r in history[3]}
+    with pytest.raises(ValueError):
+        backups.restore("19990101_000000")
+
+
+def test_new_base_after_base_every_and_retention(tmp_path):
+    backups = IncrementalBackup(str(tmp_path), base_every=3, keep_bases=1, keep_deltas=1)
+    for n in range(1, 9):
+        backups.backup(catalog(n * 10))
+
+    # seq 1 base + deltas 2-4, then a second base at 5 with deltas 6-8
+    points = backups.points()
+    assert [(p.seq, p.kind) for p in points] == [(5, "base"), (7, "delta"), (8, "delta")]  # 6 merged into 7
+    assert all(p.seq >= 5 for p in points)  # the first chain is gone
+    assert backups.restore() == {r["asin"]: r for r in catalog(80)}
+    with pytest.raises(ValueError):
+        backups.restore(4)
+
+    fresh = IncrementalBackup(str(tmp_path))  # picks up where the last process left off
+    assert fresh.backup(catalog(80)) is None
+
+
+def test_periodic_bases_with_default_retention(tmp_path):
+    backups = IncrementalBackup(str(tmp_path))
+    for n in range(1, 41):
+        backups.backup(catalog(n))
+
+    points = backups.points()
+    assert [p.seq for p in points if p.kind == "base"] == [14, 27, 40]  # every 12 deltas
+    assert backups.stats()["deltas"] <= 3 * (backups.keep_deltas + 1)
+    assert backups.restore() == {r["asin"]: r for r in catalog(40)}
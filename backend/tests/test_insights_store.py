@@ -0,0 +1,43 @@
+# test_insights_store.py
+
+from backend.utils.insights_store import InsightsStore
+
+HEADER = "title,material,weight,transport,recyclability,true_eco_score,co2_emissions,origin\n"
+
+
+def test_refresh_only_reads_appended_rows(tmp_path):
+    path = tmp_path / "eco_dataset.csv"
+    path.write_text(HEADER + "mug,Steel,1.5,Air,High,F,5.0,China\n"
+                    "bag,Cardboard,0.5,Land,Medium,B,1.0,UK\n", encoding="utf-8")
+    store = InsightsStore(str(path), sample_size=2, seed=0)
+    store.refresh()
+    assert store.cubes()["total_rows"] == 2
+
+    # A half-written line is left for the next refresh
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("lamp,Steel,2.5,Land,Medium,C,3.0,Chi")
+    store.refresh()
+    assert store.cubes()["total_rows"] == 2
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("na\nbroken,,1.0,Land,Medium,C,0.5,UK\n")
+    store.refresh()
+
+    cubes = store.cubes()
+    assert cubes["total_rows"] == 3  # row without a material is skipped
+    assert cubes["score_distribution"] == {"F": 1, "B": 1, "C": 1}
+    steel = cubes["by_material"][0]
+    assert steel["name"] == "Steel" and steel["count"] == 2
+    assert steel["co2_mean"] == 4.0 and steel["weight_mean"] == 2.0
+    assert [o["name"] for o in store.cubes(top=1)["by_origin"]] == ["China"]
+    assert len(cubes["sample"]) == 2
+
+
+def test_truncated_file_is_reloaded(tmp_path):
+    path = tmp_path / "eco_dataset.csv"
+    path.write_text(HEADER + "mug,Steel,1.5,Air,High,F,5.0,China\n" * 3, encoding="utf-8")
+    store = InsightsStore(str(path))
+    store.refresh()
+    path.write_text(HEADER + "bag,Cardboard,0.5,Land,Medium,B,1.0,UK\n", encoding="utf-8")
+    store.refresh()
+    assert store.cubes()["score_distribution"] == {"B": 1}
@@ -0,0 +1,96 @@
+# test_normalizer.py
+
+import pytest
+
+from backend.utils.normalizer import AhoCorasick, BrandMatcher, Normalizer, edit_distance, load_material_names
+
+
+@pytest.fixture(scope="module")
+def normalizer():
+    return Normalizer(load_material_names())
+
+
+def test_automaton_reports_overlapping_patterns():
+    automaton = AhoCorasick([("he", 1), ("she", 2), ("hers", 3), ("his", 4)])
+    hits = sorted(automaton.iter_matches("ushers"))
+    assert hits == [(1, 4, 2), (2, 4, 1), (2, 6, 3)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Stainless Steel 304", "Steel"),
+    ("thermoplastic housing", "Plastic"),
+    ("Aluminium", "Aluminum"),
+    ("Faux leather", "Faux Leather"),
+    ("100% Cotton", "Cotton"),
+    ("plastik", "Plastic"),
+    ("Alumnium foil", "Aluminum"),
+    ("Other", None),
+    ("", None),
+])
+def test_materials(normalizer, text, expected):
+    assert normalizer.material(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("United Kingdom", "UK"),
+    ("Made in the USA", "USA"),
+    ("Russia", "Russia"),
+    ("Ukraine", None),
+    ("Gemany", "Germany"),
+    ("prc", "China"),
+])
+def test_origins(normalizer, text, expected):
+    assert normalizer.origin(text) == expected
+
+
+@pytest.mark.parametrize("text", ["Austria", "Made in Austria", "Belgium", "Slovenia", "Slovakia", "Iran", "Malta",
+                                  "Nigeria", "Sudan"])
+def test_near_miss_countries_are_not_fuzzy_matched(normalizer, text):
+    # Shares most trigrams with a known origin ("Australia", "Canada", ...) but is a different country
+    assert normalizer.origin(text) is None
+
+
+def test_edit_distance_gives_up_past_the_limit():
+    assert edit_distance("gemany", "germany", 1) == 1
+    assert edit_distance("austria", "australia", 1) is None
+    assert edit_distance("austria", "australia", 2) == 2
+
+
+def test_origin_from_text_needs_a_phrase(normalizer):
+    assert normalizer.origin_from_text("Country of Origin: China") == "China"
+    assert normalizer.origin_from_text("This kettle is made in Japan.") == "Japan"
+    assert normalizer.origin_from_text("Ships from Germany") is None
+
+
+def test_batch_normalizes_each_distinct_value_once(normalizer):
+    before = normalizer.material.cache_info()
+    column = ["Glass jar", None, "glass jar", "Glass jar", 3.5, "mystery"]
+    assert normalizer.materials(column) == ["Glass", None, "Glass", "Glass", 3.5, "mystery"]
+    assert normalizer.materials(column, keep_unmatched=False) == ["Glass", None, "Glass", "Glass", None, None]
+    assert normalizer.material.cache_info().misses - before.misses == 3
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Sponsored Ad - Anker PowerCore 10000", "anker"),
+    ("The North Face Men's Jacket", "the north face"),
+    ("Hydro flask for HP laptops", "hp"),
+    ("Savmore HPX charger", None),
+    ("", None),
+])
+def test_brand_matcher_prefers_longest_whole_word(text, expected):
+    matcher = BrandMatcher(["anker", "north", "the north face", "hp", "avm", "Anker "])
+    assert len(matcher) == 5
+    assert matcher.find(text) == expected
+
+
+def test_scraper_rebuilds_brand_matcher_when_sources_change(monkeypatch):
+    import backend.services.scraper.scrape_amazon_titles as scraper
+
+    monkeypatch.setattr(scraper, "_data_loaded", True)
+    monkeypatch.setattr(scraper, "brand_origin_lookup", {})
+    first = scraper.get_brand_matcher()
+    assert scraper.get_brand_matcher() is first
+    assert first.find("Zyxwv kettle") is None
+
+    scraper.brand_origin_lookup["zyxwv"] = {"country": "UK", "city": "London"}
+    assert scraper.get_brand_matcher().find("Zyxwv kettle") == "zyxwv"
@@ -0,0 +1,106 @@
+# test_page_fetcher.py
+
+from backend.services.scraper.page_fetcher import PageFetcher, missing_fields
+from backend.services.scraper.page_parser import is_blocked
+
+PRODUCT = '<html><span id="productTitle">Mug</span></html>'
+CAPTCHA = "<html>Enter the characters you see below. Robot Check</html>"
+
+
+class FakeBackend:
+    def __init__(self, name, pages):
+        self.name = name
+        self.pages = list(pages)
+        self.calls = 0
+
+    def fetch(self, url):
+        self.calls += 1
+        page = self.pages.pop(0) if len(self.pages) > 1 else self.pages[0]
+        if isinstance(page, Exception):
+            raise page
+        return 200, page
+
+
+def test_block_and_field_checks():
+    assert is_blocked(PRODUCT, 503)
+    assert is_blocked(CAPTCHA, 200)
+    assert not is_blocked(PRODUCT, 200)
+    # Only the top of the page counts: a product page's scripts may mention a captcha
+    assert not is_blocked(PRODUCT + " " * 20000 + "<script>captchaConfig</script>")
+    assert missing_fields(PRODUCT, ["productTitle", "bylineInfo"]) == ["bylineInfo"]
+
+
+def test_escalates_only_when_needed():
+    http = FakeBackend("http", [PRODUCT, CAPTCHA, "<html></html>", IOError("reset")])
+    browser = FakeBackend("browser", [PRODUCT])
+    fetcher = PageFetcher([http, browser])
+
+    assert fetcher.fetch("u").backend == "http"
+    for expected in ("blocked", "incomplete", "error"):
+        result = fetcher.fetch("u")
+        assert result.backend == "browser"
+        assert result.attempts == [("http", expected), ("browser", "ok")]
+
+    stats = fetcher.stats()
+    assert stats["escalations"] == 3 and stats["browser_pages_saved"] == 1
+    assert stats["backends"]["http"]["blocked"] == 1
+
+
+def test_browser_tier_can_be_left_out():
+    http = FakeBackend("http", [CAPTCHA])
+    browser = FakeBackend("browser", [PRODUCT])
+    fetcher = PageFetcher([http, browser])
+
+    result = fetcher.fetch("u", browser=False)
+    assert not result.ok and result.attempts == [("http", "blocked")]
+    assert browser.calls == 0 and fetcher.stats()["escalations"] == 0
+
+
+def test_failing_tier_is_skipped_then_probed():
+    http = FakeBackend("http", [CAPTCHA])
+    browser = FakeBackend("browser", [PRODUCT])
+    fetcher = PageFetcher([http, browser], min_success=0.5, probe_every=10)
+
+    for _ in range(9):
+        fetcher.fetch("u")
+    # Recent HTTP success fell below 0.5 after a handful of blocks, so later fetches skip it
+    assert http.calls < 9
+    skipped_calls = http.calls
+    fetcher.fetch("u")  # 10th fetch is a probe from the cheapest tier
+    assert http.calls == skipped_calls + 1
+    assert browser.calls == 10
+
+
+def test_gives_up_when_every_tier_fails():
+    fetcher = PageFetcher([FakeBackend("http", [CAPTCHA]), FakeBackend("browser", [CAPTCHA])])
+    result = fetcher.fetch("u")
+    assert not result.ok and fetcher.stats()["failures"] == 1
+
+
+def test_product_scrape_uses_http_snapshot_without_the_browser_pool(monkeypatch):
+    from backend.services.scraper import page_fetcher, scrape_amazon_titles
+
+    def no_pool():
+        raise AssertionError("browser pool checked out for a page HTTP could fetch")
+
+    http = FakeBackend("http", [PRODUCT])
+    fetcher = PageFetcher([http, FakeBackend("browser", [CAPTCHA])])
+    monkeypatch.setattr(page_fetcher, "get_page_fetcher", lambda: fetcher)
+    monkeypatch.setattr(scrape_amazon_titles, "get_browser_pool", no_pool)
+    monkeypatch.setattr(scrape_amazon_titles, "build_product_from_html", lambda url, html: {"url": url, "html": html})
+
+    product = scrape_amazon_titles.scrape_amazon_product_page("https://www.amazon.co.uk/dp/B000000001")
+    assert product["html"] == PRODUCT and http.calls == 1
+
+
+def test_product_scrape_falls_back_to_the_browser_when_the_snapshot_does_not_parse(monkeypatch):
+    from backend.services.scraper import page_fetcher, scrape_amazon_titles
+
+    fetcher = PageFetcher([FakeBackend("http", [PRODUCT])])
+    monkeypatch.setattr(page_fetcher, "get_page_fetcher", lambda: fetcher)
+    monkeypatch.setattr(scrape_amazon_titles, "fetch_product_html", lambda url: "<browser page>")
+    monkeypatch.setattr(scrape_amazon_titles, "build_product_from_html",
+                        lambda url, html: {"html": html} if html == "<browser page>" else None)
+
+    product = scrape_amazon_titles.scrape_amazon_product_page("https://www.amazon.co.uk/dp/B000000001")
+    assert product == {"html": "<browser page>"}
@@ -0,0 +1,52 @@
+# test_page_parser.py
+
+from backend.services.scraper.page_parser import parse_product_page, is_blocked
+
+PAGE = """
+<html><head>
+<script type="application/ld+json">{"@type": "Product", "name": "Steel Mug"}</script>
+<script type="a-state" data-a-state='{"key": "twister"}'>{"asin": "B000000001"}</script>
+</head><body>
+<input type="hidden" id="ASIN" value="B000000001">
+<div id="title"><span id="productTitle">  Steel   Mug 350ml </span></div>
+<a id="bylineInfo">Visit the Acme Store</a>
+<div id="feature-bullets"><ul><li>Made in Germany</li><li>Dishwasher safe</li></ul></div>
+<div id="detailBullets_feature_div"><ul>
+  <li><span>Item weight : 350 g</span></li>
+  <li><span>Country of origin : Germany</span></li>
+</ul></div>
+<table class="a-keyvalue prodDetTable"><tr><th>Material</th><td>Stainless Steel</td></tr></table>
+<table id="productDetails_techSpec_section_1"><tr><td>Product Dimensions</td><td>10 x 8 x 9 cm</td></tr></table>
+<div id="productDescription"><p>A sturdy mug.</p><style>.x{}</style></div>
+<div id="merchant-info">Ships from and sold by Acme UK.</div>
+<div>Dispatches from <span>United Kingdom</span></div>
+</body></html>
+"""
+
+
+def test_extracts_everything_in_one_pass():
+    record = parse_product_page(PAGE)
+    assert record["title"] == "Steel Mug 350ml"
+    assert record["byline"] == "Visit the Acme Store"
+    assert record["asin"] == "B000000001"
+    assert record["bullets"] == ["Item weight : 350 g", "Country of origin : Germany"]
+    assert record["feature_bullets"] == ["Made in Germany", "Dishwasher safe"]
+    assert record["specs"] == {"material": "Stainless Steel"}
+    assert record["tech_spec_cells"] == ["Product Dimensions", "10 x 8 x 9 cm"]
+    assert record["description"] == "A sturdy mug."
+    assert record["json_ld"] == [{"@type": "Product", "name": "Steel Mug"}]
+    assert record["data_blobs"] == {"twister": {"asin": "B000000001"}}
+    assert "Dispatches from United Kingdom" in record["shipping_texts"]
+    assert record["text_blobs"][0] == "item weight : 350 g"
+    assert record["text_blobs"][-1] == "a sturdy mug."
+    assert not record["blocked"]
+
+
+def test_title_fallbacks_and_bot_check():
+    record = parse_product_page('<h1 class="a-size-large"><span>Fallback title</span></h1>')
+    assert record["title"] == "Fallback title"
+    assert record["bullets"] == [] and record["byline"] is None
+
+    assert is_blocked("<title>Robot Check</title>")
+    assert parse_product_page("<p>Type the characters for the CAPTCHA</p>")["blocked"]
+    assert parse_product_page("")["title"] is None
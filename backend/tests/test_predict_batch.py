@@ -0,0 +1,57 @@
+# test_predict_batch.py
+
+import json
+import os
+
+import pytest
+
+MODEL_PATH = os.path.join("ml_model", "eco_model.pkl")
+
+pytestmark = pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="eco_model.pkl has not been trained")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from backend import app as app_module
+    monkeypatch.chdir(tmp_path)  # keep submitted_predictions.json out of the repo
+    return app_module.app.test_client()
+
+
+def single(client, product):
+    return client.post("/predict", json=product).get_json()
+
+
+def test_batch_matches_single_predictions(client):
+    products = [
+        {"material": "Plastic", "weight": 1.2, "transport": "Ship", "recyclability": "Low", "origin": "China"},
+        {"material": "glass", "weight": 0.3, "transport": "Air", "recyclability": "High", "origin": "Uk"},
+        {"material": "Nonexistent", "weight": 12, "transport": "Land", "recyclability": "Medium", "origin": "Mars"},
+    ]
+    res = client.post("/predict/batch", json=products).get_json()
+
+    assert res["count"] == 3 and res["failed"] == 0
+    for product, row in zip(products, res["results"]):
+        expected = single(client, product)
+        assert row["predicted_label"] == expected["predicted_label"]
+        assert row["confidence"] == expected["confidence"]
+        assert row["encoded_input"] == expected["encoded_input"]
+
+
+def test_ndjson_with_bad_rows(client):
+    body = "\n".join([
+        json.dumps({"material": "Steel", "weight": 2.5, "transport": "Land"}),
+        "{not json",
+        json.dumps({"material": "Paper", "weight": "heavy"}),
+        json.dumps(["not", "an", "object"]),
+    ])
+    res = client.post("/predict/batch", data=body, content_type="application/x-ndjson").get_json()
+
+    assert [r["index"] for r in res["results"]] == [0]
+    assert [e["index"] for e in res["errors"]] == [1, 2, 3]
+
+
+def test_batch_size_limit(client, monkeypatch):
+    from backend import app as app_module
+    monkeypatch.setattr(app_module, "MAX_BATCH_SIZE", 2)
+    res = client.post("/predict/batch", json=[{"weight": 1}] * 3)
+    assert res.status_code == 413
@@ -0,0 +1,72 @@
+# test_product_catalog.py
+
+import json
+
+import pytest
+
+from backend.services.scraper.product_catalog import ProductCatalog
+
+
+def product(asin, **fields):
+    return {"asin": asin, "title": f"Product {asin}", "brand": "Anker", "brand_estimated_origin": "China",
+            "estimated_weight_kg": 0.4, "dimensions_cm": [10, 5, 2], **fields}
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return ProductCatalog(str(tmp_path / "catalog.db"))
+
+
+def test_lookups_and_batched_upserts(catalog):
+    assert catalog.upsert_many([product("A1", confidence="High"), product("A2"), {"title": "no asin"}]) == 2
+    assert "A1" in catalog and "ZZ" not in catalog and len(catalog) == 2
+    assert catalog["A2"]["title"] == "Product A2"
+    with pytest.raises(KeyError):
+        catalog["ZZ"]
+
+    catalog.upsert(product("A2", brand_estimated_origin="Germany"))
+    assert catalog.get("A2")["brand_estimated_origin"] == "Germany"
+    assert [p["asin"] for p in catalog.find(brand="anker", origin="China")] == ["A1"]
+    assert [p["asin"] for p in catalog.find(confidence="High")] == ["A1"]
+    assert set(catalog.get_many(["A1", "A2", "ZZ"])) == {"A1", "A2"}
+
+    assert catalog.insert_new([product("A2"), product("A3")]) == ["A3"]
+    assert catalog.get("A2")["brand_estimated_origin"] == "Germany"  # insert_new never overwrites
+
+
+def test_migrates_legacy_json_once_and_exports_it_back(catalog, tmp_path):
+    legacy = {"_comment": "High-confidence product data.", "B1": product("B1"), "B2": {"title": "keyed only"}}
+    path = tmp_path / "priority_products.json"
+    path.write_text(json.dumps(legacy))
+
+    assert catalog.migrate_json(str(path)) == 2
+    assert catalog.get("B2") == {"title": "keyed only", "asin": "B2"}
+    catalog.upsert(product("B1", title="Edited"))
+    assert catalog.migrate_json(str(path)) == 0  # already migrated: the edit survives
+    assert catalog["B1"]["title"] == "Edited"
+
+    out = tmp_path / "export.json"
+    assert catalog.export_json(str(out)) == 2
+    exported = json.loads(out.read_text())
+    assert exported == {"_comment": "High-confidence product data.", "B1": catalog["B1"], "B2": catalog["B2"]}
+    assert out.read_text() == json.dumps(exported, indent=2, ensure_ascii=False) + "\n"
+
+
+def test_add_to_priority_only_takes_new_high_confidence_products(catalog):
+    from backend.services.scraper.scrape_amazon_titles import add_to_priority, maybe_add_to_priority
+
+    low = product("C2", dimensions_cm=None)
+    assert add_to_priority([product("C1"), low, product("C1")], catalog) == ["C1"]
+    assert catalog["C1"]["confidence"] == "High" and "C2" not in catalog
+    assert not maybe_add_to_priority(product("C1"), catalog)
+    assert maybe_add_to_priority(product("C3"), catalog)
+
+
+def test_rescore_distances_in_batches(catalog):
+    catalog.upsert_many([product("A1", distance_origin_to_uk=9187.5), product("A2", brand_estimated_origin="Taiwan"),
+                         product("A3", brand_estimated_origin="Mars", distance_origin_to_uk=1.0)])
+    assert catalog.rescore_distances(batch=2) == 2
+    assert catalog["A1"]["distance_origin_to_uk"] == 9187.5
+    assert catalog["A2"]["distance_origin_to_uk"] > 9000  # centroid, not the UK fallback
+    assert catalog["A3"]["distance_origin_to_uk"] == 49.3  # unknown origin ships from London
+    assert catalog.rescore_distances() == 0
@@ -0,0 +1,108 @@
+# test_scrape_cache.py
+
+import json
+
+from backend.services.scraper.scrape_cache import ScrapeCache
+
+URL = "https://www.amazon.co.uk/dp/B09KT1NR6V?th=1"
+
+
+def test_hit_miss_and_shared_disk_tier(tmp_path):
+    db = str(tmp_path / "cache.db")
+    calls = []
+
+    def scrape(url):
+        calls.append(url)
+        return {"title": "Charger"}
+
+    cache = ScrapeCache(db_path=db, max_entries=2)
+    assert cache.get_or_scrape(URL, scrape) == {"title": "Charger"}
+    assert cache.get_or_scrape(URL, scrape) == {"title": "Charger"}
+    assert len(calls) == 1
+
+    # Another worker process sees the same SQLite file
+    other = ScrapeCache(db_path=db)
+    assert other.get_or_scrape(URL, scrape) == {"title": "Charger"}
+    assert len(calls) == 1
+    assert other.metrics()["disk_hits"] == 1
+
+    stats = cache.metrics()
+    assert stats["memory_hits"] == 1 and stats["misses"] == 1
+
+
+def test_failures_are_cached_with_short_ttl(tmp_path):
+    calls = []
+
+    def blocked(url):
+        calls.append(url)
+        return None
+
+    cache = ScrapeCache(db_path=str(tmp_path / "cache.db"), negative_ttl=60)
+    assert cache.get_or_scrape(URL, blocked) is None
+    assert cache.get_or_scrape(URL, blocked) is None
+    assert len(calls) == 1
+    assert cache.metrics()["negative_hits"] == 1
+
+    expired = ScrapeCache(db_path=str(tmp_path / "expired.db"), negative_ttl=-1)
+    expired.get_or_scrape(URL, blocked)
+    expired.get_or_scrape(URL, blocked)
+    assert len(calls) == 3
+
+
+def test_lru_bound_and_warm(tmp_path):
+    priority = tmp_path / "priority_products.json"
+    priority.write_text(json.dumps({
+        "_comment": "ignored",
+        "B000000001": {"title": "one"},
+        "B000000002": {"title": "two"},
+        "B000000003": {"title": "three"},
+    }), encoding="utf-8")
+
+    cache = ScrapeCache(db_path=str(tmp_path / "cache.db"), max_entries=2)
+    assert cache.warm(str(priority)) == 3
+    assert cache.metrics()["memory_entries"] == 2
+    assert cache.lookup("B000000001") == (True, {"title": "one"})  # served from disk
+    assert cache.metrics()["disk_entries"] == 3
+
+
+def test_concurrent_misses_share_one_scrape(tmp_path):
+    import threading
+    import time
+
+    db = str(tmp_path / "cache.db")
+    calls = []
+
+    def slow_scrape(url):
+        calls.append(url)
+        time.sleep(0.3)
+        return {"title": "Charger"}
+
+    # Two caches on one file stand in for two worker processes
+    workers = [ScrapeCache(db_path=db, poll_interval=0.02), ScrapeCache(db_path=db, poll_interval=0.02)]
+    results = []
+    threads = [threading.Thread(target=lambda c=c: results.append(c.get_or_scrape(URL, slow_scrape)))
+               for c in workers for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"title": "Charger"}] * 8
+    assert sum(c.metrics()["coalesced"] for c in workers) >= 6
+
+
+def test_waiters_give_up_after_timeout(tmp_path):
+    import threading
+
+    release = threading.Event()
+    cache = ScrapeCache(db_path=str(tmp_path / "cache.db"))
+    leader = threading.Thread(target=lambda: cache.get_or_scrape(URL, lambda url: release.wait(5) and {"title": "x"}))
+    leader.start()
+    while not cache._inflight:
+        pass
+
+    assert cache.get_or_scrape(URL, lambda url: {"title": "other"}, timeout=0.1) is None
+    assert cache.metrics()["wait_timeouts"] == 1
+    release.set()
+    leader.join()
@@ -0,0 +1,121 @@
+# test_seen_set.py
+
+import os
+import weakref
+
+import pytest
+
+from backend.services.scraper.crawler import Frontier
+from backend.utils.seen_set import AsinSet, BloomFilter, pack_asin, unpack_asin
+
+
+def test_pack_asin_round_trip():
+    assert unpack_asin(pack_asin("B08N5WRWNW")) == "B08N5WRWNW"
+    assert pack_asin("b08n5wrwnw") == pack_asin("B08N5WRWNW")
+    assert pack_asin("not an asin") is None
+    assert pack_asin("ZZZZZZZZZZ") < 2 ** 52
+
+
+def test_asin_set_merges_and_survives_restart(tmp_path):
+    path = str(tmp_path / "asins.u64")
+    seen = AsinSet(path, merge_every=3)
+    assert seen.add_many(["B000000001", "B000000002", "B000000001", "odd-key"]) == ["B000000001", "B000000002",
+                                                                                     "odd-key"]
+    assert seen.add("B000000003") is True  # third packed ASIN triggers a merge
+    assert seen.stats()["base"] == 3 and seen.stats()["delta"] == 0
+    assert seen.add("B000000004") is True
+    assert seen.add("B000000002") is False
+    seen.close()
+
+    reopened = AsinSet(path, merge_every=3)
+    assert len(reopened) == 5
+    assert all(asin in reopened for asin in ["B000000001", "B000000004", "odd-key"])
+    assert "B000000009" not in reopened
+    assert reopened.stats()["delta"] == 1  # replayed from the delta log
+
+
+def test_merge_releases_the_old_mapping_before_replacing_the_file(tmp_path, monkeypatch):
+    seen = AsinSet(str(tmp_path / "asins.u64"), merge_every=2)
+    seen.add_many(["B000000001", "B000000002"])  # first merge: the base is now memory-mapped
+    old_base = weakref.ref(seen._base)
+    replace = os.replace
+
+    def checked_replace(src, dst):
+        assert old_base() is None  # Windows refuses to replace a file that is still mapped
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", checked_replace)
+    seen.add_many(["B000000003", "B000000004"])
+    assert len(seen) == 4 and "B000000001" in seen and seen.stats()["delta"] == 0
+
+
+def test_asin_set_ignores_torn_delta_entry(tmp_path):
+    path = str(tmp_path / "asins.u64")
+    seen = AsinSet(path)
+    seen.add("B000000001")
+    seen.close()
+    with open(path + ".delta", "ab") as f:
+        f.write(b"\x01\x02\x03")  # half-written entry
+    assert len(AsinSet(path)) == 1
+
+
+def test_bloom_filter_false_positive_rate(tmp_path):
+    path = str(tmp_path / "urls.bloom")
+    bloom = BloomFilter(path, capacity=5000, error_rate=0.01)
+    urls = [f"https://www.amazon.co.uk/s?k=term{i}&page=1" for i in range(5000)]
+    assert all(bloom.add(url) for url in urls[:10])
+    for url in urls[10:]:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+
+    false_positives = sum(f"https://example.com/other/{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    assert 0.005 < bloom.false_positive_rate() < 0.015
+    bloom.close()
+
+    reopened = BloomFilter(path)
+    assert len(reopened) == bloom.count and urls[42] in reopened
+
+
+def test_frontier_prunes_done_urls_without_reseeding_them(tmp_path):
+    frontier = Frontier(str(tmp_path / "frontier.db"), seen=BloomFilter(str(tmp_path / "urls.bloom"), 1000))
+    assert frontier.seed([("http://x/1", "t", 1)]) == 1
+    frontier.complete(frontier.claim("1:0:a"), 10)
+    assert frontier.prune(older_than=-1) == 1
+    assert frontier.seed([("http://x/1", "t", 1), ("http://x/2", "t", 2)]) == 1
+    assert frontier.counts()["pending"] == 1
+
+
+class FlakyBulkStore:
+    def __init__(self):
+        self.records = []
+        self.fail_next = True
+
+    def iter_records(self):
+        return iter(self.records)
+
+    def append_many(self, records):
+        if self.fail_next:
+            self.fail_next = False
+            raise OSError("disk full")
+        self.records.extend(records)
+
+
+def test_bulk_sink_marks_asins_seen_only_after_the_append(tmp_path, monkeypatch):
+    from backend.services.ml_interface import bulk_scrape_scheduler as scheduler
+
+    monkeypatch.setattr(scheduler, "add_to_priority", lambda products, catalog: [])
+    monkeypatch.setattr(scheduler, "log", lambda message: None)
+    store = FlakyBulkStore()
+    sink = scheduler.BulkSink(store, None, backups=str(tmp_path / "backups"), seen=str(tmp_path / "seen"))
+    page = [{"asin": "B000000001"}, {"asin": "B000000002"}, {"asin": "B000000001"}]
+
+    with pytest.raises(OSError):
+        sink("http://x/1", page)
+    assert "B000000001" not in sink.existing_asins
+
+    sink("http://x/1", page)  # the crawler's retry of the same page
+    assert [r["asin"] for r in store.records] == ["B000000001", "B000000002"]
+    assert "B000000001" in sink.existing_asins
+    sink("http://x/2", page)
+    assert len(store.records) == 2
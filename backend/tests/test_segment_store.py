@@ -0,0 +1,55 @@
+# test_segment_store.py
+
+import json
+import os
+
+from backend.utils.segment_store import SegmentStore
+
+
+def test_rotation_and_last_write_wins(tmp_path):
+    store = SegmentStore(str(tmp_path), max_segment_bytes=200, settle_seconds=0)
+    for version in range(3):
+        store.append_many([{"asin": f"B{i:03d}", "version": version} for i in range(10)])
+    store.append({"title": "no asin"})
+
+    assert len(store.segment_numbers()) > 3
+    records = list(store.iter_records())
+    assert len(records) == 11
+    assert all(r["version"] == 2 for r in records if "asin" in r)
+    assert store.get("B004") == {"asin": "B004", "version": 2}
+
+    dropped = store.compact()
+    assert dropped == 20
+    assert len(store.segment_numbers()) == 2  # merged segment + the active one
+    assert list(store.iter_records()) == records
+
+    store.append({"asin": "B004", "version": 3})
+    assert store.get("B004")["version"] == 3
+    store.close()
+
+
+def test_torn_line_is_skipped_and_later_appends_are_not_seen(tmp_path):
+    SegmentStore(str(tmp_path)).append({"asin": "A1"})
+    with open(tmp_path / "segment-000001.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"asin": "A2", "tit')  # process died mid-write
+
+    store = SegmentStore(str(tmp_path))
+    records = store.iter_records()
+    assert next(records) == {"asin": "A1"}
+    store.append({"asin": "A3"})  # lands after the reader's snapshot, on a fresh line
+    assert list(records) == []
+    assert [r["asin"] for r in store.iter_records()] == ["A1", "A3"]
+    store.close()
+
+
+def test_import_and_export_json(tmp_path):
+    legacy = tmp_path / "cleaned_products.json"
+    legacy.write_text(json.dumps([{"asin": "X", "n": 1}, {"asin": "X", "n": 2}, {"asin": "Y", "n": 1}]))
+    store = SegmentStore(str(tmp_path / "segments"))
+    assert store.import_json(str(legacy)) == 3
+
+    out = tmp_path / "export.json"
+    assert store.export_json(str(out)) == 2
+    assert json.loads(out.read_text()) == [{"asin": "X", "n": 2}, {"asin": "Y", "n": 1}]
+    assert not os.path.exists(str(out) + ".tmp")
+    store.close()
@@ -0,0 +1,98 @@
+# test_serving_bundle.py
+
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from backend.services.ml_interface.compiled_forest import CompiledForest
+from backend.services.ml_interface.serving_bundle import ServingBundle, build_bundle, is_stale
+
+CLASSES = {
+    "material": ["Glass", "Other", "Plastic", "Steel"],
+    "transport": ["Air", "Land", "Ship"],
+    "recycle": ["High", "Low", "Medium"],
+    "label": ["A", "A+", "B", "C", "D"],
+    "origin": ["China", "Other", "Uk"],
+}
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    rng = np.random.default_rng(3)
+    n = 400
+    weight = np.round(rng.uniform(0.1, 14, size=n), 2)
+    X = np.column_stack([
+        rng.integers(0, 4, n), weight, rng.integers(0, 3, n),
+        rng.integers(0, 3, n), rng.integers(0, 3, n), np.digitize(weight, [0.5, 2, 10]),
+    ]).astype(float)
+    model = RandomForestClassifier(n_estimators=8, random_state=0).fit(X, rng.integers(0, 5, size=n))
+
+    os.makedirs(tmp_path / "encoders")
+    joblib.dump(model, tmp_path / "eco_model.pkl")
+    for name, classes in CLASSES.items():
+        joblib.dump(LabelEncoder().fit(classes), tmp_path / "encoders" / f"{name}_encoder.pkl")
+    (tmp_path / "defra_material_intensity.csv").write_text("material,co2_per_kg\nGlass,1.2\nPlastic,3.5\n")
+    return tmp_path, model, X
+
+
+def test_bundle_round_trip(model_dir, tmp_path):
+    directory, model, X = model_dir
+    path = str(tmp_path / "bundle.bin")
+    build_bundle(path, model_dir=str(directory), data_dir=str(tmp_path / "missing"))
+
+    bundle = ServingBundle.open(path)
+    assert bundle.mapped
+    assert all(arr.ctypes.data % 64 == 0 for arr in bundle.arrays.values())
+    assert not bundle.forest.threshold.flags.writeable  # served straight from the mapping
+
+    expected = CompiledForest.from_sklearn(model).predict_proba(X)
+    assert np.array_equal(bundle.forest.predict_proba(X), expected)
+    assert np.allclose(bundle.feature_importances_, model.feature_importances_)
+
+    pipeline = bundle.pipeline
+    assert pipeline.classes("material") == CLASSES["material"]
+    assert pipeline.labels == CLASSES["label"]
+    row = pipeline.describe(pipeline.transform_one({"material": "plastic", "weight": 3, "transport": "Ship",
+                                                    "recyclability": "Low", "origin": "Wood"})[0])
+    assert row == {"material": 2, "weight": 3.0, "transport": 2, "recyclability": 1, "origin": 1, "weight_bin": 2}
+
+    assert bundle.material_co2 == {"Glass": 1.2, "Plastic": 3.5}
+    assert bundle.brand_origins == {}
+    assert "China" in bundle.origin_hubs
+
+
+def test_bundle_goes_stale_when_the_model_changes(model_dir, tmp_path):
+    directory, model, _ = model_dir
+    path = str(tmp_path / "bundle.bin")
+    build_bundle(path, model_dir=str(directory), data_dir=str(tmp_path))
+    bundle = ServingBundle.open(path)
+    assert not is_stale(bundle, str(directory), str(tmp_path))
+
+    joblib.dump(model, directory / "eco_model.pkl", compress=3)
+    assert is_stale(bundle, str(directory), str(tmp_path))
+
+
+def test_bundle_goes_stale_when_brand_origins_change(model_dir, tmp_path):
+    directory, _, _ = model_dir
+    path = str(tmp_path / "bundle.bin")
+    build_bundle(path, model_dir=str(directory), data_dir=str(tmp_path))
+    bundle = ServingBundle.open(path)
+    assert not is_stale(bundle, str(directory), str(tmp_path))
+
+    (tmp_path / "brand_origins.csv").write_text("brand,hq_country,hq_city\nacme,Germany,Berlin\n")
+    assert is_stale(bundle, str(directory), str(tmp_path))
+    build_bundle(path, model_dir=str(directory), data_dir=str(tmp_path))
+    rebuilt = ServingBundle.open(path)
+    assert rebuilt.brand_origins == {"acme": {"country": "Germany", "city": "Berlin"}}
+    assert not is_stale(rebuilt, str(directory), str(tmp_path))
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_bundle.bin"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        ServingBundle.open(str(path))
@@ -0,0 +1,52 @@
+# test_write_behind.py
+
+import csv
+import threading
+
+from backend.utils.write_behind import WriteBehindWriter, read_jsonl
+
+
+def test_group_commit_and_flush(tmp_path):
+    writer = WriteBehindWriter(flush_interval=0.05).start()
+    jsonl = tmp_path / "log.jsonl"
+    table = tmp_path / "rows.csv"
+
+    threads = [
+        threading.Thread(target=lambda n=n: [writer.write_json(jsonl, {"t": n, "i": i}) for i in range(50)])
+        for n in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.write_csv(table, ["Mug, large", "Steel", "0.50"])
+
+    assert writer.flush(timeout=5)
+    assert len(read_jsonl(jsonl)) == 200
+    assert list(csv.reader(open(table, encoding="utf-8"))) == [["Mug, large", "Steel", "0.50"]]
+
+    stats = writer.metrics()
+    assert stats["written"] == 201 and stats["batches"] < 201
+    writer.close()
+
+
+def test_full_queue_falls_back_to_sync_write(tmp_path):
+    writer = WriteBehindWriter(max_queue=1, put_timeout=0.01)
+    writer._thread = threading.Thread()  # pretend started, but nothing drains the queue
+    writer._thread.start()
+    path = tmp_path / "log.jsonl"
+
+    writer.write_json(path, {"i": 0})  # fills the queue
+    writer.write_json(path, {"i": 1})  # no room: written synchronously
+
+    assert read_jsonl(path) == [{"i": 1}]
+    assert writer.metrics()["sync_fallbacks"] == 1
+
+
+def test_close_drains_queue(tmp_path):
+    writer = WriteBehindWriter(flush_interval=10).start()
+    path = tmp_path / "log.jsonl"
+    for i in range(10):
+        writer.write_json(path, {"i": i})
+    writer.close()
+    assert len(read_jsonl(path)) == 10
@@ -0,0 +1,182 @@
+# brand_store.py
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on `path` across processes: flock on POSIX, msvcrt byte lock on Windows."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class BrandStore(Mapping):
+    """
+    brand_locations.json as a dict-like store that request threads can share.
+
+    Readers get the current snapshot, an immutable-by-convention dict that is
+    swapped whole on every change (copy-on-write), so a read never takes a
+    lock or sees a half-applied update. Writers are serialized by one lock and
+    only mark the store dirty; a background thread coalesces everything
+    written within `flush_interval` seconds into one temp file + os.replace,
+    and close() (registered at exit) writes whatever is still pending.
+
+    Several processes (pre-fork workers) can share the file: a flush takes a
+    lock on `<path>.lock`, re-reads the file and writes it back with only
+    this process's own updates applied, so brands another worker saved in
+    the meantime are kept (and show up in this process's snapshot too).
+    """
+
+    def __init__(self, path, flush_interval=2.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._data = {}
+        self._write_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._pending = {}  # updates made since the last flush, key -> value
+        self._thread = None
+        self._stopped = False
+        self._stats = {"updates": 0, "flushes": 0, "errors": 0, "last_flush_ms": 0.0}
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return dict(json.load(f))
+        except FileNotFoundError:
+            return {}
+
+    def load(self):
+        """Replaces the snapshot with the file's contents (a missing file means no brands yet)."""
+        data = self._read()
+        with self._write_lock:
+            data.update(self._pending)
+            self._data = data
+        return self
+
+    # === Reads (lock-free) ===
+    def snapshot(self):
+        return self._data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    # === Writes ===
+    def update(self, entries):
+        with self._write_lock:
+            data = dict(self._data)
+            data.update(entries)
+            self._data = data
+            self._pending.update(entries)
+            self._stats["updates"] += 1
+        self._schedule()
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def set_origin(self, brand_key, country, city="Unknown", fulfillment="UK"):
+        self[brand_key] = {"origin": {"country": country, "city": city}, "fulfillment": fulfillment}
+
+    def _schedule(self):
+        if self._stopped:
+            self.flush()
+            return
+        if self._thread is None:
+            with self._flush_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="brand-store", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+        self._dirty.set()
+
+    # === Flushing ===
+    def _run(self):
+        while not self._stopped:
+            self._dirty.wait()
+            time.sleep(self.flush_interval)  # let a burst of updates pile up
+            self._dirty.clear()
+            self.flush()
+
+    @property
+    def pending(self):
+        return bool(self._pending)
+
+    def flush(self):
+        """Merges the updates made since the last flush into the file. Returns True if it wrote."""
+        with self._flush_lock:
+            with self._write_lock:
+                pending = dict(self._pending)
+            if not pending:
+                return False
+
+            start = time.perf_counter()
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with file_lock(self.path + ".lock"):
+                    data = self._read()  # whatever other processes saved since we last looked
+                    data.update(pending)
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(data, f, indent=2)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"⚠️ Could not save {self.path}: {e}")
+                self._stats["errors"] += 1
+                return False
+
+            with self._write_lock:
+                for key, value in pending.items():
+                    if self._pending.get(key) is value:  # not updated again while we were writing
+                        del self._pending[key]
+                data.update(self._pending)
+                self._data = data
+            self._stats["flushes"] += 1
+            self._stats["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            return True
+
+    def close(self):
+        self._stopped = True
+        self._dirty.set()
+        self.flush()
+
+    def stats(self):
+        return {**self._stats, "brands": len(self._data), "pending": self.pending}
@@ -1,7 +1,8 @@
-import pandas as pd
 import os
 
 def load_material_co2_data():
+    import pandas as pd  # imported here so importing this module stays cheap
+
     path = os.path.join("ml_model", "defra_material_intensity.csv")
     if not os.path.exists(path):
         print("⚠️ CO2 data file not found:", path)
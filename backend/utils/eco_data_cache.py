@@ -0,0 +1,135 @@
+# eco_data_cache.py
+
+import base64
+import json
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ["material", "true_eco_score", "co2_emissions"]
+INDEXED_COLUMNS = ["material", "origin", "true_eco_score", "transport", "recyclability"]
+NUMERIC_COLUMNS = ["weight", "co2_emissions"]
+
+
+class EcoDataSnapshot:
+    """
+    One immutable, column-oriented load of eco_dataset.csv.
+
+    Built once per file version: category -> row-id indexes for the filterable
+    columns, a precomputed sort order per column, and the legacy full JSON body.
+    Queries only touch index arrays and the rows on the requested page.
+    """
+
+    def __init__(self, df, version):
+        self.version = version
+        self.fields = list(df.columns)
+        self.n_rows = len(df)
+        self.columns = {}
+        for col in self.fields:
+            if col in NUMERIC_COLUMNS:
+                self.columns[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+            else:
+                self.columns[col] = df[col].to_numpy(dtype=object)
+
+        self.index = {}
+        for col in INDEXED_COLUMNS:
+            if col in self.columns:
+                keys = df[col].astype(str).str.strip().str.lower().to_numpy()
+                groups = pd.Series(np.arange(self.n_rows)).groupby(keys).indices
+                self.index[col] = {k: np.asarray(v) for k, v in groups.items()}
+
+        self.order = {}
+        for col in self.fields:
+            values = self.columns[col]
+            if col in NUMERIC_COLUMNS:
+                self.order[col] = np.argsort(values, kind="stable")  # NaN sorts last
+            else:
+                self.order[col] = np.argsort(df[col].astype(str).str.lower().to_numpy(), kind="stable")
+
+        # Unfiltered requests get the same body as before, serialised once per version
+        self.full_json = df.to_json(orient="records", force_ascii=False)
+
+    def rows(self, row_ids, fields):
+        out = []
+        for i in row_ids:
+            row = {}
+            for col in fields:
+                value = self.columns[col][i]
+                if isinstance(value, float) and math.isnan(value):
+                    value = None
+                elif isinstance(value, np.generic):
+                    value = value.item()
+                row[col] = value
+            out.append(row)
+        return out
+
+    def query(self, filters=None, co2_range=(None, None), fields=None, sort=None,
+              descending=False, offset=0, limit=100):
+        """Returns (rows, total) for one page of the filtered, sorted view."""
+        mask = None
+        for col, values in (filters or {}).items():
+            ids = [self.index[col].get(v.strip().lower(), np.empty(0, dtype=int)) for v in values]
+            col_mask = np.zeros(self.n_rows, dtype=bool)
+            col_mask[np.concatenate(ids)] = True
+            mask = col_mask if mask is None else mask & col_mask
+
+        lo, hi = co2_range
+        if lo is not None or hi is not None:
+            co2 = self.columns["co2_emissions"]
+            co2_mask = np.ones(self.n_rows, dtype=bool)
+            if lo is not None:
+                co2_mask &= co2 >= lo
+            if hi is not None:
+                co2_mask &= co2 <= hi
+            mask = co2_mask if mask is None else mask & co2_mask
+
+        ordered = self.order[sort] if sort else np.arange(self.n_rows)
+        if descending:
+            ordered = ordered[::-1]
+        if mask is not None:
+            ordered = ordered[mask[ordered]]
+
+        page = ordered[offset:offset + limit]
+        return self.rows(page, fields or self.fields), len(ordered)
+
+
+class EcoDataCache:
+    """Keeps the latest snapshot of a CSV and reloads it only when its mtime or size changes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _file_version(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def snapshot(self):
+        version = self._file_version()
+        current = self._snapshot
+        if current is not None and current.version == version:
+            return current
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version:
+                df = pd.read_csv(self.path)
+                df = df.dropna(subset=REQUIRED_COLUMNS).reset_index(drop=True)
+                self._snapshot = EcoDataSnapshot(df, version)
+                print(f"📚 Loaded eco dataset snapshot: {self._snapshot.n_rows} rows")
+            return self._snapshot
+
+
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Offset from a next_cursor; ValueError for anything that isn't one."""
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
@@ -0,0 +1,184 @@
+# geo.py
+
+import argparse
+import csv
+import math
+import os
+import threading
+import time
+
+# numpy is imported inside the functions that use it: the scraper imports this module and has to stay cheap to import
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CENTROIDS_PATH = os.path.join(project_root, "backend", "data", "country_centroids.csv")
+
+EARTH_RADIUS_KM = 6371
+
+# === Hubs ===
+# Where goods from a country are assumed to ship from; countries without a hub use their centroid
+origin_hubs = {
+    "China": {"lat": 31.2304, "lon": 121.4737, "city": "Shanghai"},
+    "Germany": {"lat": 50.1109, "lon": 8.6821, "city": "Frankfurt"},
+    "USA": {"lat": 37.7749, "lon": -122.4194, "city": "San Francisco"},
+    "Japan": {"lat": 35.6895, "lon": 139.6917, "city": "Tokyo"},
+    "UK": {"lat": 51.509865, "lon": -0.118092, "city": "London"},
+    "Italy": {"city": "Castel San Giovanni", "lat": 45.0667, "lon": 9.4167},
+    "India": {"lat": 28.6139, "lon": 77.2090, "city": "New Delhi"},
+    "South Korea": {"lat": 37.5665, "lon": 126.9780, "city": "Seoul"},
+    "Spain": {"lat": 40.4168, "lon": -3.7038, "city": "Madrid"},
+    "Poland": {"lat": 52.2297, "lon": 21.0122, "city": "Warsaw"},
+    "Netherlands": {"lat": 52.3676, "lon": 4.9041, "city": "Amsterdam"},
+}
+uk_hub = {"lat": 51.8821, "lon": -0.5057, "city": "Dunstable"}
+
+amazon_fulfillment_centers = {
+    "UK": {"lat": 51.8821, "lon": -0.5057, "city": "Dunstable"},
+    "Germany": {"lat": 50.1109, "lon": 8.6821, "city": "Frankfurt"},
+    "France": {"lat": 48.8566, "lon": 2.3522, "city": "Paris"},
+    "Italy": {"lat": 45.0667, "lon": 9.4167, "city": "Castel San Giovanni"},
+    "USA": {"lat": 37.7749, "lon": -122.4194, "city": "San Francisco"},
+    "Spain": {"lat": 40.4168, "lon": -3.7038, "city": "Madrid"},
+    "Netherlands": {"lat": 52.3676, "lon": 4.9041, "city": "Amsterdam"},
+    "Poland": {"lat": 52.2297, "lon": 21.0122, "city": "Warsaw"},
+}
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in km. Takes scalars (returns a float) or arrays,
+    which broadcast against each other: one origin against a million
+    destinations, or a column of origins against a row of hubs for a matrix.
+    """
+    if all(isinstance(v, (int, float)) for v in (lat1, lon1, lat2, lon2)):
+        # One pair: plain math beats numpy's per-call overhead by ~20x
+        lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    import numpy as np
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    km = 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return float(km) if km.ndim == 0 else km
+
+
+def load_country_centroids(path=CENTROIDS_PATH):
+    centroids = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            centroids[row["country"]] = (float(row["lat"]), float(row["lon"]))
+    return centroids
+
+
+# === Distance table ===
+class DistanceTable:
+    """
+    Every origin country x every fulfillment centre, computed once.
+
+    Origins are the origin hubs plus the centroid of every other country in
+    country_centroids.csv; destinations are the fulfillment centres (the UK
+    one is uk_hub). A product's distance is then two dict lookups and an
+    array index, and distances() resolves whole columns of countries in one
+    fancy-indexing call. Unknown countries fall back to the UK, as before.
+    """
+
+    def __init__(self, hubs=origin_hubs, centers=amazon_fulfillment_centers, centroids=None):
+        import numpy as np
+        from backend.utils.normalizer import ORIGIN_KEYWORDS
+
+        centroids = load_country_centroids() if centroids is None else centroids
+        coords = {country: (centroid[0], centroid[1]) for country, centroid in centroids.items()}
+        coords.update((country, (hub["lat"], hub["lon"])) for country, hub in hubs.items())
+
+        self.origins = sorted(coords)
+        self.centers = list(centers)
+        self.origin_coords = np.array([coords[c] for c in self.origins], dtype=np.float64)
+        self.center_coords = np.array([(centers[c]["lat"], centers[c]["lon"]) for c in self.centers], dtype=np.float64)
+        self.matrix = haversine(self.origin_coords[:, :1], self.origin_coords[:, 1:],
+                                self.center_coords[:, 0], self.center_coords[:, 1])
+
+        self._origin_index = {country.lower(): i for i, country in enumerate(self.origins)}
+        for canonical, keywords in ORIGIN_KEYWORDS.items():  # "United States", "Holland", ...
+            if canonical.lower() in self._origin_index:
+                for keyword in keywords:
+                    self._origin_index.setdefault(keyword, self._origin_index[canonical.lower()])
+        self._center_index = {country.lower(): i for i, country in enumerate(self.centers)}
+        self._uk_origin = self._origin_index["uk"]
+        self._uk_center = self._center_index["uk"]
+
+    def origin_index(self, country):
+        return self._origin_index.get(str(country or "").strip().lower(), self._uk_origin)
+
+    def center_index(self, country):
+        return self._center_index.get(str(country or "").strip().lower(), self._uk_center)
+
+    def __contains__(self, country):
+        return str(country or "").strip().lower() in self._origin_index
+
+    def coords(self, country):
+        """(lat, lon) the table uses for an origin country."""
+        lat, lon = self.origin_coords[self.origin_index(country)]
+        return float(lat), float(lon)
+
+    def distance(self, origin_country, fulfillment_country="UK"):
+        return float(self.matrix[self.origin_index(origin_country), self.center_index(fulfillment_country)])
+
+    def distances(self, origin_countries, fulfillment_countries=None):
+        """Vectorized distance(): an array with one km value per origin (fulfillment defaults to the UK)."""
+        import numpy as np
+
+        origins = np.fromiter((self.origin_index(c) for c in origin_countries), dtype=np.intp)
+        if fulfillment_countries is None:
+            return self.matrix[origins, self._uk_center]
+        centers = np.fromiter((self.center_index(c) for c in fulfillment_countries), dtype=np.intp,
+                              count=len(origins))
+        return self.matrix[origins, centers]
+
+    def distances_to(self, origin_countries, lat, lon):
+        """Origin country -> a point (a user's location), for many products at once."""
+        import numpy as np
+
+        coords = self.origin_coords[np.fromiter((self.origin_index(c) for c in origin_countries), dtype=np.intp)]
+        return haversine(coords[:, 0], coords[:, 1], lat, lon)
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_distance_table():
+    global _table
+    with _table_lock:
+        if _table is None:
+            _table = DistanceTable()
+        return _table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="🌍 Origin -> fulfillment centre distances.")
+    parser.add_argument("countries", nargs="*", help="Origin countries to look up")
+    parser.add_argument("--bench", type=int, default=0, help="Time N random per-product lookups, loop vs vectorized")
+    args = parser.parse_args()
+
+    import numpy as np
+
+    table = get_distance_table()
+    print(f"📐 {len(table.origins)} origins x {len(table.centers)} fulfillment centres")
+    for country in args.countries:
+        print(f"{country:<20} {table.distance(country):>9.1f} km to {uk_hub['city']}")
+
+    if args.bench:
+        countries = np.random.default_rng(0).choice(table.origins, args.bench).tolist()
+        hubs = {c: table.coords(c) for c in table.origins}  # same dict lookup the old per-product code did
+        start = time.perf_counter()
+        loop = [haversine(*hubs[c], uk_hub["lat"], uk_hub["lon"]) for c in countries]
+        loop_s = time.perf_counter() - start
+        start = time.perf_counter()
+        lookups = [table.distance(c) for c in countries]
+        lookup_s = time.perf_counter() - start
+        start = time.perf_counter()
+        vectorized = table.distances(countries)
+        vec_s = time.perf_counter() - start
+        assert np.allclose(loop, vectorized) and np.allclose(lookups, vectorized)
+        print(f"⏱️ {args.bench:,} distances: per-pair haversine {loop_s:.3f}s, per-product table lookup "
+              f"{lookup_s:.3f}s, one distances() call {vec_s:.3f}s")
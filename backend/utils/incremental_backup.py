@@ -0,0 +1,214 @@
+# incremental_backup.py
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+POINT_PATTERN = re.compile(r"^(\d{6})-(base|delta)-(\d{8}_\d{6})\.json\.gz$")
+
+
+def _fingerprint(record):
+    return hashlib.blake2b(json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8"),
+                           digest_size=12).hexdigest()
+
+
+class BackupPoint:
+    def __init__(self, seq, kind, stamp, path):
+        self.seq = seq
+        self.kind = kind
+        self.stamp = stamp
+        self.path = path
+
+    def __repr__(self):
+        return f"BackupPoint({self.seq}, {self.kind!r}, {self.stamp!r})"
+
+
+class IncrementalBackup:
+    """
+    Point-in-time backups of a keyed record set (products by ASIN).
+
+    A backup is either a gzipped base snapshot of every record, or a gzipped
+    delta holding only the records added or changed since the previous
+    backup point. A new base is taken after `base_every` deltas, so restoring
+    any point reads one base plus at most that many small deltas.
+
+    Retention keeps the newest `keep_bases` bases with their deltas; within
+    a kept chain, all but the newest `keep_deltas` deltas are merged into a
+    single delta (those intermediate points are no longer restorable).
+    """
+
+    def __init__(self, directory, key="asin", base_every=12, keep_bases=3, keep_deltas=6):
+        self.directory = directory
+        self.key = key
+        self.base_every = base_every
+        self.keep_bases = keep_bases
+        self.keep_deltas = keep_deltas
+        self._fingerprints = None  # key -> fingerprint as of the newest point
+
+    # === Points ===
+    def points(self):
+        if not os.path.isdir(self.directory):
+            return []
+        points = []
+        for name in os.listdir(self.directory):
+            match = POINT_PATTERN.match(name)
+            if match:
+                points.append(BackupPoint(int(match.group(1)), match.group(2), match.group(3),
+                                          os.path.join(self.directory, name)))
+        return sorted(points, key=lambda p: p.seq)
+
+    def _chain(self, points, until=None):
+        """The base and deltas needed to restore the newest point at or before `until` (a seq number)."""
+        chain = []
+        for point in points:
+            if until is not None and point.seq > until:
+                break
+            if point.kind == "base":
+                chain = [point]
+            elif chain:
+                chain.append(point)
+        return chain
+
+    @staticmethod
+    def _read(point):
+        with gzip.open(point.path, "rt", encoding="utf-8") as f:
+            return json.load(f)["records"]
+
+    def _write(self, kind, records, seq, stamp=None):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = stamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"{seq:06d}-{kind}-{stamp}.json.gz")
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump({"kind": kind, "created": stamp, "count": len(records), "records": records}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return BackupPoint(seq, kind, stamp, path)
+
+    # === Backup / restore ===
+    def backup(self, records):
+        """
+        Takes a backup point of `records` (an iterable of dicts). Writes a base
+        or a delta; returns the new BackupPoint, or None if nothing changed.
+        """
+        points = self.points()
+        chain = self._chain(points)
+        if self._fingerprints is None:
+            current = self._restore_chain(chain) if chain else {}
+            self._fingerprints = {key: _fingerprint(record) for key, record in current.items()}
+
+        snapshot = {}
+        fingerprints = {}
+        changed = {}
+        for record in records:
+            key = record.get(self.key)
+            if key is None:
+                continue
+            snapshot[key] = record
+            fingerprints[key] = _fingerprint(record)
+            if self._fingerprints.get(key) != fingerprints[key]:
+                changed[key] = record
+
+        seq = points[-1].seq + 1 if points else 1
+        # Counted by sequence number: retention merges old deltas, so the chain's file count stays small
+        deltas_since_base = chain[-1].seq - chain[0].seq if chain else 0
+        if not chain or deltas_since_base >= self.base_every:
+            point = self._write("base", snapshot, seq)
+        elif changed:
+            point = self._write("delta", changed, seq)
+        else:
+            return None
+
+        self._fingerprints = fingerprints
+        self.apply_retention()
+        return point
+
+    def _restore_chain(self, chain):
+        records = {}
+        for point in chain:
+            records.update(self._read(point))
+        return records
+
+    def restore(self, at=None):
+        """
+        Records as of a backup point: the newest one, or the newest taken at
+        or before `at` (a "YYYYmmdd_HHMMSS" stamp, or a sequence number).
+        """
+        points = self.points()
+        if isinstance(at, str):
+            eligible = [p.seq for p in points if p.stamp <= at]
+            if not eligible:
+                raise ValueError(f"No backup point at or before {at}")
+            at = eligible[-1]
+        chain = self._chain(points, at)
+        if not chain:
+            raise ValueError(f"No base snapshot to restore from in {self.directory}")
+        return self._restore_chain(chain)
+
+    # === Retention ===
+    def apply_retention(self):
+        """Drops chains beyond `keep_bases` and merges old deltas; returns the number of files removed."""
+        points = self.points()
+        bases = [i for i, p in enumerate(points) if p.kind == "base"]
+        removed = 0
+
+        if len(bases) > self.keep_bases:
+            cutoff = bases[-self.keep_bases]
+            for point in points[:cutoff]:
+                os.remove(point.path)
+                removed += 1
+            points = points[cutoff:]
+            bases = [i - cutoff for i in bases[-self.keep_bases:]]
+
+        for n, start in enumerate(bases):
+            end = bases[n + 1] if n + 1 < len(bases) else len(points)
+            deltas = points[start + 1:end]
+            old = deltas[:-self.keep_deltas] if self.keep_deltas else deltas
+            if len(old) < 2:
+                continue
+            merged = {}
+            for point in old:
+                merged.update(self._read(point))
+            # The merged delta takes the newest merged point's name, so later points keep their order
+            last = old[-1]
+            self._write("delta", merged, last.seq, last.stamp)
+            for point in old[:-1]:
+                os.remove(point.path)
+                removed += 1
+        return removed
+
+    def stats(self):
+        points = self.points()
+        return {
+            "bases": sum(p.kind == "base" for p in points),
+            "deltas": sum(p.kind == "delta" for p in points),
+            "bytes": sum(os.path.getsize(p.path) for p in points),
+            "latest": points[-1].stamp if points else None,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="💾 Inspect and restore incremental backups.")
+    parser.add_argument("command", choices=["list", "restore", "prune"])
+    parser.add_argument("directory")
+    parser.add_argument("--at", help="Restore the newest point at or before this YYYYmmdd_HHMMSS stamp")
+    parser.add_argument("--out", help="Where to write the restored records (JSON list)")
+    args = parser.parse_args()
+
+    backups = IncrementalBackup(args.directory)
+    if args.command == "list":
+        for point in backups.points():
+            print(f"{point.seq:6d}  {point.kind:5s}  {point.stamp}  {os.path.getsize(point.path):>10,} B")
+        print(json.dumps(backups.stats(), indent=2))
+    elif args.command == "prune":
+        print(f"🧹 Removed {backups.apply_retention()} backup files")
+    else:
+        records = backups.restore(args.at)
+        out = args.out or f"restored_{args.at or 'latest'}.json"
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(list(records.values()), f, indent=2, ensure_ascii=False)
+        print(f"♻️ Restored {len(records)} records to {out}")
@@ -0,0 +1,150 @@
+# insights_store.py
+
+import csv
+import io
+import os
+import random
+import threading
+from collections import Counter
+
+DIMENSIONS = {
+    "material": "material",
+    "origin": "origin",
+    "transport": "transport",
+    "score": "true_eco_score",
+}
+REQUIRED_COLUMNS = ["material", "true_eco_score", "co2_emissions"]
+SAMPLE_FIELDS = ["material", "true_eco_score", "co2_emissions", "weight", "origin"]
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class InsightsStore:
+    """
+    Running aggregates over eco_dataset.csv for the /insights dashboard.
+
+    Counts, CO₂/weight sums and score histograms are kept per material,
+    origin, transport and score, plus a uniform reservoir sample of rows for
+    scatter plots. The CSV is tailed from the last byte read, so each refresh
+    only parses rows appended since the previous one.
+    """
+
+    def __init__(self, path, sample_size=1000, seed=None):
+        self.path = path
+        self.sample_size = sample_size
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._inode = None
+        self._header = None
+        self.total = 0
+        self.co2_sum = 0.0
+        self.scores = Counter()
+        self.groups = {name: {} for name in DIMENSIONS}
+        self.sample = []
+
+    # === Ingest ===
+    def add_row(self, row):
+        """Folds one dataset row (dict keyed by CSV column) into the aggregates."""
+        if any(not str(row.get(col) or "").strip() for col in REQUIRED_COLUMNS):
+            return
+        co2 = _to_float(row["co2_emissions"])
+        if co2 is None:
+            return
+        weight = _to_float(row.get("weight"))
+        score = row["true_eco_score"].strip()
+
+        self.total += 1
+        self.co2_sum += co2
+        self.scores[score] += 1
+
+        for name, column in DIMENSIONS.items():
+            key = str(row.get(column) or "Unknown").strip()
+            group = self.groups[name].get(key)
+            if group is None:
+                group = self.groups[name][key] = {
+                    "count": 0, "co2_sum": 0.0, "weight_sum": 0.0, "weight_count": 0, "scores": Counter()
+                }
+            group["count"] += 1
+            group["co2_sum"] += co2
+            if weight is not None:
+                group["weight_sum"] += weight
+                group["weight_count"] += 1
+            group["scores"][score] += 1
+
+        # Reservoir sampling (Algorithm R): every row seen so far is equally likely to be kept
+        sampled = {f: row.get(f) for f in SAMPLE_FIELDS}
+        sampled["co2_emissions"] = co2
+        sampled["weight"] = weight
+        if len(self.sample) < self.sample_size:
+            self.sample.append(sampled)
+        else:
+            slot = self._rng.randrange(self.total)
+            if slot < self.sample_size:
+                self.sample[slot] = sampled
+
+    def refresh(self):
+        """Reads only the rows appended to the CSV since the last call."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # File was replaced or truncated: start over
+                self._reset()
+                self._inode = stat.st_ino
+            if stat.st_size == self._offset:
+                return
+
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read(stat.st_size - self._offset)
+
+            # Leave a partially written last line for the next refresh
+            end = chunk.rfind(b"\n") + 1
+            if end == 0:
+                return
+            self._offset += end
+
+            reader = csv.reader(io.StringIO(chunk[:end].decode("utf-8", errors="replace")))
+            for values in reader:
+                if not values:
+                    continue
+                if self._header is None:
+                    self._header = [v.strip().lstrip("\ufeff") for v in values]
+                    continue
+                self.add_row(dict(zip(self._header, values)))
+
+    # === Read ===
+    def cubes(self, top=None):
+        with self._lock:
+            result = {
+                "total_rows": self.total,
+                "co2": {
+                    "sum": round(self.co2_sum, 3),
+                    "mean": round(self.co2_sum / self.total, 3) if self.total else None,
+                },
+                "score_distribution": dict(self.scores),
+                "sample": list(self.sample),
+            }
+            for name, groups in self.groups.items():
+                rows = [{
+                    "name": key,
+                    "count": g["count"],
+                    "co2_sum": round(g["co2_sum"], 3),
+                    "co2_mean": round(g["co2_sum"] / g["count"], 3),
+                    "weight_mean": round(g["weight_sum"] / g["weight_count"], 3) if g["weight_count"] else None,
+                    "scores": dict(g["scores"]),
+                } for key, g in groups.items()]
+                rows.sort(key=lambda r: r["count"], reverse=True)
+                result[f"by_{name}"] = rows[:top] if top else rows
+            return result
@@ -0,0 +1,181 @@
+# jobs.py
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+TERMINAL_STATES = ("done", "failed", "partial")
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    """One submitted batch of work items plus its event log (replayed to SSE subscribers)."""
+
+    def __init__(self, items):
+        self.id = uuid.uuid4().hex
+        self.items = items
+        self.status = "queued"
+        self.results = [None] * len(items)
+        self.completed = 0
+        self.failed = 0
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = []
+        self._cond = threading.Condition()
+
+    def emit(self, event, data=None):
+        with self._cond:
+            self.events.append({"id": len(self.events), "event": event, "data": data or {}})
+            self._cond.notify_all()
+
+    def finish_item(self, index, result=None, error=None):
+        # Condition wraps an RLock, so the status flip and its events land atomically
+        with self._cond:
+            if error is None:
+                self.results[index] = {"index": index, "status": "done", "result": result}
+                self.completed += 1
+            else:
+                self.results[index] = {"index": index, "status": "failed", "error": error}
+                self.failed += 1
+            self.emit("item_done" if error is None else "item_failed", self.results[index])
+
+            if self.completed + self.failed == len(self.items):
+                if not self.failed:
+                    self.status = "done"
+                elif not self.completed:
+                    self.status = "failed"
+                else:
+                    self.status = "partial"
+                self.finished_at = time.time()
+                self.emit(self.status, {"completed": self.completed, "failed": self.failed})
+
+    @property
+    def finished(self):
+        return self.status in TERMINAL_STATES
+
+    def wait(self, timeout=None):
+        """Blocks until the job finishes; returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.finished, timeout)
+
+    def events_since(self, last_id, timeout):
+        """Events after `last_id`, waiting up to `timeout` seconds for new ones."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > last_id + 1 or self.finished, timeout)
+            return self.events[last_id + 1:]
+
+    def as_dict(self, include_results=True):
+        with self._cond:
+            out = {
+                "id": self.id,
+                "status": self.status,
+                "total": len(self.items),
+                "completed": self.completed,
+                "failed": self.failed,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+            if include_results:
+                out["results"] = [r for r in self.results if r is not None]
+            return out
+
+
+class JobManager:
+    """
+    Runs job items on a bounded thread pool.
+
+    `worker(item, progress)` does the work for one item and returns a JSON-able
+    result (or raises). `progress(stage, **info)` appends a progress event to
+    the job. At most `max_pending` items may be queued or running at once;
+    beyond that submit() raises JobQueueFull so the caller can shed load.
+    """
+
+    def __init__(self, worker, max_workers=2, max_pending=100, retention=3600):
+        self.worker = worker
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"submitted": 0, "rejected": 0, "items_done": 0, "items_failed": 0}
+
+    def submit(self, items):
+        job = Job(items)
+        with self._lock:
+            self._prune()
+            if self._pending + len(items) > self.max_pending:
+                self._stats["rejected"] += 1
+                raise JobQueueFull(f"{self._pending} items already pending")
+            self._pending += len(items)
+            self._jobs[job.id] = job
+            self._stats["submitted"] += 1
+
+        job.emit("queued", {"total": len(items)})
+        for index, item in enumerate(items):
+            self._executor.submit(self._run_item, job, index, item)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run_item(self, job, index, item):
+        with job._cond:
+            if job.status == "queued":
+                job.status = "running"
+        job.emit("item_started", {"index": index})
+
+        def progress(stage, **info):
+            job.emit("progress", {"index": index, "stage": stage, **info})
+
+        try:
+            result = self.worker(item, progress)
+            job.finish_item(index, result=result)
+            stat = "items_done"
+        except Exception as e:
+            print(f"❌ Job {job.id} item {index} failed: {e}")
+            job.finish_item(index, error=str(e))
+            stat = "items_failed"
+
+        with self._lock:
+            self._pending -= 1
+            self._stats[stat] += 1
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        expired = [jid for jid, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending_items"] = self._pending
+            stats["jobs_tracked"] = len(self._jobs)
+        stats["max_pending"] = self.max_pending
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def sse_stream(job, last_event_id=-1, keepalive=15):
+    """Server-Sent Events for a job: replays missed events, then follows until it finishes."""
+    last_id = last_event_id
+    while True:
+        events = job.events_since(last_id, keepalive)
+        if not events:
+            if job.finished:
+                return
+            yield ": keep-alive\n\n"
+        for event in events:
+            last_id = event["id"]
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            if event["event"] in TERMINAL_STATES:
+                return
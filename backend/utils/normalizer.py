@@ -0,0 +1,312 @@
+# normalizer.py
+
+import csv
+import os
+import re
+import threading
+from collections import Counter, defaultdict, deque
+from functools import lru_cache
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFRA_PATH = os.path.join(project_root, "ml_model", "defra_material_intensity.csv")
+
+# Curated keywords, checked first and in this order (the first listed material wins,
+# so "Stainless Steel 304" stays Steel, as the model's encoder expects). Plain
+# substring hits, so "plastic" also catches "thermoplastic".
+MATERIAL_KEYWORDS = {
+    "Plastic": ["plastic", "plastics"],
+    "Glass": ["glass"],
+    "Aluminum": ["aluminium", "aluminum"],
+    "Steel": ["steel"],
+    "Paper": ["paper", "papers"],
+    "Cardboard": ["cardboard", "corrugated"],
+}
+
+# Merged from the old app.py / scraper / dataCollector tables; whole words only,
+# so "us" no longer matches inside "Russia" or "uk" inside "Ukraine"
+ORIGIN_KEYWORDS = {
+    "China": ["china", "prc"],
+    "UK": ["uk", "united kingdom", "england", "scotland", "wales", "great britain"],
+    "USA": ["usa", "us", "united states", "united states of america", "america"],
+    "Germany": ["germany"],
+    "France": ["france"],
+    "Italy": ["italy"],
+    "Japan": ["japan"],
+    "India": ["india"],
+    "South Korea": ["south korea", "korea"],
+    "Taiwan": ["taiwan"],
+    "Spain": ["spain"],
+    "Poland": ["poland"],
+    "Netherlands": ["netherlands", "holland"],
+    "Ireland": ["ireland", "eire"],
+    "Canada": ["canada"],
+    "Switzerland": ["switzerland"],
+    "Australia": ["australia"],
+    "Sweden": ["sweden"],
+    "Finland": ["finland"],
+    "Mexico": ["mexico"],
+    "Vietnam": ["vietnam", "viet nam"],
+    "Russia": ["russia"],
+    "Brazil": ["brazil"],
+    "Norway": ["norway"],
+    "Singapore": ["singapore"],
+}
+ORIGIN_PHRASES = ["made in {}", "country of origin: {}", "country of origin {}", "manufactured in {}"]
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text reports every pattern occurrence."""
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, payload in patterns:
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), payload))
+
+        # Breadth-first failure links; each node also inherits its fallback's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text):
+        """Yields (start, end, payload) for every occurrence."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, payload in self._out[node]:
+                yield i - length + 1, i + 1, payload
+
+
+class NgramIndex:
+    """Character trigram index for typo-tolerant lookups ("Alumnium" -> Aluminum)."""
+
+    def __init__(self, entries, n=3):
+        self.n = n
+        self._grams = []
+        self._keys = []
+        self._values = []
+        self._postings = defaultdict(list)
+        self.max_words = 1
+        for key, value in entries:
+            grams = self.grams(key)
+            entry_id = len(self._values)
+            self._grams.append(len(grams))
+            self._keys.append(key)
+            self._values.append(value)
+            for gram in grams:
+                self._postings[gram].append(entry_id)
+            self.max_words = max(self.max_words, len(key.split()))
+
+    def grams(self, text):
+        padded = f" {text} "
+        return {padded[i:i + self.n] for i in range(len(padded) - self.n + 1)}
+
+    def best(self, text, threshold, max_edit_ratio=None):
+        """
+        Best entry by Dice similarity over any 1..max_words word window of `text`.
+        With `max_edit_ratio`, an entry also has to be within that fraction of
+        its length in edits (at least one) of the window, which keeps shared
+        trigrams between different words ("Austria", "Australia") from counting.
+        """
+        words = re.findall(r"[a-z]+", text)
+        best_score, best_value = 0.0, None
+        for size in range(1, self.max_words + 1):
+            for i in range(len(words) - size + 1):
+                window = " ".join(words[i:i + size])
+                query = self.grams(window)
+                shared = Counter(entry_id for gram in query for entry_id in self._postings.get(gram, ()))
+                for entry_id, count in shared.items():
+                    score = 2 * count / (len(query) + self._grams[entry_id])
+                    if score <= best_score or score < threshold:
+                        continue
+                    if max_edit_ratio is not None:
+                        key = self._keys[entry_id]
+                        if edit_distance(window, key, max(1, int(len(key) * max_edit_ratio))) is None:
+                            continue
+                    best_score, best_value = score, self._values[entry_id]
+        return best_value if best_score >= threshold else None
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between `a` and `b`, or None once it is certain to exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+def _is_word_char(ch):
+    return ch.isalnum()
+
+
+class Normalizer:
+    """
+    Maps free-text materials and origins onto canonical names.
+
+    Keyword hits come from one Aho-Corasick pass per string (curated keywords
+    first, then whole DEFRA material names, longest first); strings without a
+    hit fall back to the trigram index. Lookups are memoized in a bounded LRU
+    cache, and materials()/origins() normalize whole columns.
+    """
+
+    def __init__(self, material_names=(), material_keywords=MATERIAL_KEYWORDS, origin_keywords=ORIGIN_KEYWORDS,
+                 fuzzy_threshold=0.6, origin_max_edit_ratio=0.15, cache_size=4096):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.origin_max_edit_ratio = origin_max_edit_ratio
+
+        # payload: (tier, rank, canonical, whole_word)
+        material_patterns = []
+        for rank, (canonical, keywords) in enumerate(material_keywords.items()):
+            material_patterns += [(k, (0, rank, canonical, False)) for k in keywords]
+        for name in material_names:
+            if name.lower() != "other":
+                material_patterns.append((name.lower(), (1, -len(name), name, True)))
+        self._materials = AhoCorasick(material_patterns)
+        self._material_fuzzy = NgramIndex([(k, c) for k, (_, _, c, _) in material_patterns])
+
+        origin_patterns = []
+        phrase_patterns = []
+        for rank, (canonical, keywords) in enumerate(origin_keywords.items()):
+            origin_patterns += [(k, (0, rank, canonical, True)) for k in keywords]
+            phrase_patterns += [(p.format(k), (0, rank, canonical, True)) for k in keywords for p in ORIGIN_PHRASES]
+        self._origins = AhoCorasick(origin_patterns)
+        self._origin_phrases = AhoCorasick(phrase_patterns)
+        self._origin_fuzzy = NgramIndex([(k, c) for k, (_, _, c, _) in origin_patterns])
+
+        self.material = lru_cache(maxsize=cache_size)(self._material)
+        self.origin = lru_cache(maxsize=cache_size)(self._origin)
+        self.origin_from_text = lru_cache(maxsize=cache_size)(self._origin_from_text)
+
+    @staticmethod
+    def _best_hit(automaton, text):
+        best = None
+        for start, end, (tier, rank, canonical, whole_word) in automaton.iter_matches(text):
+            if whole_word and ((start > 0 and _is_word_char(text[start - 1])) or
+                               (end < len(text) and _is_word_char(text[end]))):
+                continue
+            key = (tier, rank, start)
+            if best is None or key < best[0]:
+                best = (key, canonical)
+        return best[1] if best else None
+
+    def _material(self, text):
+        """Canonical material for `text`, or None when nothing matches."""
+        text = str(text or "").strip().lower()
+        if not text:
+            return None
+        return self._best_hit(self._materials, text) or self._material_fuzzy.best(text, self.fuzzy_threshold)
+
+    def _origin(self, text):
+        """Canonical country for `text`, or None when nothing matches."""
+        text = str(text or "").strip().lower()
+        if not text:
+            return None
+        return self._best_hit(self._origins, text) or self._origin_fuzzy.best(text, self.fuzzy_threshold,
+                                                                             self.origin_max_edit_ratio)
+
+    def _origin_from_text(self, text):
+        """Country stated in product text ("Made in Japan", "Country of origin: China"), else None."""
+        return self._best_hit(self._origin_phrases, str(text or "").lower())
+
+    # === Batch API (dataset cleaning) ===
+    @staticmethod
+    def _column(lookup, values, keep_unmatched):
+        seen = {}
+        out = []
+        for value in values:
+            key = value if isinstance(value, str) else None
+            if key not in seen:
+                seen[key] = lookup(key) if key else None
+            match = seen[key]
+            out.append(value if match is None and keep_unmatched else match)
+        return out
+
+    def materials(self, values, keep_unmatched=True):
+        return self._column(self.material, values, keep_unmatched)
+
+    def origins(self, values, keep_unmatched=True):
+        return self._column(self.origin, values, keep_unmatched)
+
+    def cache_info(self):
+        return {
+            "material": self.material.cache_info()._asdict(),
+            "origin": self.origin.cache_info()._asdict(),
+            "origin_from_text": self.origin_from_text.cache_info()._asdict(),
+        }
+
+
+class BrandMatcher:
+    """
+    Finds a known brand in free text (aria-labels, titles, whole search-result
+    cards) in one Aho-Corasick pass. Brands only match as whole words, and the
+    longest hit wins ("the north face" over "north"), then the earliest one.
+    """
+
+    def __init__(self, brands):
+        self.brands = sorted({str(b).strip().lower() for b in brands if b and str(b).strip()})
+        self._automaton = AhoCorasick([(b, b) for b in self.brands])
+
+    def __len__(self):
+        return len(self.brands)
+
+    def find(self, text):
+        """The matched brand key (lowercase), or None."""
+        text = str(text or "").lower()
+        best = None
+        for start, end, brand in self._automaton.iter_matches(text):
+            if (start > 0 and _is_word_char(text[start - 1])) or (end < len(text) and _is_word_char(text[end])):
+                continue
+            key = (start - end, start)
+            if best is None or key < best[0]:
+                best = (key, brand)
+        return best[1] if best else None
+
+
+def load_material_names(path=DEFRA_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [row["material"] for row in csv.DictReader(f) if row.get("material")]
+    except FileNotFoundError:
+        print(f"⚠️ DEFRA material list not found: {path}")
+        return []
+
+
+_normalizer = None
+_normalizer_lock = threading.Lock()
+
+
+def get_normalizer():
+    """The process-wide normalizer, built on first use."""
+    global _normalizer
+    with _normalizer_lock:
+        if _normalizer is None:
+            _normalizer = Normalizer(load_material_names())
+        return _normalizer
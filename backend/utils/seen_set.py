@@ -0,0 +1,297 @@
+# seen_set.py
+
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import tracemalloc
+
+import numpy as np
+
+ASIN_PATTERN = re.compile(r"^[0-9A-Z]{10}$")
+
+
+def pack_asin(asin):
+    """A 10-character ASIN as a base-36 integer (< 36**10 < 2**52), or None if it isn't one."""
+    if not isinstance(asin, str):
+        return None
+    asin = asin.strip().upper()
+    return int(asin, 36) if ASIN_PATTERN.match(asin) else None
+
+
+def unpack_asin(value):
+    digits = []
+    for _ in range(10):
+        value, digit = divmod(int(value), 36)
+        digits.append("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"[digit])
+    return "".join(reversed(digits))
+
+
+class AsinSet:
+    """
+    Persistent set of ASINs at 8 bytes each.
+
+    ASINs are packed into uint64s and kept in a sorted array file that is
+    memory-mapped, so a lookup is a binary search over pages the OS caches
+    and the set costs no Python heap. New ASINs go to a small in-memory
+    delta, which is also appended to `<path>.delta` so it survives a
+    restart; once it holds `merge_every` entries it is merged into a new
+    sorted file that replaces the old one. Anything that doesn't look like
+    an ASIN is kept as text in `<path>.other`.
+    """
+
+    def __init__(self, path, merge_every=100_000):
+        self.path = path
+        self.merge_every = merge_every
+        self._lock = threading.Lock()
+        self._delta = set()
+        self._other = set()
+        self._base = np.empty(0, dtype="<u8")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._map_base()
+        self._replay()
+        self._delta_log = open(path + ".delta", "ab")
+        self._other_log = open(path + ".other", "a", encoding="utf-8")
+
+    def _map_base(self):
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        self._base = np.memmap(self.path, dtype="<u8", mode="r") if size else np.empty(0, dtype="<u8")
+
+    def _replay(self):
+        if os.path.exists(self.path + ".delta"):
+            with open(self.path + ".delta", "rb") as f:
+                data = f.read()
+            values = np.frombuffer(data[:len(data) - len(data) % 8], dtype="<u8")  # drop a torn last entry
+            self._delta.update(int(v) for v in values if not self._in_base(int(v)))
+        if os.path.exists(self.path + ".other"):
+            with open(self.path + ".other", "r", encoding="utf-8") as f:
+                self._other.update(line.rstrip("\n") for line in f if line.strip())
+
+    def _in_base(self, value):
+        i = int(np.searchsorted(self._base, value))
+        return i < len(self._base) and int(self._base[i]) == value
+
+    # === Membership ===
+    def __contains__(self, asin):
+        value = pack_asin(asin)
+        with self._lock:
+            if value is None:
+                return asin in self._other
+            return value in self._delta or self._in_base(value)
+
+    def __len__(self):
+        return len(self._base) + len(self._delta) + len(self._other)
+
+    def add(self, asin):
+        """Adds one ASIN; True if it wasn't in the set yet."""
+        return bool(self.add_many([asin]))
+
+    def add_many(self, asins):
+        """Adds ASINs; returns the ones that weren't in the set yet, in order, once each."""
+        added = []
+        with self._lock:
+            packed, other = [], []
+            for asin in asins:
+                value = pack_asin(asin)
+                if value is None:
+                    if asin and asin not in self._other:
+                        self._other.add(asin)
+                        other.append(asin)
+                        added.append(asin)
+                elif value not in self._delta and not self._in_base(value):
+                    self._delta.add(value)
+                    packed.append(value)
+                    added.append(asin)
+            if packed:
+                self._delta_log.write(np.asarray(packed, dtype="<u8").tobytes())
+                self._delta_log.flush()
+            if other:
+                self._other_log.write("".join(f"{asin}\n" for asin in other))
+                self._other_log.flush()
+            if len(self._delta) >= self.merge_every:
+                self._merge()
+        return added
+
+    # === Merging ===
+    def _merge(self):
+        """Writes base + delta as a new sorted file, swaps it in and empties the delta log."""
+        merged = np.union1d(self._base, np.fromiter(self._delta, dtype="<u8", count=len(self._delta)))
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(merged.astype("<u8").tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # Windows won't replace a file that is still mapped: drop the only reference to the old mapping first
+        self._base = np.empty(0, dtype="<u8")
+        os.replace(tmp_path, self.path)
+        self._map_base()
+        # A crash before this truncate only means the delta is replayed (and skipped) on the next open
+        self._delta_log.truncate(0)
+        self._delta.clear()
+
+    def merge(self):
+        with self._lock:
+            if self._delta:
+                self._merge()
+
+    def close(self):
+        with self._lock:
+            self._delta_log.close()
+            self._other_log.close()
+
+    def stats(self):
+        return {
+            "entries": len(self),
+            "base": len(self._base),
+            "delta": len(self._delta),
+            "other": len(self._other),
+            "file_bytes": len(self._base) * 8,
+        }
+
+
+class BloomFilter:
+    """
+    Persistent Bloom filter for URLs (or any strings), in one memory-mapped file.
+
+    Sized for `capacity` items at a false-positive rate of `error_rate`:
+    m = -n ln p / (ln 2)^2 bits and k = (m / n) ln 2 hash functions, i.e.
+    about 1.2 MB and 7 probes per million URLs at 1%, 1.8 MB and 10 probes
+    at 0.1%. A "no" is always right; a "yes" is wrong for about
+    `error_rate` of the items never added, until more than `capacity` are
+    added (false_positive_rate() gives the current estimate). The size is
+    fixed when the file is created.
+    """
+
+    HEADER = struct.Struct("<4sQQQ")  # magic, bits, hashes, count
+    MAGIC = b"BLM1"
+
+    def __init__(self, path, capacity=1_000_000, error_rate=0.001):
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(path) or os.path.getsize(path) < self.HEADER.size:
+            bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+            hashes = max(1, round(bits / capacity * math.log(2)))
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, bits, hashes, 0))
+                f.truncate(self.HEADER.size + (bits + 7) // 8)
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.bits, self.hashes, self.count = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"{path} is not a Bloom filter file")
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, item):
+        offset = self.HEADER.size
+        return all(self._map[offset + bit // 8] >> (bit % 8) & 1 for bit in self._positions(item))
+
+    def add(self, item):
+        """Adds an item; True if it was definitely not in the filter before."""
+        offset = self.HEADER.size
+        new = False
+        with self._lock:
+            for bit in self._positions(item):
+                byte = offset + bit // 8
+                mask = 1 << (bit % 8)
+                if not self._map[byte] & mask:
+                    self._map[byte] |= mask
+                    new = True
+            if new:
+                self.count += 1
+                self.HEADER.pack_into(self._map, 0, self.MAGIC, self.bits, self.hashes, self.count)
+        return new
+
+    def __len__(self):
+        """Items added (approximate: an item whose bits were all set already isn't counted)."""
+        return self.count
+
+    def false_positive_rate(self):
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def flush(self):
+        with self._lock:
+            self._map.flush()
+
+    def close(self):
+        with self._lock:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+
+    def stats(self):
+        return {
+            "items": self.count,
+            "bits": self.bits,
+            "hashes": self.hashes,
+            "file_bytes": self.HEADER.size + (self.bits + 7) // 8,
+            "false_positive_rate": round(self.false_positive_rate(), 6),
+        }
+
+
+# === Memory comparison ===
+def _traced(build):
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def memory_report(entries=200_000, directory=None):
+    """Bytes per million entries: the old in-memory structures vs AsinSet and BloomFilter."""
+    import tempfile
+
+    asins = [unpack_asin(v) for v in np.random.default_rng(0).integers(0, 36 ** 10, entries, dtype=np.uint64)]
+    urls = [f"https://www.amazon.co.uk/s?k=term{i % 500}&page={i}" for i in range(entries)]
+    scale = 1_000_000 / entries
+    report = {
+        "set_of_asin_strings": _traced(lambda: {a[:5] + a[5:] for a in asins}),
+        "dict_of_product_dicts": _traced(lambda: {a[:5] + a[5:]: {"asin": a, "title": f"Product {i}", "brand": "acme"}
+                                                  for i, a in enumerate(asins)}),
+        "set_of_url_strings": _traced(lambda: {u[:8] + u[8:] for u in urls}),
+    }
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        seen = AsinSet(os.path.join(tmp, "asins.u64"), merge_every=entries + 1)
+        seen.add_many(asins)
+        report["asin_set_delta_heap"] = _traced(lambda: {pack_asin(a) for a in asins})  # before a merge
+        seen.merge()
+        report["asin_set_mmap_file"] = seen.stats()["file_bytes"]
+        seen.close()
+        for rate in (0.01, 0.001):
+            bloom = BloomFilter(os.path.join(tmp, f"urls-{rate}.bloom"), capacity=entries, error_rate=rate)
+            report[f"bloom_file_at_{rate}"] = bloom.stats()["file_bytes"]
+            bloom.close()
+    return {name: f"{size * scale / 1024 / 1024:.1f} MB per million" for name, size in report.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="🔎 Persistent seen-sets for ASINs and URLs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("memory", help="Compare memory per million entries")
+    report.add_argument("--entries", type=int, default=200_000)
+    stats = sub.add_parser("stats", help="Stats of an ASIN set (.u64) or Bloom filter (.bloom) file")
+    stats.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "memory":
+        for name, size in memory_report(args.entries).items():
+            print(f"{name:<24} {size}")
+    elif args.path.endswith(".bloom"):
+        print(BloomFilter(args.path).stats())
+    else:
+        print(AsinSet(args.path).stats())
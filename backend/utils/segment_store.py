@@ -0,0 +1,314 @@
+# segment_store.py
+
+import argparse
+import atexit
+import json
+import os
+import re
+import threading
+import time
+
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})\.jsonl$")
+
+
+def _segment_name(number):
+    return f"segment-{number:06d}.jsonl"
+
+
+class SegmentStore:
+    """
+    Append-only JSONL log of records, split into size-capped segments.
+
+    append() writes one line to the active segment and rotates it once it
+    passes `max_segment_bytes`, so a save costs the size of one record, not
+    the catalog. When `compact_after` sealed segments pile up, a background
+    thread merges them into one, keeping only the last record per `key`
+    (last write wins). Merging writes a temp file, renames it over the newest
+    sealed segment and then deletes the older ones, so a crash at any point
+    leaves a log that still reads back the same.
+
+    Readers stream the merged view with iter_records(): one pass to find
+    each key's last occurrence, one pass to yield it. Memory is one entry
+    per key, never the whole catalog.
+
+    Several processes (pre-forked workers) may append to one directory:
+    each append goes to the newest segment on disk, and compaction leaves
+    the newest segment and anything written in the last `settle_seconds`.
+    """
+
+    def __init__(self, directory, key="asin", max_segment_bytes=4 * 1024 * 1024, compact_after=4, fsync=False,
+                 settle_seconds=1.0):
+        self.directory = directory
+        self.key = key
+        self.max_segment_bytes = max_segment_bytes
+        self.compact_after = compact_after
+        self.fsync = fsync
+        self.settle_seconds = settle_seconds
+
+        self._lock = threading.Lock()          # appends and rotation
+        self._compact_lock = threading.Lock()  # one compaction at a time
+        self._wake = threading.Event()
+        self._thread = None
+        self._active = None
+        self._active_number = None
+        self._stats = {"appended": 0, "rotations": 0, "compactions": 0, "dropped": 0, "last_compaction_ms": 0.0}
+
+    # === Segments ===
+    def segment_numbers(self):
+        if not os.path.isdir(self.directory):
+            return []
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _path(self, number):
+        return os.path.join(self.directory, _segment_name(number))
+
+    def _open_active(self):
+        """The newest segment, reopened if another process rotated past ours."""
+        os.makedirs(self.directory, exist_ok=True)
+        numbers = self.segment_numbers()
+        newest = numbers[-1] if numbers else 1
+        if self._active is not None and (newest != self._active_number or os.fstat(self._active.fileno()).st_nlink == 0):
+            self._active.close()
+            self._active = None
+        if self._active is None:
+            self._active_number = newest
+            self._active = open(self._path(newest), "a", encoding="utf-8")
+            self._terminate_torn_line(self._path(newest))
+        return self._active
+
+    def _terminate_torn_line(self, path):
+        """After a crash mid-write, start the next record on a fresh line instead of gluing it to the torn one."""
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+        if torn:
+            self._active.write("\n")
+
+    def _rotate(self):
+        self._active.close()
+        self._active_number += 1
+        self._active = open(self._path(self._active_number), "a", encoding="utf-8")
+        self._stats["rotations"] += 1
+
+    # === Writing ===
+    def append(self, record):
+        self.append_many([record])
+
+    def append_many(self, records):
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        if not lines:
+            return
+        with self._lock:
+            f = self._open_active()
+            f.write(lines)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            self._stats["appended"] += len(records)
+            if f.tell() >= self.max_segment_bytes:
+                self._rotate()
+                sealed = len(self.segment_numbers()) - 1
+                if self._thread is not None and sealed >= self.compact_after:
+                    self._wake.set()
+
+    def close(self):
+        with self._lock:
+            if self._active is not None:
+                self._active.close()
+                self._active = None
+        if self._thread is not None:
+            self._thread, thread = None, self._thread
+            self._wake.set()
+            thread.join()
+
+    # === Reading ===
+    def _key_of(self, record):
+        return record.get(self.key) if isinstance(record, dict) else None
+
+    @staticmethod
+    def _read_segment(f, limit):
+        """(line number, record) for each complete, parseable line up to byte `limit`."""
+        f.seek(0)
+        position = 0
+        for number, line in enumerate(f):
+            position += len(line)
+            if position > limit:
+                return
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                continue  # torn write from a crashed process
+
+    def _open_snapshot(self):
+        """Open handles + sizes for the current segments, so appends and compaction can't move them underneath a reader."""
+        with self._lock:
+            if self._active is not None:
+                self._active.flush()
+            handles = []
+            for number in self.segment_numbers():
+                try:
+                    f = open(self._path(number), "rb")
+                except FileNotFoundError:
+                    continue  # merged away by a compaction that just finished
+                handles.append((number, f, os.fstat(f.fileno()).st_size))
+            return handles
+
+    def iter_records(self):
+        """The merged view, oldest first: every keyed record's latest version plus all records without a key."""
+        handles = self._open_snapshot()
+        try:
+            last = {}
+            for number, f, size in handles:
+                for line_no, record in self._read_segment(f, size):
+                    key = self._key_of(record)
+                    if key is not None:
+                        last[key] = (number, line_no)
+
+            for number, f, size in handles:
+                for line_no, record in self._read_segment(f, size):
+                    key = self._key_of(record)
+                    if key is None or last[key] == (number, line_no):
+                        yield record
+        finally:
+            for _, f, _ in handles:
+                f.close()
+
+    def get(self, key):
+        found = None
+        for _, f, size in self._open_snapshot():
+            with f:
+                for _, record in self._read_segment(f, size):
+                    if self._key_of(record) == key:
+                        found = record
+        return found
+
+    def keys(self):
+        return {key for key in map(self._key_of, self.iter_records()) if key is not None}
+
+    # === Compaction ===
+    def start(self):
+        """Starts the background compactor."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="segment-compactor", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def _run(self):
+        thread = self._thread
+        while self._thread is thread:
+            # Woken by a rotation, or periodically to pick up segments that hadn't settled yet
+            self._wake.wait(timeout=30)
+            self._wake.clear()
+            if self._thread is not thread:
+                return
+            if len(self.segment_numbers()) - 1 < self.compact_after:
+                continue
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"⚠️ Compaction of {self.directory} failed: {e}")
+
+    def compact(self):
+        """Merges every sealed segment into one. Returns the number of superseded records dropped."""
+        with self._compact_lock:
+            cutoff = time.time() - self.settle_seconds
+            with self._lock:
+                numbers = self.segment_numbers()[:-1]  # the newest one takes appends
+            numbers = [n for n in numbers if os.path.getmtime(self._path(n)) < cutoff]
+            # Only a contiguous run of settled segments can be merged without reordering writes
+            while numbers and numbers[-1] - numbers[0] != len(numbers) - 1:
+                numbers.pop()
+            if len(numbers) < 2:
+                return 0
+
+            start = time.perf_counter()
+            last = {}
+            total = 0
+            for number in numbers:
+                with open(self._path(number), "rb") as f:
+                    for line_no, record in self._read_segment(f, float("inf")):
+                        total += 1
+                        key = self._key_of(record)
+                        if key is not None:
+                            last[key] = (number, line_no)
+
+            target = self._path(numbers[-1])
+            tmp_path = target + ".compact"
+            kept = 0
+            with open(tmp_path, "w", encoding="utf-8") as out:
+                for number in numbers:
+                    with open(self._path(number), "rb") as f:
+                        for line_no, record in self._read_segment(f, float("inf")):
+                            key = self._key_of(record)
+                            if key is None or last[key] == (number, line_no):
+                                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                                kept += 1
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, target)
+            for number in numbers[:-1]:
+                os.remove(self._path(number))
+
+            dropped = total - kept
+            self._stats["compactions"] += 1
+            self._stats["dropped"] += dropped
+            self._stats["last_compaction_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            return dropped
+
+    def stats(self):
+        numbers = self.segment_numbers()
+        size = sum(os.path.getsize(self._path(n)) for n in numbers if os.path.exists(self._path(n)))
+        return {**self._stats, "segments": len(numbers), "bytes": size}
+
+    # === Import / export ===
+    def import_json(self, path):
+        """Appends the records of a legacy JSON array file (e.g. the old cleaned_products.json)."""
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        self.append_many(records)
+        return len(records)
+
+    def export_json(self, path):
+        """Writes the merged view as one JSON array, streaming record by record."""
+        count = 0
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for record in self.iter_records():
+                f.write(",\n  " if count else "\n  ")
+                f.write(json.dumps(record, ensure_ascii=False))
+                count += 1
+            f.write("\n]\n" if count else "]\n")
+        os.replace(tmp_path, path)
+        return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="🗂️ Inspect and maintain a JSONL segment store.")
+    parser.add_argument("command", choices=["stats", "compact", "import", "export"])
+    parser.add_argument("directory")
+    parser.add_argument("path", nargs="?", help="JSON file to import from / export to")
+    args = parser.parse_args()
+
+    store = SegmentStore(args.directory)
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == "compact":
+        print(f"🧹 Dropped {store.compact()} superseded records")
+    elif args.command == "import":
+        print(f"📥 Imported {store.import_json(args.path)} records")
+    else:
+        print(f"📤 Exported {store.export_json(args.path)} records to {args.path}")
+    store.close()
@@ -0,0 +1,204 @@
+# write_behind.py
+
+import atexit
+import csv
+import io
+import json
+import os
+import queue
+import threading
+import time
+
+
+class WriteBehindWriter:
+    """
+    Moves request-time log writes off the hot path.
+
+    Handlers enqueue one line per record into a bounded queue. A single
+    background thread drains the queue, groups lines by file and commits
+    each group with one append + fsync. When the queue is full the caller
+    waits up to `put_timeout` seconds (back-pressure), then falls back to
+    writing the line itself so nothing is ever dropped.
+    """
+
+    def __init__(self, max_queue=10_000, batch_size=500, flush_interval=0.5, put_timeout=2.0, fsync=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.fsync = fsync
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._file_locks = {}
+        self._locks_guard = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "blocked_puts": 0,
+            "blocked_seconds": 0.0,
+            "sync_fallbacks": 0,
+            "errors": 0,
+            "high_water": 0,
+            "last_commit_ms": 0.0,
+        }
+
+    # === Producer side ===
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def write_json(self, path, record):
+        self.submit(path, json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_csv(self, path, row):
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_MINIMAL).writerow(row)
+        self.submit(path, buffer.getvalue())
+
+    def submit(self, path, line):
+        path = os.path.abspath(path)  # resolve against the caller's cwd, not the writer's
+        if self._stopped or self._thread is None:
+            self._append(path, [line])
+            return
+
+        try:
+            self._queue.put_nowait((path, line))
+        except queue.Full:
+            if not self._put_blocking(path, line):
+                return
+
+        with self._metrics_lock:
+            self._stats["enqueued"] += 1
+            self._stats["high_water"] = max(self._stats["high_water"], self._queue.qsize())
+
+    def _put_blocking(self, path, line):
+        """Back-pressure: wait for room, then write synchronously rather than drop."""
+        start = time.perf_counter()
+        try:
+            self._queue.put((path, line), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            self._append(path, [line])
+            self._bump("sync_fallbacks")
+            return False
+        finally:
+            self._bump("blocked_puts")
+            self._bump("blocked_seconds", time.perf_counter() - start)
+
+    def flush(self, timeout=None):
+        """Blocks until everything enqueued before this call is on disk."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(("__flush__", done))
+        return done.wait(timeout)
+
+    def close(self):
+        if self._stopped:
+            return
+        self._stopped = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(("__stop__", None))
+            self._thread.join()
+
+    def metrics(self):
+        with self._metrics_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        stats["avg_batch_size"] = round(stats["written"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["blocked_seconds"] = round(stats["blocked_seconds"], 4)
+        return stats
+
+    # === Writer thread ===
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch):
+        groups = {}
+        waiters = []
+        stop = False
+        for path, item in batch:
+            if path == "__flush__":
+                waiters.append(item)
+            elif path == "__stop__":
+                stop = True
+            else:
+                groups.setdefault(path, []).append(item)
+
+        start = time.perf_counter()
+        for path, lines in groups.items():
+            try:
+                self._append(path, lines)
+            except Exception as e:
+                print(f"⚠️ Write-behind commit to {path} failed: {e}")
+                self._bump("errors")
+                continue
+            with self._metrics_lock:
+                self._stats["written"] += len(lines)
+
+        if groups:
+            with self._metrics_lock:
+                self._stats["batches"] += 1
+                self._stats["last_commit_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+        for done in waiters:
+            done.set()
+        return stop
+
+    def _append(self, path, lines):
+        with self._lock_for(path):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                f.write("".join(lines))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+    def _lock_for(self, path):
+        with self._locks_guard:
+            return self._file_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+    def _bump(self, name, amount=1):
+        with self._metrics_lock:
+            self._stats[name] += amount
+
+
+def read_jsonl(path):
+    """Reads an append-only JSONL log, skipping a torn last line if the process died mid-write."""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                print(f"⚠️ Skipping unreadable line in {path}")
+    return records
@@ -14,13 +14,16 @@ from backend.services.scraper.scrape_amazon_titles import (
     maybe_add_to_priority,
     is_high_confidence
 )
+from backend.services.scraper.product_catalog import get_product_catalog
+from backend.utils.segment_store import SegmentStore
 
 
 
 # === File paths
 RAW_INPUT = os.path.join(extension_path, "scraped_products_tmp.json")
-CLEANED_FILE = os.path.join(extension_path, "cleaned_products.json")
-PRIORITY_FILE = os.path.join(extension_path, "priority_products.json")
+CLEANED_FILE = os.path.join(extension_path, "cleaned_products.json")  # legacy, imported once into CLEANED_DIR
+CLEANED_DIR = os.path.join(extension_path, "cleaned_products")
+PRIORITY_FILE = os.path.join(extension_path, "priority_products.json")  # exported from the product catalog
 BRAND_LOCATIONS_FILE = os.path.join(extension_path, "brand_locations.json")
 UNRECOGNIZED_FILE = os.path.join(extension_path, "unrecognized_brands.txt")
 BACKUP_DIR = os.path.join(extension_path, "backup")
@@ -49,12 +52,17 @@ def save_json(path, data):
 def rebuild():
     print("🚀 Starting rebuild...\n")
 
-    for f in [CLEANED_FILE, PRIORITY_FILE, BRAND_LOCATIONS_FILE]:
+    for f in [PRIORITY_FILE, BRAND_LOCATIONS_FILE]:
         backup_file(f)
 
+    store = SegmentStore(CLEANED_DIR)
+    if not store.segment_numbers() and os.path.exists(CLEANED_FILE):
+        print(f"📥 Imported {store.import_json(CLEANED_FILE)} products from {CLEANED_FILE}")
+
     raw_products = load_json(RAW_INPUT, default=[])
     brand_locations = load_json(BRAND_LOCATIONS_FILE, default={})
-    priority_products = load_json(PRIORITY_FILE, default={})
+    catalog = get_product_catalog()
+    catalog.migrate_json(PRIORITY_FILE)
     cleaned_products = []
 
     unrecognized = set()
@@ -76,10 +84,14 @@ def rebuild():
                 product["estimated_weight_kg"] = fallback_weight
 
         cleaned_products.append(product)
-        maybe_add_to_priority(product, priority_products)
+        maybe_add_to_priority(product, catalog)
 
-    save_json(CLEANED_FILE, cleaned_products)
-    save_json(PRIORITY_FILE, priority_products)
+    # Re-cleaned products supersede their older versions (last write per ASIN wins)
+    store.append_many(cleaned_products)
+    store.compact()
+    total = sum(1 for _ in store.iter_records())
+    store.close()
+    catalog.export_json(PRIORITY_FILE)
 
     if unrecognized:
         with open(UNRECOGNIZED_FILE, "a", encoding="utf-8") as f:
@@ -87,7 +99,7 @@ def rebuild():
                 f.write(f"{brand}\n")
         print(f"⚠️ Logged {len(unrecognized)} unknown brands → {UNRECOGNIZED_FILE}")
 
-    print(f"\n✅ Done! {len(cleaned_products)} cleaned | {len(priority_products)} priority products")
+    print(f"\n✅ Done! {len(cleaned_products)} cleaned ({total} unique in store) | {len(catalog)} priority products")
 
 if __name__ == "__main__":
     rebuild()
@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import numpy as np
 import pandas as pd
@@ -19,8 +20,11 @@ from sklearn.preprocessing import label_binarize
 from imblearn.over_sampling import SMOTE
 
 # === Setup paths ===
-script_dir = os.path.dirname(__file__)
+script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir)
+sys.path.append(project_root)
+from backend.services.ml_interface.feature_pipeline import FeaturePipeline, SERVING_COLUMNS, default_pipeline_path
+
 csv_path = os.path.join(script_dir, "eco_dataset.csv")                      # ← make sure this CSV exists
 model_dir = os.path.join(project_root, "ml_model")
 encoders_dir = os.path.join(model_dir, "encoders")
@@ -32,42 +36,15 @@ df = pd.read_csv(csv_path, header=None, names=column_names, quotechar='"')
 df = df[df["true_eco_score"] != "true_eco_score"]
 df.dropna(subset=["material", "weight", "transport", "recyclability", "origin"], inplace=True)
 
-for col in ["material", "transport", "recyclability", "origin", "true_eco_score"]:
-    df[col] = df[col].astype(str).str.strip().str.title()
-
-# === Encode features ===
-material_encoder = LabelEncoder()
-transport_encoder = LabelEncoder()
-recycle_encoder = LabelEncoder()
-origin_encoder = LabelEncoder()
-label_encoder = LabelEncoder()
-
-df["material_encoded"] = material_encoder.fit_transform(df["material"])
-df["transport_encoded"] = transport_encoder.fit_transform(df["transport"])
-df["recycle_encoded"] = recycle_encoder.fit_transform(df["recyclability"])
-df["origin_encoded"] = origin_encoder.fit_transform(df["origin"])
-df["label_encoded"] = label_encoder.fit_transform(df["true_eco_score"])
-
-# === Feature Engineering ===
 df["weight"] = pd.to_numeric(df["weight"], errors="coerce")
 df.dropna(subset=["weight"], inplace=True)
-df["weight_log"] = np.log1p(df["weight"])
-df["weight_bin"] = pd.cut(df["weight"], bins=[0, 0.5, 2, 10, 100], labels=[0, 1, 2, 3])
-
-weight_bin_encoder = LabelEncoder()
-df["weight_bin_encoded"] = weight_bin_encoder.fit_transform(df["weight_bin"].astype(str))
-
-# === Final feature set ===
-feature_cols = [
-    "material_encoded",
-    "transport_encoded",
-    "recycle_encoded",
-    "origin_encoded",
-    "weight_log",
-    "weight_bin_encoded"
-]
-X = df[feature_cols]
-y = df["label_encoded"]
+
+# === Encode features ===
+# Normalization, encoding and weight binning live in the shared pipeline, so the
+# server (app.py) builds exactly the same feature rows as training does
+pipeline = FeaturePipeline.fit(df, labels=df["true_eco_score"], columns=SERVING_COLUMNS)
+X = pd.DataFrame(pipeline.transform(df), columns=pipeline.columns)
+y = pipeline.encode_labels(df["true_eco_score"])
 
 # === Apply SMOTE ===
 sm = SMOTE(random_state=42)
@@ -91,21 +68,25 @@ y_pred = model.predict(X_test)
 acc = model.score(X_test, y_test)
 f1 = f1_score(y_test, y_pred, average="macro")
 print("✅ Accuracy:", acc)
-print(classification_report(y_test, y_pred, target_names=label_encoder.classes_))
+print(classification_report(y_test, y_pred, target_names=pipeline.labels))
+
+# === Save model, pipeline and encoders ===
+def to_label_encoder(classes):
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(classes, dtype=object)
+    return encoder
 
-# === Save model and encoders ===
 joblib.dump(model, os.path.join(model_dir, "eco_model.pkl"))
-joblib.dump(material_encoder, os.path.join(encoders_dir, "material_encoder.pkl"))
-joblib.dump(transport_encoder, os.path.join(encoders_dir, "transport_encoder.pkl"))
-joblib.dump(recycle_encoder, os.path.join(encoders_dir, "recycle_encoder.pkl"))
-joblib.dump(origin_encoder, os.path.join(encoders_dir, "origin_encoder.pkl"))
-joblib.dump(label_encoder, os.path.join(encoders_dir, "label_encoder.pkl"))
-joblib.dump(weight_bin_encoder, os.path.join(encoders_dir, "weight_bin_encoder.pkl"))
-print("✅ Model + encoders saved!")
+pipeline.save(default_pipeline_path(model_dir))
+# LabelEncoder pickles are still written for tools that read them directly
+for name, file_name in [("material", "material"), ("transport", "transport"), ("recyclability", "recycle"), ("origin", "origin")]:
+    joblib.dump(to_label_encoder(pipeline.classes(name)), os.path.join(encoders_dir, f"{file_name}_encoder.pkl"))
+joblib.dump(to_label_encoder(pipeline.labels), os.path.join(encoders_dir, "label_encoder.pkl"))
+print("✅ Model + feature pipeline + encoders saved!")
 
 # === Feature Importance Chart ===
 importances = model.feature_importances_
-feature_names = ["material", "transport", "recyclability", "origin", "weight_log", "weight_bin"]
+feature_names = list(pipeline.columns)
 plt.figure(figsize=(6, 4))
 plt.barh(feature_names, importances)
 plt.title("🔍 Feature Importance")
@@ -116,7 +97,7 @@ print("✅ Saved feature importance chart.")
 
 # === Confusion Matrix ===
 cm = confusion_matrix(y_test, y_pred)
-labels = label_encoder.classes_
+labels = pipeline.labels
 plt.figure(figsize=(6, 5))
 sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', xticklabels=labels, yticklabels=labels)
 plt.xlabel("Predicted")
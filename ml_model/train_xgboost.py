@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import joblib
 import numpy as np
@@ -12,55 +13,32 @@ from sklearn.preprocessing import LabelEncoder
 from imblearn.over_sampling import SMOTE
 
 # === Paths ===
-script_dir = os.path.dirname(__file__)
+script_dir = os.path.dirname(os.path.abspath(__file__))
 model_dir = os.path.join(script_dir)
+sys.path.append(os.path.dirname(script_dir))
+from backend.services.ml_interface.feature_pipeline import FeaturePipeline, XGB_COLUMNS
 encoders_dir = os.path.join(model_dir, "xgb_encoders")
 os.makedirs(encoders_dir, exist_ok=True)
 
 csv_path = os.path.join(model_dir, "eco_dataset.csv")
 model_path = os.path.join(model_dir, "xgb_model.json")
 metrics_path = os.path.join(model_dir, "xgb_metrics.json")
+pipeline_path = os.path.join(model_dir, "xgb_feature_pipeline.json")
 
 # === Load dataset ===
 cols = ["title", "material", "weight", "transport", "recyclability", "true_eco_score", "co2_emissions", "origin"]
 df = pd.read_csv(csv_path, header=None, names=cols, quotechar='"')
 df = df[df["true_eco_score"].isin(["A+", "A", "B", "C", "D", "E", "F"])].dropna()
 
-# === Clean & encode ===
-for col in ["material", "transport", "recyclability", "origin"]:
-    df[col] = df[col].astype(str).str.strip().str.title()
-
 df["weight"] = pd.to_numeric(df["weight"], errors="coerce")
 df.dropna(subset=["weight"], inplace=True)
-df["weight_log"] = np.log1p(df["weight"])
-df["weight_bin"] = pd.cut(df["weight"], bins=[0, 0.5, 2, 10, 100], labels=[0, 1, 2, 3])
-
-# === Feature interactions ===
-df["material_transport"] = df["material"] + "_" + df["transport"]
-df["origin_recycle"] = df["origin"] + "_" + df["recyclability"]
-
-# === Encode ===
-encoders = {
-    'material': LabelEncoder(),
-    'transport': LabelEncoder(),
-    'recyclability': LabelEncoder(),
-    'origin': LabelEncoder(),
-    'weight_bin': LabelEncoder(),
-    'material_transport': LabelEncoder(),
-    'origin_recycle': LabelEncoder(),
-    'label': LabelEncoder()
-}
 
-for key, encoder in encoders.items():
-    col = "true_eco_score" if key == "label" else key
-    df[f"{key}_encoded"] = encoder.fit_transform(df[col].astype(str))
+# === Clean, encode, weight log/bin and interactions: the shared feature pipeline ===
+pipeline = FeaturePipeline.fit(df, labels=df["true_eco_score"], columns=XGB_COLUMNS)
 
 # === Features & target ===
-X = df[[ 
-    "material_encoded", "transport_encoded", "recyclability_encoded", "origin_encoded",
-    "weight_log", "weight_bin_encoded", "material_transport_encoded", "origin_recycle_encoded"
-]]
-y = df["label_encoded"]
+X = pd.DataFrame(pipeline.transform(df), columns=pipeline.columns)
+y = pipeline.encode_labels(df["true_eco_score"])
 
 # === Balance ===
 X_bal, y_bal = SMOTE(random_state=42).fit_resample(X, y)
@@ -98,16 +76,19 @@ model = search.best_estimator_
 y_pred = model.predict(X_test)
 acc = model.score(X_test, y_test)
 f1 = f1_score(y_test, y_pred, average="macro")
-report = classification_report(y_test, y_pred, target_names=encoders["label"].classes_, output_dict=True)
+report = classification_report(y_test, y_pred, target_names=pipeline.labels, output_dict=True)
 
 print("✅ Accuracy:", acc)
-print(classification_report(y_test, y_pred, target_names=encoders["label"].classes_))
+print(classification_report(y_test, y_pred, target_names=pipeline.labels))
 
-# === Save model ===
+# === Save model + feature pipeline ===
 model.save_model(model_path)
+pipeline.save(pipeline_path)
 
-# === Save encoders ===
-for name, encoder in encoders.items():
+# === Save encoders (LabelEncoder pickles, for tools that read them directly) ===
+for name in list(pipeline.vocab) + ["label"]:
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(pipeline.labels if name == "label" else pipeline.classes(name), dtype=object)
     joblib.dump(encoder, os.path.join(encoders_dir, f"{name}_encoder.pkl"))
 
 # === Feature importance chart ===
@@ -122,9 +103,9 @@ plt.close()
 metrics = {
     "accuracy": round(acc, 4),
     "f1_score": round(f1, 4),
-    "labels": list(encoders["label"].classes_),
+    "labels": pipeline.labels,
     "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
-    "per_class_f1": [round(report[label]["f1-score"], 4) for label in encoders["label"].classes_]
+    "per_class_f1": [round(report[label]["f1-score"], 4) for label in pipeline.labels]
 }
 
 with open(metrics_path, "w") as f:
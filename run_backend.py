@@ -1,5 +1,5 @@
 # run_backend.py
-from backend.app import main
+from backend.server import main
 
 if __name__ == "__main__":
     main()
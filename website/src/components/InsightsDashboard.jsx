@@ -26,31 +26,22 @@ export default function InsightsDashboard() {
     fetch("http://localhost:5000/insights")
       .then((res) => res.json())
       .then((data) => {
-        if (!Array.isArray(data)) return;
+        if (!data || !data.score_distribution) return;
 
-        const scores = data.map((d) => d.true_eco_score).filter(Boolean);
-        const materials = data.map((d) => d.material).filter(Boolean);
-
-        // ✅ Score breakdown
-        const scoreCounts = scores.reduce((acc, score) => {
-          acc[score] = (acc[score] || 0) + 1;
-          return acc;
-        }, {});
+        // ✅ Score breakdown (precomputed server-side)
         setScoreData(
-          Object.entries(scoreCounts).map(([score, count]) => ({
+          Object.entries(data.score_distribution).map(([score, count]) => ({
             name: score,
             value: count,
           }))
         );
 
-        // ✅ Top materials (deduped + sorted)
-        const deduped = materials.reduce((acc, curr) => {
-          const existing = acc.find((item) => item.name === curr);
-          if (existing) existing.value += 1;
-          else acc.push({ name: curr, value: 1 });
-          return acc;
-        }, []);
-        setMaterialData(deduped.sort((a, b) => b.value - a.value).slice(0, 10));
+        // ✅ Top materials (already sorted by count)
+        setMaterialData(
+          (data.by_material || [])
+            .slice(0, 10)
+            .map((m) => ({ name: m.name, value: m.count }))
+        );
       })
       .catch((err) => console.error("Failed to load insights:", err));
   }, []);